@@ -19,6 +19,9 @@ class SingletonModelAdminMixin:
     - Redirect the changelist to the single instance change view
     - After creating a new instance, redirect to its change view
 
+    When the model is a ``CachedSingletonModel`` the existing instance is read
+    through ``get_solo()``, so these checks do not query the DB.
+
     Example
     -------
     Basic usage in ``admin.py``::
@@ -39,9 +42,16 @@ class SingletonModelAdminMixin:
     # registration time — declare it here so `self.model` is recognized.
     model: Any
 
+    def get_singleton_instance(self):
+        """Return the existing instance, or None (cached for CachedSingletonModel)."""
+        get_solo = getattr(self.model, "get_solo", None)
+        if get_solo is not None:
+            return get_solo()
+        return self.model.objects.first()
+
     def has_add_permission(self, request):
         # Only allow add if no instance exists
-        return not self.model.objects.exists()
+        return self.get_singleton_instance() is None
 
     def has_delete_permission(self, request, obj=None):
         # Prevent deleting the singleton from the admin UI
@@ -67,7 +77,7 @@ class SingletonModelAdminMixin:
         return redirect(change_url)
 
     def changelist_view(self, request, extra_context=None):
-        config = self.model.objects.first()
+        config = self.get_singleton_instance()
         if config is not None:
             return redirect(
                 reverse(
@@ -88,7 +98,7 @@ class SingletonModelAdminMixin:
         )
 
     def add_view(self, request, form_url="", extra_context=None):
-        config = self.model.objects.first()
+        config = self.get_singleton_instance()
         if config is not None:
             change_url = reverse(
                 f"admin:{self.model._meta.app_label}_{self.model._meta.model_name}_change",
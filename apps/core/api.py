@@ -1,24 +1,108 @@
+import hashlib
+
+from django.conf import settings
 from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from rest_framework.permissions import IsAdminUser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 from rest_framework.views import APIView
 
+from .cache import LocalTTLCache
 from .serializers import ConfigSerializer
-from .utils import get_config
+from .utils import get_config, get_limits_snapshot
+
+# max-age (seconds) advertised to browsers/CDNs for the polled core endpoints
+API_CACHE_MAX_AGE = getattr(settings, "CORE_API_CACHE_MAX_AGE", 60)
+
+
+# Pre-rendered LimitsAPIView payloads, keyed by role and limits generation so
+# that RoleImageLimit/RoleTextLimit writes (which bump the generation) make
+# old entries unreachable. Local tier first, then the shared cache.
+LIMITS_PAYLOAD_TTL = 300
+
+_limits_payloads = LocalTTLCache(maxsize=64, ttl=LIMITS_PAYLOAD_TTL)
+
+
+def make_etag(*parts) -> str:
+    """Return a strong ETag built from the given version parts."""
+    digest = hashlib.sha256(":".join(str(p) for p in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _patch_conditional_headers(response, etag: str, private: bool = False):
+    response["ETag"] = etag
+    if private:
+        patch_cache_control(response, private=True, max_age=API_CACHE_MAX_AGE)
+    else:
+        patch_cache_control(response, public=True, max_age=API_CACHE_MAX_AGE)
+    patch_vary_headers(response, ("Authorization", "Cookie"))
+    return response
+
+
+def conditional_response(request, etag: str, private: bool = False):
+    """Return a 304 response if ``If-None-Match`` matches ``etag``, else None."""
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        return None
+    return _patch_conditional_headers(response, etag, private=private)
 
 
 class ConfigAPIView(APIView):
     """
     API endpoint for global site configuration.
     Returns all fields of SiteConfiguration singleton.
+
+    Responses carry a strong ETag derived from ``updated_at`` so clients and
+    CDNs can revalidate with ``If-None-Match`` and get a 304.
     """
 
     def get(self, request, format=None):
         config = get_config()
-        if config:
-            serializer = ConfigSerializer(config)
-            return Response(serializer.data)
-        return Response({}, status=404)
+        if not config:
+            return Response({}, status=404)
+
+        etag = make_etag("config", config.pk, config.updated_at.isoformat())
+        not_modified = conditional_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        serializer = ConfigSerializer(config)
+        return _patch_conditional_headers(Response(serializer.data), etag)
+
+
+def render_limits_payload(role: str, generation) -> bytes:
+    """Return the JSON body of ``LimitsAPIView`` for ``role``, rendering on a miss."""
+    from .policy import role_policy
+    from .serializers import LimitsSerializer
+
+    key = f"core:limits_json:{role.lower()}:{generation}"
+    payload = _limits_payloads.get(key)
+    if payload is not None:
+        return payload
+
+    try:
+        payload = cache.get(key)
+    except Exception:
+        payload = None
+
+    if payload is None:
+        serializer = LimitsSerializer(role_policy.limits_for(role).as_dict())
+        payload = JSONRenderer().render(serializer.data)
+        try:
+            cache.set(key, payload, LIMITS_PAYLOAD_TTL)
+        except Exception:
+            # cache may not be configured; ignore failures
+            pass
+
+    _limits_payloads.set(key, payload)
+    return payload
 
 
 class LimitsAPIView(APIView):
@@ -29,41 +113,55 @@ class LimitsAPIView(APIView):
         "image_max": int,
         "text_limits": {"title": int, "body": int}
     }
+
+    Limits depend only on the effective role, so both the pre-rendered JSON
+    body (see ``render_limits_payload``) and the strong ETag are keyed by the
+    role and the limits-snapshot generation (which also moves when
+    SiteConfiguration changes). Hits are served as raw bytes without going
+    through DRF rendering, and ``If-None-Match`` is answered with a 304.
     """
 
     permission_classes = []  # AllowAny
     throttle_classes = [UserRateThrottle, AnonRateThrottle]
 
     def get(self, request, format=None):
-        from .serializers import LimitsSerializer
-        from .utils import get_user_image_limit, get_user_text_limits
+        from .middleware import get_request_role
 
         user = request.user if request.user.is_authenticated else None
 
-        # Build a safer per-user cache key that includes a few auth flags so
-        # that different kinds of users who happen to share numeric PKs
-        # (e.g. during tests or odd DB resets) won't collide.
-        if user:
-            user_key = f"{user.pk}:{int(getattr(user, 'is_superuser', False))}:{int(getattr(user, 'is_staff', False))}"
-        else:
-            user_key = "anon"
-
-        # Cache per-user (or per-anonymous) effective limits for a short TTL
-        cache_key = f"core:limits:{user_key}"
-        cached = cache.get(cache_key)
-        if cached is not None:
-            return Response(cached)
-
-        image_max = get_user_image_limit(user)
-        text_limits = get_user_text_limits(user)
-
-        data = {"image_max": image_max, "text_limits": text_limits}
-        # cache for 30 seconds — short TTL to reflect recent admin changes
-        try:
-            cache.set(cache_key, data, 30)
-        except Exception:
-            # cache may not be configured; ignore failures
-            pass
+        role = get_request_role(request, user)
+        generation = get_limits_snapshot().generation
+        etag = make_etag("limits", role, generation)
+        not_modified = conditional_response(request, etag, private=user is not None)
+        if not_modified is not None:
+            return not_modified
+
+        response = HttpResponse(
+            render_limits_payload(role, generation), content_type="application/json"
+        )
+        return _patch_conditional_headers(response, etag, private=user is not None)
+
+
+class BulkLimitsAPIView(APIView):
+    """Resolve effective limits for many users at once (staff only).
+
+    Request body: ``{"user_ids": [int, ...]}``
+
+    Response shape (unknown ids are omitted):
+    {
+        "<user_id>": {"image_max": int, "text_limits": {"title": int, "body": int}},
+        ...
+    }
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, format=None):
+        from .serializers import BulkLimitsRequestSerializer
+        from .utils import get_bulk_user_limits
+
+        serializer = BulkLimitsRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-        serializer = LimitsSerializer(data)
-        return Response(serializer.data)
+        limits = get_bulk_user_limits(serializer.validated_data["user_ids"])
+        return Response({str(user_id): data for user_id, data in limits.items()})
@@ -0,0 +1,151 @@
+import math
+import operator
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from django.core.cache import cache
+
+
+class LocalTTLCache:
+    """Small thread-safe, process-local LRU cache with a per-entry TTL.
+
+    Used as the first tier in front of the shared Django cache for values that
+    are read on hot request paths and change rarely.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def cached_lookup(
+    key: str,
+    loader: Callable[[], Any],
+    ttl: float,
+    *,
+    beta: float = 1.0,
+    lock_timeout: float = 10,
+    wait: float = 2.0,
+    stale_grace: Optional[float] = None,
+    negative_ttl: Optional[float] = None,
+    is_negative: Callable[[Any], bool] = operator.not_,
+) -> Any:
+    """Return ``loader()`` cached under ``key`` with stampede protection.
+
+    - Values are stored wrapped as ``(value, compute_time, expires_at)``, so a
+      cached ``None`` (or empty list) is a real hit, distinguishable from a
+      miss: negative results are cached like any other value, for
+      ``negative_ttl`` seconds when given (``is_negative`` decides which
+      values count as negative; falsy ones by default).
+    - Probabilistic early expiration (XFetch): each reader may decide to
+      refresh shortly before ``expires_at``, with a probability that grows as
+      expiry approaches and with how expensive the value was to compute.
+    - Only the worker that wins a ``cache.add`` lock recomputes; the others
+      keep serving the stale value (kept ``stale_grace`` seconds past expiry,
+      default ``ttl``) or, on a cold miss, wait up to ``wait`` seconds for the
+      winner before computing themselves, leaving its lock in place.
+    """
+    try:
+        entry = cache.get(key)
+    except Exception:
+        return loader()
+
+    now = time.time()
+    if entry is not None:
+        value, delta, expires_at = entry
+        jitter = -delta * beta * math.log(1.0 - random.random())
+        if now + jitter < expires_at:
+            return value
+
+    lock_key = f"{key}:lock"
+    token = uuid.uuid4().hex
+    acquired = cache.add(lock_key, token, lock_timeout)
+    if not acquired:
+        if entry is not None:
+            return entry[0]
+        deadline = time.monotonic() + wait
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+
+    try:
+        start = time.monotonic()
+        value = loader()
+        delta = time.monotonic() - start
+        if negative_ttl is not None and is_negative(value):
+            ttl = negative_ttl
+        store_cached(key, value, ttl, delta=delta, stale_grace=stale_grace)
+        return value
+    finally:
+        # Only the owner releases the lock, and not once it has expired and
+        # been taken over by another worker.
+        if acquired and cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+def store_cached(
+    key: str,
+    value: Any,
+    ttl: float,
+    *,
+    delta: float = 0.0,
+    stale_grace: Optional[float] = None,
+) -> None:
+    """Store ``value`` under ``key`` in the format read by ``cached_lookup``.
+
+    Lets background jobs refresh an entry ahead of expiry so request-path
+    readers keep getting fresh hits.
+    """
+    grace = ttl if stale_grace is None else stale_grace
+    cache.set(key, (value, delta, time.time() + ttl), ttl + grace)
+
+
+def cached_ttl(key: str) -> Optional[float]:
+    """Return seconds until the ``cached_lookup`` entry under ``key`` expires.
+
+    The result is negative for a stale entry still within its grace period
+    and None when nothing is cached.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    return entry[2] - time.time()
@@ -0,0 +1,10 @@
+from .utils import get_config
+
+
+def site_config(request):
+    """Expose the SiteConfiguration singleton to templates as ``site_config``.
+
+    Served from the process-local copy kept by ``get_config``, so rendering a
+    template does not add a cache or DB round trip per request.
+    """
+    return {"site_config": get_config()}
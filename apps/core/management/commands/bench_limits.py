@@ -0,0 +1,83 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from apps.core.api import LimitsAPIView
+from apps.core.policy import role_policy
+from apps.core.serializers import LimitsSerializer
+from apps.core.utils import _role_cache, invalidate_limits_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark role resolution, limits lookup through RolePolicy and the "
+        "LimitsAPIView hit path"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=10000,
+            help="Number of lookups per measurement (default: 10000)",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=100,
+            help="Number of existing users to cycle through (default: 100)",
+        )
+
+    def _measure(self, label, func, items, iterations):
+        start = time.perf_counter()
+        count = len(items)
+        for i in range(iterations):
+            func(items[i % count])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"{label:<32} {elapsed * 1e6 / iterations:>10.2f} us/op "
+            f"({iterations} ops, {elapsed:.3f}s)"
+        )
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        users = list(get_user_model().objects.all()[: options["users"]])
+        if not users:
+            users = [AnonymousUser()]
+
+        roles = [role_policy.resolve(u) for u in users]
+        group_names = ["SubscriberPaid", "Moderators", "staff", "site-admins", "misc"]
+
+        _role_cache.clear()
+        invalidate_limits_snapshot()
+        self._measure(
+            "limits_for_user (cold)", role_policy.limits_for_user, users, len(users)
+        )
+        self._measure(
+            "limits_for_user (warm)", role_policy.limits_for_user, users, iterations
+        )
+        self._measure("resolve (warm)", role_policy.resolve, users, iterations)
+        self._measure("limits_for (warm)", role_policy.limits_for, roles, iterations)
+        self._measure(
+            "role_for_group (memoized)",
+            role_policy.role_for_group,
+            group_names,
+            iterations,
+        )
+
+        # LimitsAPIView: pre-rendered payload hit vs. serializing on every call
+        factory = APIRequestFactory()
+        view = LimitsAPIView.as_view(throttle_classes=[])
+        requests = [factory.get("/api/core/limits/")]
+        view(requests[0])
+        self._measure("LimitsAPIView GET (hit)", view, requests, iterations)
+
+        def serialize(role):
+            data = role_policy.limits_for(role).as_dict()
+            return JSONRenderer().render(LimitsSerializer(data).data)
+
+        self._measure("serializer + render (miss)", serialize, roles, iterations)
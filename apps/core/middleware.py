@@ -0,0 +1,117 @@
+import time
+
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .policy import role_policy
+from .utils import get_limits_snapshot, get_member_role_entry, get_role_version
+
+SESSION_ROLE_KEY = "_core_effective_role"
+
+# Upper bound (seconds) on how long a role stored in the session is trusted
+# without recomputing it, so group membership changes eventually show up.
+SESSION_ROLE_TTL = getattr(settings, "CORE_SESSION_ROLE_TTL", 300)
+
+
+def _is_member(user) -> bool:
+    """Return whether ``user``'s role comes from profile, entitlements and groups."""
+    return not (
+        user is None
+        or not user.is_authenticated
+        or getattr(user, "is_superuser", False)
+        or getattr(user, "is_staff", False)
+    )
+
+
+def store_effective_role(request, user) -> str:
+    """Resolve ``user``'s role and remember it in the session with the limits version.
+
+    A role granted by an entitlement is stored with the time it lapses, and
+    member roles with the user's role version (read first, so a concurrent
+    invalidation is never masked).
+    """
+    role_version = get_role_version(user.pk)
+    if _is_member(user):
+        role, expires_at = get_member_role_entry(user)
+    else:
+        role, expires_at = role_policy.resolve(user), None
+    session = getattr(request, "session", None)
+    if session is not None:
+        session[SESSION_ROLE_KEY] = {
+            "user_id": user.pk,
+            "role": role,
+            "version": get_limits_snapshot().generation,
+            "stored_at": int(time.time()),
+            "expires_at": expires_at,
+            "role_version": role_version,
+        }
+    return role
+
+
+def get_session_role(request, user) -> str:
+    """Return the effective role of ``user`` for this request.
+
+    Superusers, staff and anonymous users are resolved from flags on the user
+    object. For regular members the role stored in the session is reused as
+    long as it belongs to the same user, matches the current limits-snapshot
+    generation and the user's role version (so group, profile and
+    subscription changes apply immediately), is younger than
+    ``CORE_SESSION_ROLE_TTL`` and has not passed the end of the entitlement
+    that granted it.
+    """
+    if not _is_member(user):
+        return role_policy.resolve(user)
+
+    session = getattr(request, "session", None)
+    data = session.get(SESSION_ROLE_KEY) if session is not None else None
+    now = time.time()
+    if (
+        data
+        and data.get("user_id") == user.pk
+        and data.get("version") == get_limits_snapshot().generation
+        and data.get("role_version") == get_role_version(user.pk)
+        and now - data.get("stored_at", 0) < SESSION_ROLE_TTL
+        and (data.get("expires_at") is None or now < data["expires_at"])
+    ):
+        return data["role"]
+
+    return store_effective_role(request, user)
+
+
+def get_request_role(request, user) -> str:
+    """Return the role for ``user``, reusing ``request.effective_role`` when it applies.
+
+    Accepts both Django and DRF requests. The middleware value is only used when
+    ``user`` is the user authenticated by the session, so DRF token or forced
+    authentication still resolve the right role.
+    """
+    django_request = getattr(request, "_request", request)
+    if (
+        user is not None
+        and hasattr(django_request, "effective_role")
+        and getattr(django_request, "user", None) is user
+    ):
+        return str(django_request.effective_role)
+    return role_policy.resolve(user)
+
+
+class EffectiveRoleMiddleware:
+    """Attach ``request.effective_role`` and ``request.limits`` lazily.
+
+    The role is computed once at login (see the ``user_logged_in`` handler in
+    ``apps.core.signals``) and kept in the session, so steady-state requests
+    derive limits from the session and the in-memory limits snapshot with a
+    single cache read (the user's role version) and no DB query. Must be placed after ``AuthenticationMiddleware``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.effective_role = SimpleLazyObject(
+            lambda: get_session_role(request, getattr(request, "user", None))
+        )
+        request.limits = SimpleLazyObject(
+            lambda: role_policy.limits_for(str(request.effective_role))
+        )
+        return self.get_response(request)
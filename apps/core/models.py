@@ -1,13 +1,130 @@
+import threading
+import time
+
+from django.conf import settings
 from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.signals import class_prepared, post_delete, post_save
 from django.utils.translation import gettext_lazy as _
 
+from .cache import cached_lookup
+
+SINGLETON_CHECK_INTERVAL = getattr(settings, "CORE_SINGLETON_CHECK_INTERVAL", 5)
+SINGLETON_VERSION_TTL = 300
+
+_singleton_lock = threading.Lock()
+# model class -> (version stamp, instance or None, monotonic time of last check)
+_singleton_states: dict = {}
+
+
+class CachedSingletonModel(models.Model):
+    """Abstract base for models with a single row that is read on hot paths.
 
-class SiteConfiguration(models.Model):
+    ``get_solo()`` returns the instance from a process-local copy. The shared
+    cache only holds a small version stamp (pk plus ``singleton_version_field``,
+    ``updated_at`` by default), fetched through ``cached_lookup`` so a missing
+    row is negatively cached and expiry does not stampede the DB. Each process
+    checks the stamp at most every ``CORE_SINGLETON_CHECK_INTERVAL`` seconds and
+    reloads the row only when it changed. Saves and deletes (including
+    queryset deletes) clear the stamp automatically.
+    """
+
+    singleton_version_field = "updated_at"
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def singleton_cache_key(cls) -> str:
+        return f"core:singleton:{cls._meta.label_lower}:version"
+
+    @classmethod
+    def _singleton_stamp(cls, pk, version) -> str:
+        if pk is None:
+            return "none"
+        if hasattr(version, "isoformat"):
+            version = version.isoformat()
+        return f"{pk}:{version}"
+
+    @classmethod
+    def _load_singleton_stamp(cls) -> str:
+        row = (
+            cls._default_manager.order_by("pk")
+            .values_list("pk", cls.singleton_version_field)
+            .first()
+        )
+        return cls._singleton_stamp(*row) if row else cls._singleton_stamp(None, None)
+
+    @classmethod
+    def get_solo(cls):
+        """Return the singleton instance, or None if no row exists."""
+        state = _singleton_states.get(cls)
+        now = time.monotonic()
+        if state is not None and now - state[2] < SINGLETON_CHECK_INTERVAL:
+            return state[1]
+
+        try:
+            version = cached_lookup(
+                cls.singleton_cache_key(),
+                cls._load_singleton_stamp,
+                SINGLETON_VERSION_TTL,
+            )
+        except Exception:
+            return state[1] if state is not None else None
+
+        if state is not None and state[0] == version:
+            _singleton_states[cls] = (state[0], state[1], now)
+            return state[1]
+
+        with _singleton_lock:
+            try:
+                obj = cls._default_manager.order_by("pk").first()
+            except Exception:
+                return state[1] if state is not None else None
+            if obj is None:
+                stamp = cls._singleton_stamp(None, None)
+            else:
+                stamp = cls._singleton_stamp(
+                    obj.pk, getattr(obj, cls.singleton_version_field)
+                )
+            _singleton_states[cls] = (stamp, obj, now)
+        return obj
+
+    @classmethod
+    def invalidate_solo(cls) -> None:
+        """Drop the local copy and the shared version stamp."""
+        try:
+            cache.delete(cls.singleton_cache_key())
+        except Exception:
+            # cache may not be configured; ignore failures
+            pass
+        with _singleton_lock:
+            _singleton_states.pop(cls, None)
+
+
+def _invalidate_singleton(sender, **kwargs):
+    sender.invalidate_solo()
+
+
+def _connect_singleton_signals(sender, **kwargs):
+    if issubclass(sender, CachedSingletonModel) and not sender._meta.abstract:
+        uid = sender._meta.label_lower
+        post_save.connect(
+            _invalidate_singleton, sender=sender, dispatch_uid=f"{uid}_solo_saved"
+        )
+        post_delete.connect(
+            _invalidate_singleton, sender=sender, dispatch_uid=f"{uid}_solo_deleted"
+        )
+
+
+class_prepared.connect(_connect_singleton_signals)
+
+
+class SiteConfiguration(CachedSingletonModel):
     """
     Singleton model for global site settings (not secrets).
-    Only one instance allowed. Use get_config() utility to access.
+    Only one instance allowed. Use get_config() / get_solo() to access.
     """
 
     site_name = models.CharField(_("Site Name"), max_length=128)
@@ -27,9 +144,8 @@ class SiteConfiguration(models.Model):
 
     def save(self, *args, **kwargs):
         self.full_clean()
+        # Cached copies are invalidated by the CachedSingletonModel post_save handler
         super().save(*args, **kwargs)
-        # Invalidate cache on save
-        cache.delete("site_config_singleton")
 
     def __str__(self):
         return self.site_name or _("Site Configuration")
@@ -0,0 +1,174 @@
+import re
+from dataclasses import dataclass
+from typing import Iterable, Optional, Tuple
+
+from django.contrib.auth.models import AnonymousUser
+
+from .utils import DEFAULT_IMAGE_LIMIT, _get_member_role, get_limits_snapshot
+
+ANONYMOUS_ROLE = "Anonymous"
+DEFAULT_ROLE = "RegisteredFree"
+
+# Group-name rules in priority order: (role, substrings, exact names).
+# A group matches a rule if its lower-cased name contains any of the
+# substrings or equals one of the exact names.
+DEFAULT_GROUP_RULES = (
+    ("SubscriberPaid", ("subscriber", "paid"), ()),
+    ("Moderator", ("moderator",), ()),
+    ("Staff", (), ("staff",)),
+    ("Admin", ("admin",), ()),
+    ("RegisteredFree", ("free", "registered"), ()),
+)
+
+
+@dataclass(frozen=True)
+class RoleLimits:
+    """Effective limits for a role."""
+
+    role: str
+    image_max: int
+    title: int
+    body: int
+
+    @property
+    def text_limits(self) -> dict:
+        return {"title": self.title, "body": self.body}
+
+    def as_dict(self) -> dict:
+        return {"image_max": self.image_max, "text_limits": self.text_limits}
+
+
+class RolePolicy:
+    """Single source of truth for mapping users to roles and roles to limits.
+
+    Group-name rules are compiled once into an exact-name map plus one regex
+    whose alternatives are tried in priority order, so classifying a group is
+    a dict hit in the steady state (results are memoized per group name).
+    Limits come from the in-memory snapshot (see ``get_limits_snapshot``) and
+    are materialized once per snapshot generation as frozen ``RoleLimits``.
+    """
+
+    def __init__(self, rules=DEFAULT_GROUP_RULES, default_role: str = DEFAULT_ROLE):
+        self.default_role = default_role
+        self._exact = {}
+        branches = []
+        for index, (role, substrings, exact_names) in enumerate(rules):
+            self._exact.setdefault(role.lower(), role)
+            for name in exact_names:
+                self._exact.setdefault(name.lower(), role)
+            if substrings:
+                alternation = "|".join(re.escape(s.lower()) for s in substrings)
+                branches.append(f"(?=.*(?:{alternation}))(?P<r{index}>)")
+            if exact_names:
+                alternation = "|".join(re.escape(n.lower()) for n in exact_names)
+                branches.append(f"(?P<x{index}>(?:{alternation})$)")
+        self._roles = [role for role, _, _ in rules]
+        self._pattern = re.compile("|".join(branches), re.DOTALL) if branches else None
+        self._group_roles: dict = {}
+        # (snapshot generation, {role: RoleLimits}), swapped in one assignment
+        self._limits: Tuple[Optional[int], dict] = (None, {})
+
+    def role_for_group(self, name: str) -> Optional[str]:
+        """Return the role a single group name maps to, or None."""
+        try:
+            return self._group_roles[name]
+        except KeyError:
+            pass
+
+        lowered = name.lower()
+        role = self._exact.get(lowered)
+        if role is None and self._pattern is not None:
+            match = self._pattern.match(lowered)
+            if match is not None:
+                role = self._roles[int(match.lastgroup[1:])]
+        self._group_roles[name] = role
+        return role
+
+    def role_for_groups(self, group_names: Iterable[str]) -> str:
+        """Return the role of the first group that matches a rule."""
+        for name in group_names:
+            if not name:
+                continue
+            role = self.role_for_group(name)
+            if role is not None:
+                return role
+        return self.default_role
+
+    def resolve(
+        self,
+        user,
+        group_names: Optional[Iterable[str]] = None,
+        entitled_role: Optional[str] = None,
+    ) -> str:
+        """Return the canonical role name for ``user``.
+
+        Order of detection:
+        - Anonymous users -> 'Anonymous'
+        - superuser -> 'Admin'
+        - staff -> 'Staff'
+        - profile.subscription_type if provided
+        - entitlement role (``CORE_ENTITLEMENT_RESOLVER``, e.g. an active
+          subscription -> 'SubscriberPaid')
+        - group name rules (SubscriberPaid, Moderator, Staff, Admin, RegisteredFree)
+        - fallback -> 'RegisteredFree'
+
+        Profile, entitlement and group lookups go through the role cache in
+        ``apps.core.utils`` unless ``group_names`` is given (e.g. from a
+        prefetch), in which case ``entitled_role`` is used as resolved by the
+        caller.
+        """
+        if (
+            not user
+            or isinstance(user, AnonymousUser)
+            or getattr(user, "is_anonymous", False)
+        ):
+            return ANONYMOUS_ROLE
+
+        if getattr(user, "is_superuser", False):
+            return "Admin"
+        if getattr(user, "is_staff", False):
+            return "Staff"
+
+        if group_names is None:
+            return _get_member_role(user)
+
+        subscription_type = getattr(
+            getattr(user, "profile", None), "subscription_type", None
+        )
+        if subscription_type:
+            return subscription_type
+        if entitled_role:
+            return entitled_role
+        return self.role_for_groups(group_names)
+
+    def limits_for(self, role: str) -> RoleLimits:
+        """Return the frozen limits record for ``role``."""
+        snapshot = get_limits_snapshot()
+        generation, memo = self._limits
+        if generation != snapshot.generation:
+            # Records go into the dict of the snapshot they were built from,
+            # never into one a concurrent caller swapped in for a newer one
+            memo = {}
+            self._limits = (snapshot.generation, memo)
+
+        key = role.lower()
+        limits = memo.get(key)
+        if limits is None:
+            text = snapshot.text_limit(role)
+            # Anonymous users may create ads but are capped independently of
+            # the RegisteredFree image limit.
+            if role == ANONYMOUS_ROLE:
+                image_max = DEFAULT_IMAGE_LIMIT
+            else:
+                image_max = snapshot.image_limit(role)
+            limits = RoleLimits(
+                role=role, image_max=image_max, title=text["title"], body=text["body"]
+            )
+            memo[key] = limits
+        return limits
+
+    def limits_for_user(self, user) -> RoleLimits:
+        return self.limits_for(self.resolve(user))
+
+
+role_policy = RolePolicy()
@@ -19,3 +19,11 @@ class ConfigSerializer(serializers.ModelSerializer):
 class LimitsSerializer(serializers.Serializer):
     image_max = serializers.IntegerField()
     text_limits = serializers.DictField(child=serializers.IntegerField())
+
+
+class BulkLimitsRequestSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=10000,
+    )
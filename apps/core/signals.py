@@ -0,0 +1,121 @@
+from allauth.account.signals import user_logged_in
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+
+from .models import RoleImageLimit, RoleTextLimit, SiteConfiguration
+from .utils import (
+    get_profile_relation,
+    invalidate_limits_snapshot,
+    invalidate_user_role,
+)
+
+User = get_user_model()
+
+
+def _on_user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalidate cached roles when ``User.groups`` membership changes.
+
+    ``reverse`` is True when the change is made from the group side
+    (``group.user_set.add(...)``); ``pk_set`` then holds user ids.
+    """
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            invalidate_user_role(instance.pk)
+        return
+
+    if action == "pre_clear":
+        # pk_set is None on clear; remember the members before they are removed
+        instance._core_cleared_user_ids = list(
+            instance.user_set.values_list("pk", flat=True)
+        )
+    elif action in ("post_add", "post_remove"):
+        for user_id in pk_set or ():
+            invalidate_user_role(user_id)
+    elif action == "post_clear":
+        for user_id in getattr(instance, "_core_cleared_user_ids", ()):
+            invalidate_user_role(user_id)
+
+
+def _on_group_saved(sender, instance, created, **kwargs):
+    # A renamed group can map its members to a different role
+    if created:
+        return
+    for user_id in instance.user_set.values_list("pk", flat=True):
+        invalidate_user_role(user_id)
+
+
+def _on_group_deleted(sender, instance, **kwargs):
+    # Deleting a group removes its memberships without m2m_changed; the
+    # invalidation itself waits for the commit (see invalidate_user_role)
+    for user_id in instance.user_set.values_list("pk", flat=True):
+        invalidate_user_role(user_id)
+
+
+def _on_user_saved(sender, instance, created, **kwargs):
+    # New users may reuse the pk of a deleted user; never serve its cached role
+    if created:
+        invalidate_user_role(instance.pk)
+
+
+def _on_user_deleted(sender, instance, **kwargs):
+    invalidate_user_role(instance.pk)
+
+
+def _on_limits_changed(sender, instance, **kwargs):
+    invalidate_limits_snapshot()
+
+
+def _on_user_logged_in(sender, request, user, **kwargs):
+    from .middleware import store_effective_role
+
+    store_effective_role(request, user)
+
+
+def connect_signals():
+    m2m_changed.connect(
+        _on_user_groups_changed,
+        sender=User.groups.through,
+        dispatch_uid="core_user_groups_changed",
+    )
+    post_save.connect(_on_group_saved, sender=Group, dispatch_uid="core_group_saved")
+    pre_delete.connect(
+        _on_group_deleted, sender=Group, dispatch_uid="core_group_deleted"
+    )
+    post_save.connect(_on_user_saved, sender=User, dispatch_uid="core_user_saved")
+    post_delete.connect(_on_user_deleted, sender=User, dispatch_uid="core_user_deleted")
+    user_logged_in.connect(_on_user_logged_in, dispatch_uid="core_user_logged_in")
+
+    for model in (RoleImageLimit, RoleTextLimit, SiteConfiguration):
+        label = model._meta.model_name
+        post_save.connect(
+            _on_limits_changed, sender=model, dispatch_uid=f"core_{label}_saved"
+        )
+        post_delete.connect(
+            _on_limits_changed, sender=model, dispatch_uid=f"core_{label}_deleted"
+        )
+
+    profile_rel = get_profile_relation()
+    if profile_rel is None:
+        return
+
+    user_attname = profile_rel.field.attname
+
+    def _on_profile_changed(sender, instance, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields and "subscription_type" not in update_fields:
+            return
+        invalidate_user_role(getattr(instance, user_attname, None))
+
+    post_save.connect(
+        _on_profile_changed,
+        sender=profile_rel.related_model,
+        weak=False,
+        dispatch_uid="core_profile_saved",
+    )
+    post_delete.connect(
+        _on_profile_changed,
+        sender=profile_rel.related_model,
+        weak=False,
+        dispatch_uid="core_profile_deleted",
+    )
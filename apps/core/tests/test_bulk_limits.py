@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.core.models import RoleImageLimit, RoleTextLimit
+from apps.core.utils import get_bulk_user_limits, get_limits_snapshot
+
+User = get_user_model()
+
+
+class BulkLimitsTest(TestCase):
+    def setUp(self):
+        self.paid_group = Group.objects.create(name="SubscriberPaid")
+        self.users = [
+            User.objects.create_user(username=f"bulk{i}", password="pass")
+            for i in range(5)
+        ]
+        self.users[0].groups.add(self.paid_group)
+        self.admin = User.objects.create_user(
+            username="bulkadmin", password="pass", is_staff=True, is_superuser=True
+        )
+        self.client = APIClient()
+
+    def test_constant_number_of_queries(self):
+        get_limits_snapshot()
+        ids = [u.pk for u in self.users]
+        # one query for users, one for prefetched groups, one for the
+        # entitlements (active subscriptions) of the uncached users
+        with self.assertNumQueries(3):
+            limits = get_bulk_user_limits(ids)
+
+        paid = RoleTextLimit.objects.get(role_name="SubscriberPaid")
+        free_images = RoleImageLimit.objects.get(role_name="RegisteredFree")
+        self.assertEqual(len(limits), 5)
+        self.assertEqual(limits[ids[0]]["text_limits"]["title"], paid.title_limit)
+        self.assertEqual(limits[ids[1]]["image_max"], free_images.max_images)
+
+    def test_unknown_ids_are_omitted(self):
+        limits = get_bulk_user_limits([self.users[1].pk, 999999])
+        self.assertEqual(list(limits), [self.users[1].pk])
+
+    def test_endpoint_requires_staff(self):
+        self.client.force_authenticate(user=self.users[1])
+        resp = self.client.post(
+            "/api/core/limits/bulk/", {"user_ids": [self.users[1].pk]}, format="json"
+        )
+        self.assertEqual(resp.status_code, 403)
+
+    def test_endpoint_returns_mapping(self):
+        self.client.force_authenticate(user=self.admin)
+        ids = [u.pk for u in self.users]
+        resp = self.client.post(
+            "/api/core/limits/bulk/", {"user_ids": ids}, format="json"
+        )
+        self.assertEqual(resp.status_code, 200, resp.content)
+        data = resp.json()
+        self.assertEqual(set(data), {str(pk) for pk in ids})
+        self.assertIn("image_max", data[str(ids[0])])
+        self.assertIn("text_limits", data[str(ids[0])])
@@ -0,0 +1,57 @@
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from apps.core.cache import cached_lookup
+
+
+class CachedLookupTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_none_is_cached(self):
+        loader = Mock(return_value=None)
+        self.assertIsNone(cached_lookup("t:none", loader, 60))
+        self.assertIsNone(cached_lookup("t:none", loader, 60))
+        loader.assert_called_once()
+
+    def test_negative_ttl(self):
+        cached_lookup("t:neg", lambda: [], 60, negative_ttl=5)
+        _, _, expires_at = cache.get("t:neg")
+        cached_lookup("t:pos", lambda: [1], 60, negative_ttl=5)
+        _, _, expires_at_pos = cache.get("t:pos")
+        self.assertLess(expires_at, expires_at_pos - 50)
+
+    def test_expired_value_refreshed_by_lock_holder(self):
+        cache.set("t:exp", ("old", 0.0, 0.0), 60)
+        self.assertEqual(cached_lookup("t:exp", lambda: "new", 60), "new")
+        self.assertEqual(cache.get("t:exp")[0], "new")
+        self.assertIsNone(cache.get("t:exp:lock"))
+
+    def test_stale_value_served_while_another_worker_refreshes(self):
+        cache.set("t:stale", ("old", 0.0, 0.0), 60)
+        cache.add("t:stale:lock", 1, 10)
+        loader = Mock(return_value="new")
+        self.assertEqual(cached_lookup("t:stale", loader, 60), "old")
+        loader.assert_not_called()
+
+    def test_cold_miss_waits_then_computes(self):
+        cache.add("t:cold:lock", 1, 10)
+        self.assertEqual(cached_lookup("t:cold", lambda: "v", 60, wait=0.1), "v")
+        self.assertEqual(cache.get("t:cold:lock"), 1)
+
+    def test_expired_lock_taken_over_is_not_released(self):
+        def loader():
+            cache.set("t:over:lock", "other-worker", 10)
+            return "v"
+
+        cached_lookup("t:over", loader, 60)
+        self.assertEqual(cache.get("t:over:lock"), "other-worker")
+
+    def test_early_expiration_probability(self):
+        # Value computed in 1s, expiring in 0.5s: almost always refreshed early
+        with patch("apps.core.cache.time.time", return_value=1000.0):
+            cache.set("t:early", ("old", 1.0, 1000.5), 60)
+            with patch("apps.core.cache.random.random", return_value=0.99):
+                self.assertEqual(cached_lookup("t:early", lambda: "new", 60), "new")
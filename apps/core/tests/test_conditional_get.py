@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.core.models import RoleTextLimit, SiteConfiguration
+from apps.core.utils import invalidate_config, invalidate_limits_snapshot
+
+User = get_user_model()
+
+
+class LimitsConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def tearDown(self):
+        invalidate_limits_snapshot()
+
+    def test_etag_and_not_modified(self):
+        resp = self.client.get("/api/core/limits/")
+        self.assertEqual(resp.status_code, 200)
+        etag = resp["ETag"]
+        self.assertTrue(etag.startswith('"'))
+        self.assertIn("max-age=", resp["Cache-Control"])
+        self.assertIn("public", resp["Cache-Control"])
+
+        resp = self.client.get("/api/core/limits/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp["ETag"], etag)
+
+    def test_etag_changes_with_role_and_limits(self):
+        anon_etag = self.client.get("/api/core/limits/")["ETag"]
+
+        user = User.objects.create_user(username="etag", password="pass")
+        self.client.force_authenticate(user=user)
+        resp = self.client.get("/api/core/limits/")
+        self.assertNotEqual(resp["ETag"], anon_etag)
+        self.assertIn("private", resp["Cache-Control"])
+
+        rl = RoleTextLimit.objects.get(role_name="RegisteredFree")
+        rl.title_limit = 321
+        rl.save()
+        resp2 = self.client.get("/api/core/limits/", HTTP_IF_NONE_MATCH=resp["ETag"])
+        self.assertEqual(resp2.status_code, 200)
+        self.assertNotEqual(resp2["ETag"], resp["ETag"])
+
+
+class ConfigConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_config()
+        self.client = APIClient()
+
+    def tearDown(self):
+        invalidate_config()
+
+    def test_missing_config_returns_404(self):
+        self.assertEqual(self.client.get("/api/core/config/").status_code, 404)
+
+    def test_etag_follows_updated_at(self):
+        config = SiteConfiguration.objects.create(
+            site_name="Site", contact_email="site@example.com"
+        )
+        resp = self.client.get("/api/core/config/")
+        self.assertEqual(resp.status_code, 200)
+        etag = resp["ETag"]
+        self.assertEqual(
+            self.client.get("/api/core/config/", HTTP_IF_NONE_MATCH=etag).status_code,
+            304,
+        )
+
+        config.site_name = "Renamed"
+        config.save()
+        resp = self.client.get("/api/core/config/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["site_name"], "Renamed")
@@ -0,0 +1,106 @@
+import time
+from unittest.mock import patch
+
+from allauth.account.signals import user_logged_in
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser, Group
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from apps.core.middleware import SESSION_ROLE_KEY, EffectiveRoleMiddleware
+from apps.core.models import RoleTextLimit
+from apps.core.utils import (
+    _role_cache,
+    get_limits_snapshot,
+    invalidate_limits_snapshot,
+)
+
+User = get_user_model()
+
+
+class EffectiveRoleMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        _role_cache.clear()
+        self.factory = RequestFactory()
+        self.middleware = EffectiveRoleMiddleware(lambda request: HttpResponse())
+        self.user = User.objects.create_user(username="member", password="pass")
+        self.user.groups.add(Group.objects.create(name="Moderators"))
+
+    def tearDown(self):
+        invalidate_limits_snapshot()
+
+    def _request(self, user, session=None):
+        request = self.factory.get("/")
+        request.user = user
+        request.session = session if session is not None else SessionStore()
+        self.middleware(request)
+        return request
+
+    def test_login_stores_role_in_session(self):
+        request = self.factory.get("/")
+        request.session = SessionStore()
+        user_logged_in.send(
+            sender=User, request=request, response=HttpResponse(), user=self.user
+        )
+        data = request.session[SESSION_ROLE_KEY]
+        self.assertEqual(data["role"], "Moderator")
+        self.assertEqual(data["user_id"], self.user.pk)
+        self.assertEqual(data["version"], get_limits_snapshot().generation)
+
+    def test_steady_state_uses_session(self):
+        session = SessionStore()
+        self.assertEqual(
+            str(self._request(self.user, session).effective_role), "Moderator"
+        )
+
+        with patch("apps.core.policy.RolePolicy.resolve") as resolve:
+            request = self._request(self.user, session)
+            with self.assertNumQueries(0):
+                self.assertEqual(request.effective_role, "Moderator")
+                limits = request.limits
+                self.assertEqual(
+                    limits.title,
+                    get_limits_snapshot().text_limit("Moderator")["title"],
+                )
+        resolve.assert_not_called()
+
+    def test_stale_version_is_revalidated(self):
+        session = SessionStore()
+        str(self._request(self.user, session).effective_role)
+        rl = RoleTextLimit.objects.get(role_name="Moderator")
+        rl.title_limit = 99
+        rl.save()
+
+        request = self._request(self.user, session)
+        self.assertEqual(request.limits.title, 99)
+        self.assertEqual(
+            session[SESSION_ROLE_KEY]["version"], get_limits_snapshot().generation
+        )
+
+    def test_role_change_invalidates_session_copy(self):
+        session = SessionStore()
+        str(self._request(self.user, session).effective_role)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.clear()
+
+        self.assertEqual(
+            self._request(self.user, session).effective_role, "RegisteredFree"
+        )
+
+    def test_session_of_other_user_is_ignored(self):
+        session = SessionStore()
+        session[SESSION_ROLE_KEY] = {
+            "user_id": self.user.pk + 1000,
+            "role": "Admin",
+            "version": get_limits_snapshot().generation,
+            "stored_at": int(time.time()),
+        }
+        self.assertEqual(self._request(self.user, session).effective_role, "Moderator")
+
+    def test_anonymous(self):
+        request = self._request(AnonymousUser())
+        self.assertEqual(request.effective_role, "Anonymous")
+        self.assertNotIn(SESSION_ROLE_KEY, request.session)
@@ -1,14 +1,18 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from rest_framework.test import APIClient
 
 from apps.core.models import RoleImageLimit, RoleTextLimit
+from apps.core.utils import _role_cache
 
 User = get_user_model()
 
 
 class LimitsAPITest(TestCase):
     def setUp(self):
+        cache.clear()
+        _role_cache.clear()
         # ensure seeded rows exist
         self.anonymous_text = RoleTextLimit.objects.get(role_name__iexact="Anonymous")
         self.registered_text = RoleTextLimit.objects.get(
@@ -0,0 +1,38 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.core.api import _limits_payloads
+from apps.core.models import RoleTextLimit
+from apps.core.utils import invalidate_limits_snapshot
+
+
+class LimitsPayloadCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        _limits_payloads.clear()
+        self.client = APIClient()
+
+    def tearDown(self):
+        invalidate_limits_snapshot()
+
+    def test_hit_skips_serializer(self):
+        first = self.client.get("/api/core/limits/")
+        self.assertEqual(first.status_code, 200)
+
+        with patch("apps.core.serializers.LimitsSerializer") as serializer:
+            second = self.client.get("/api/core/limits/")
+        serializer.assert_not_called()
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["Content-Type"], "application/json")
+
+    def test_role_limit_write_invalidates_payload(self):
+        self.client.get("/api/core/limits/")
+        rl = RoleTextLimit.objects.get(role_name="Anonymous")
+        rl.body_limit = 777
+        rl.save()
+
+        resp = self.client.get("/api/core/limits/")
+        self.assertEqual(resp.json()["text_limits"]["body"], 777)
@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.core.models import RoleImageLimit, RoleTextLimit
+from apps.core.utils import (
+    get_limits_snapshot,
+    get_user_image_limit,
+    get_user_text_limits,
+    invalidate_limits_snapshot,
+)
+
+User = get_user_model()
+
+
+class LimitsSnapshotTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_limits_snapshot()
+        self.user = User.objects.create_user(
+            username="snap", email="snap@example.com", password="pass"
+        )
+
+    def tearDown(self):
+        # Snapshot is process-wide; don't leak rows rolled back by the test
+        invalidate_limits_snapshot()
+
+    def test_lookups_are_served_from_memory(self):
+        expected = RoleImageLimit.objects.get(role_name="RegisteredFree").max_images
+        get_user_image_limit(self.user)
+        get_user_text_limits(self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_image_limit(self.user), expected)
+            get_user_text_limits(self.user)
+
+    def test_save_refreshes_snapshot(self):
+        generation = get_limits_snapshot().generation
+        rl = RoleTextLimit.objects.get(role_name="RegisteredFree")
+        rl.title_limit = 123
+        rl.save()
+
+        self.assertNotEqual(get_limits_snapshot().generation, generation)
+        self.assertEqual(get_user_text_limits(self.user)["title"], 123)
+
+    def test_delete_falls_back_to_registered_free(self):
+        RoleImageLimit.objects.create(role_name="Custom", max_images=42)
+        snapshot = get_limits_snapshot()
+        self.assertEqual(snapshot.image_limit("custom"), 42)
+
+        RoleImageLimit.objects.filter(role_name="Custom").get().delete()
+        self.assertEqual(
+            get_limits_snapshot().image_limit("Custom"),
+            snapshot.image_limit("RegisteredFree"),
+        )
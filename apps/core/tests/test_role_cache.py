@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.core.utils import _determine_effective_role, _role_cache
+
+User = get_user_model()
+
+
+class RoleCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        _role_cache.clear()
+        self.user = User.objects.create_user(
+            username="cached", email="cached@example.com", password="pass"
+        )
+        self.paid = Group.objects.create(name="SubscriberPaid")
+
+    def test_role_is_cached_after_first_lookup(self):
+        self.assertEqual(_determine_effective_role(self.user), "RegisteredFree")
+        with self.assertNumQueries(0):
+            self.assertEqual(_determine_effective_role(self.user), "RegisteredFree")
+
+    def test_shared_cache_serves_other_processes(self):
+        _determine_effective_role(self.user)
+        # Simulate another worker with a cold local tier
+        _role_cache.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(_determine_effective_role(self.user), "RegisteredFree")
+
+    def test_group_add_invalidates_role(self):
+        _determine_effective_role(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(self.paid)
+        self.assertEqual(_determine_effective_role(self.user), "SubscriberPaid")
+
+    def test_reverse_group_changes_invalidate_role(self):
+        _determine_effective_role(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.paid.user_set.add(self.user)
+        self.assertEqual(_determine_effective_role(self.user), "SubscriberPaid")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.paid.user_set.clear()
+        self.assertEqual(_determine_effective_role(self.user), "RegisteredFree")
+
+    def test_group_delete_invalidates_members_role(self):
+        self.user.groups.add(self.paid)
+        self.assertEqual(_determine_effective_role(self.user), "SubscriberPaid")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.paid.delete()
+        self.assertEqual(_determine_effective_role(self.user), "RegisteredFree")
+
+    def test_membership_change_waits_for_commit(self):
+        _determine_effective_role(self.user)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.groups.add(self.paid)
+            # Until the commit the shared version is unchanged, so a reader
+            # can only cache under the version the commit will retire
+            _role_cache.clear()
+            self.assertEqual(_determine_effective_role(self.user), "RegisteredFree")
+        for callback in callbacks:
+            callback()
+        self.assertEqual(_determine_effective_role(self.user), "SubscriberPaid")
@@ -0,0 +1,87 @@
+from dataclasses import FrozenInstanceError
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.test import SimpleTestCase, TestCase
+
+from apps.core.models import RoleImageLimit, RoleTextLimit
+from apps.core.policy import RolePolicy, role_policy
+
+User = get_user_model()
+
+
+class RolePolicyRulesTest(SimpleTestCase):
+    def setUp(self):
+        self.policy = RolePolicy()
+
+    def test_group_rules(self):
+        cases = {
+            "SubscriberPaid": "SubscriberPaid",
+            "paid-users": "SubscriberPaid",
+            "Moderators": "Moderator",
+            "staff": "Staff",
+            "Staff": "Staff",
+            "staff-interns": None,
+            "Administrators": "Admin",
+            "site-admin": "Admin",
+            "Registered": "RegisteredFree",
+            "misc": None,
+        }
+        for name, expected in cases.items():
+            with self.subTest(name=name):
+                self.assertEqual(self.policy.role_for_group(name), expected)
+
+    def test_rule_priority_within_a_group(self):
+        # subscriber/paid wins over moderator regardless of position in the name
+        self.assertEqual(self.policy.role_for_group("moderator-paid"), "SubscriberPaid")
+        self.assertEqual(self.policy.role_for_group("free-admin"), "Admin")
+
+    def test_first_matching_group_wins(self):
+        self.assertEqual(
+            self.policy.role_for_groups(["misc", "", "Moderators", "SubscriberPaid"]),
+            "Moderator",
+        )
+        self.assertEqual(self.policy.role_for_groups(["misc"]), "RegisteredFree")
+
+    def test_resolve_flags(self):
+        self.assertEqual(self.policy.resolve(None), "Anonymous")
+        self.assertEqual(self.policy.resolve(AnonymousUser()), "Anonymous")
+        self.assertEqual(self.policy.resolve(User(is_superuser=True)), "Admin")
+        self.assertEqual(self.policy.resolve(User(is_staff=True)), "Staff")
+        self.assertEqual(
+            self.policy.resolve(User(), group_names=["paid"]), "SubscriberPaid"
+        )
+
+    def test_limits_built_from_an_older_snapshot_are_not_memoized_as_newer(self):
+        old = MagicMock(generation=1)
+        new = MagicMock(generation=2)
+        new.text_limit.return_value = {"title": 2, "body": 2}
+        new.image_limit.return_value = 2
+        old.image_limit.return_value = 1
+
+        def swap_snapshot_midway(role):
+            # Another thread picks up the newer snapshot meanwhile
+            self.policy.limits_for(role)
+            return {"title": 1, "body": 1}
+
+        old.text_limit.side_effect = swap_snapshot_midway
+        with patch("apps.core.policy.get_limits_snapshot", side_effect=[old, new, new]):
+            self.assertEqual(self.policy.limits_for("Moderator").title, 1)
+            self.assertEqual(self.policy.limits_for("Moderator").title, 2)
+
+
+class RolePolicyLimitsTest(TestCase):
+    def test_limits_for_role(self):
+        limits = role_policy.limits_for("Moderator")
+        text = RoleTextLimit.objects.get(role_name="Moderator")
+        images = RoleImageLimit.objects.get(role_name="Moderator")
+        self.assertEqual(limits.image_max, images.max_images)
+        self.assertEqual(
+            limits.text_limits, {"title": text.title_limit, "body": text.body_limit}
+        )
+        with self.assertRaises(FrozenInstanceError):
+            limits.image_max = 1
+
+    def test_anonymous_image_cap(self):
+        self.assertEqual(role_policy.limits_for("Anonymous").image_max, 5)
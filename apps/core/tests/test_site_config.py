@@ -0,0 +1,71 @@
+from unittest.mock import patch
+
+from django.contrib.admin.sites import site as admin_site
+from django.core.cache import cache
+from django.template import Context, RequestContext, Template
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from apps.core.models import SiteConfiguration
+from apps.core.utils import get_config, invalidate_config
+
+
+class SiteConfigSingletonTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_config()
+        self.config = SiteConfiguration.objects.create(
+            site_name="Site", contact_email="site@example.com"
+        )
+
+    def tearDown(self):
+        invalidate_config()
+
+    def test_reads_are_process_local(self):
+        self.assertEqual(get_config().site_name, "Site")
+        with self.assertNumQueries(0), patch("apps.core.cache.cache") as shared:
+            self.assertEqual(get_config().pk, self.config.pk)
+        shared.get.assert_not_called()
+
+    def test_shared_cache_only_holds_version_stamp(self):
+        get_config()
+        stamp, _, _ = cache.get("core:singleton:core.siteconfiguration:version")
+        self.assertIsInstance(stamp, str)
+        self.assertIn(self.config.updated_at.isoformat(), stamp)
+
+    def test_save_refreshes_copy(self):
+        get_config()
+        self.config.site_name = "Renamed"
+        self.config.save()
+        self.assertEqual(get_config().site_name, "Renamed")
+
+    def test_other_worker_change_is_picked_up(self):
+        get_config()
+        # Another worker saved (clearing the stamp) and our check interval elapsed
+        SiteConfiguration.objects.filter(pk=self.config.pk).update(
+            site_name="Remote", updated_at=timezone.now()
+        )
+        cache.delete("core:singleton:core.siteconfiguration:version")
+        with patch("apps.core.models.SINGLETON_CHECK_INTERVAL", 0):
+            self.assertEqual(get_config().site_name, "Remote")
+
+    def test_missing_row_is_negatively_cached(self):
+        SiteConfiguration.objects.all().delete()
+        self.assertIsNone(get_config())
+        with patch("apps.core.models.SINGLETON_CHECK_INTERVAL", 0):
+            with self.assertNumQueries(0):
+                self.assertIsNone(get_config())
+
+    def test_context_processor(self):
+        request = RequestFactory().get("/")
+        template = Template("{{ site_config.site_name }}")
+        self.assertEqual(template.render(RequestContext(request)), "Site")
+        self.assertEqual(template.render(Context()), "")
+
+    def test_admin_mixin_uses_cached_instance(self):
+        model_admin = admin_site._registry[SiteConfiguration]
+        request = RequestFactory().get("/")
+        get_config()
+        with self.assertNumQueries(0):
+            self.assertFalse(model_admin.has_add_permission(request))
+            self.assertEqual(model_admin.get_singleton_instance().pk, self.config.pk)
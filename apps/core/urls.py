@@ -1,9 +1,11 @@
 from django.urls import path
 
-from .api import LimitsAPIView
+from .api import BulkLimitsAPIView, ConfigAPIView, LimitsAPIView
 
 app_name = "core"
 
 urlpatterns = [
+    path("config/", ConfigAPIView.as_view(), name="config"),
     path("limits/", LimitsAPIView.as_view(), name="limits"),
+    path("limits/bulk/", BulkLimitsAPIView.as_view(), name="limits-bulk"),
 ]
@@ -1,174 +1,354 @@
-from typing import Optional
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
 
-from django.contrib.auth.models import AnonymousUser
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.core.cache import cache
+from django.db import transaction
+from django.utils.module_loading import import_string
 
+from .cache import LocalTTLCache
 from .models import RoleImageLimit, RoleTextLimit, SiteConfiguration
 
+# Role resolution cache: process-local LRU (tier 1) in front of the shared
+# Django cache (tier 2). Shared entries are keyed by user id plus a per-user
+# group-membership version that is bumped by the signal handlers in
+# ``apps.core.signals`` whenever groups or the profile subscription change.
+ROLE_CACHE_TTL = getattr(settings, "CORE_ROLE_CACHE_TTL", 300)
+ROLE_CACHE_LOCAL_TTL = getattr(settings, "CORE_ROLE_CACHE_LOCAL_TTL", 30)
+ROLE_CACHE_MAXSIZE = getattr(settings, "CORE_ROLE_CACHE_MAXSIZE", 4096)
 
-def _determine_effective_role(user) -> str:
-    """Return a canonical role name for a given user.
-
-    Order of detection:
-    - Anonymous users -> 'Anonymous'
-    - superuser -> 'Admin'
-    - staff -> 'Staff'
-    - profile.subscription_type if provided
-    - group name heuristics (SubscriberPaid, Moderator, Staff, Admin, RegisteredFree)
-    - fallback -> 'RegisteredFree'
+_role_cache = LocalTTLCache(maxsize=ROLE_CACHE_MAXSIZE, ttl=ROLE_CACHE_LOCAL_TTL)
+
+
+def _role_version_key(user_id) -> str:
+    return f"core:role_version:{user_id}"
+
+
+def _role_cache_key(user_id, version) -> str:
+    return f"core:member_role:{user_id}:{version}"
+
+
+def get_role_version(user_id) -> int:
+    """Return the membership version of ``user_id`` (bumped by ``invalidate_user_role``)."""
+    try:
+        return cache.get(_role_version_key(user_id), 0)
+    except Exception:
+        return 0
+
+
+def invalidate_user_role(user_id) -> None:
+    """Drop the cached role for ``user_id`` in this process and in the shared cache.
+
+    The shared entry is invalidated by moving the user to a new membership
+    version, so other workers pick up the change once their local copy expires.
+    Inside a transaction this happens on commit: a version bumped earlier
+    would let another worker cache the still-committed old role under it.
     """
-    if (
-        not user
-        or isinstance(user, AnonymousUser)
-        or getattr(user, "is_anonymous", False)
-    ):
-        return "Anonymous"
-
-    if getattr(user, "is_superuser", False):
-        return "Admin"
-    if getattr(user, "is_staff", False):
-        return "Staff"
+    if user_id is None:
+        return
 
+    def invalidate():
+        _role_cache.delete(user_id)
+        try:
+            cache.set(_role_version_key(user_id), time.time_ns(), None)
+        except Exception:
+            # cache may not be configured; ignore failures
+            pass
+
+    _role_cache.delete(user_id)
+    transaction.on_commit(invalidate)
+
+
+def get_profile_relation():
+    """Return the reverse one-to-one relation exposed as ``user.profile``, if any."""
+    for rel in get_user_model()._meta.related_objects:
+        if rel.one_to_one and rel.get_accessor_name() == "profile":
+            return rel
+    return None
+
+
+def get_entitlement_roles(user_ids) -> dict:
+    """Return ``{user_id: (role, expires_at)}`` from ``CORE_ENTITLEMENT_RESOLVER``.
+
+    The resolver is a dotted path to a callable taking user ids and returning
+    the role each entitled user is granted by other apps (e.g. an active
+    subscription) with the timestamp at which it lapses (None if it does
+    not); users it omits fall back to group rules. Empty when not configured.
+    """
+    resolver = getattr(settings, "CORE_ENTITLEMENT_RESOLVER", None)
+    if not resolver:
+        return {}
+    return import_string(resolver)(user_ids)
+
+
+def _compute_member_role(user) -> Tuple[str, Optional[float]]:
+    """Derive ``(role, expires_at)`` of a regular member (hits the DB).
+
+    ``expires_at`` is only set for roles granted by an entitlement.
+    """
     subscription_type = getattr(
         getattr(user, "profile", None), "subscription_type", None
     )
     if subscription_type:
-        return subscription_type
+        return subscription_type, None
+
+    entitlement = get_entitlement_roles([user.pk]).get(user.pk)
+    if entitlement:
+        return entitlement
 
     try:
         group_names = list(user.groups.values_list("name", flat=True))
     except Exception:
         group_names = []
 
-    for g in group_names:
-        if not g:
-            continue
-        gl = g.lower()
-        if "subscriber" in gl or "paid" in gl:
-            return "SubscriberPaid"
-        if "moderator" in gl:
-            return "Moderator"
-        if gl == "staff":
-            return "Staff"
-        if "admin" in gl or "administrator" in gl:
-            return "Admin"
-        if "free" in gl or "registered" in gl:
-            return "RegisteredFree"
+    from .policy import role_policy
 
-    return "RegisteredFree"
+    return role_policy.role_for_groups(group_names), None
 
 
-def get_user_text_limits(user) -> dict:
-    """Return a dict with 'title' and 'body' limits for the given user, loading from DB.
+def _entry_ttl(entry, ttl: float) -> float:
+    """Cap ``ttl`` so a cached role never outlives the entitlement behind it."""
+    expires_at = entry[1]
+    if expires_at is None:
+        return ttl
+    return min(ttl, expires_at - time.time())
+
 
-    Falls back to sensible defaults if DB rows are missing.
+def get_member_role_entry(user) -> Tuple[str, Optional[float]]:
+    """Return ``(role, expires_at)`` of a regular member via the two-tier cache.
+
+    Entries are cached for at most the time left until ``expires_at``, so a
+    role granted by an expiring entitlement lapses on time without any
+    invalidation.
     """
-    effective_role = _determine_effective_role(user)
+    user_id = getattr(user, "pk", None)
+    if user_id is None:
+        return _compute_member_role(user)
+
+    entry = _role_cache.get(user_id)
+    if entry is not None and _entry_ttl(entry, 1) > 0:
+        return entry
+
     try:
-        rl = RoleTextLimit.objects.get(role_name__iexact=effective_role)
-        return {"title": rl.title_limit, "body": rl.body_limit}
-    except RoleTextLimit.DoesNotExist:
-        try:
-            # fallback to RegisteredFree
-            rl = RoleTextLimit.objects.get(role_name__iexact="RegisteredFree")
-            return {"title": rl.title_limit, "body": rl.body_limit}
-        except RoleTextLimit.DoesNotExist:
-            # last resort: use hard-coded defaults
-            return {"title": 200, "body": 2000}
+        key = _role_cache_key(user_id, get_role_version(user_id))
+        entry = cache.get(key)
+    except Exception:
+        key, entry = None, None
+
+    if entry is None or _entry_ttl(entry, 1) <= 0:
+        entry = _compute_member_role(user)
+        ttl = _entry_ttl(entry, ROLE_CACHE_TTL)
+        if key is not None and ttl > 0:
+            try:
+                cache.set(key, entry, ttl)
+            except Exception:
+                pass
+
+    ttl = _entry_ttl(entry, ROLE_CACHE_LOCAL_TTL)
+    if ttl > 0:
+        _role_cache.set(user_id, entry, ttl)
+    return entry
+
+
+def _get_member_role(user) -> str:
+    """Return the profile/entitlement/group derived role (see ``get_member_role_entry``)."""
+    return get_member_role_entry(user)[0]
+
+
+def _determine_effective_role(user) -> str:
+    """Return a canonical role name for a given user (see ``RolePolicy.resolve``)."""
+    from .policy import role_policy
+
+    return role_policy.resolve(user)
+
+
+# Role limits snapshot: RoleImageLimit, RoleTextLimit and the site-wide image
+# default are tiny tables, so each process keeps an immutable copy and only
+# reloads it when the shared generation counter moves. The counter is bumped
+# by the save/delete signal handlers in ``apps.core.signals``.
+LIMITS_GENERATION_KEY = "core:limits_generation"
+LIMITS_CHECK_INTERVAL = getattr(settings, "CORE_LIMITS_CHECK_INTERVAL", 5)
+
+DEFAULT_IMAGE_LIMIT = 5
+DEFAULT_TEXT_LIMITS = {"title": 200, "body": 2000}
+
+
+@dataclass(frozen=True)
+class LimitsSnapshot:
+    """Immutable view of all role limits, keyed by lower-cased role name."""
+
+    generation: int
+    image_limits: Mapping[str, int]
+    text_limits: Mapping[str, tuple[int, int]]
+    site_max_images: Optional[int]
+
+    def image_limit(self, role: str) -> int:
+        limit = self.image_limits.get(role.lower())
+        if limit is None:
+            limit = self.image_limits.get("registeredfree")
+        if limit is None:
+            limit = self.site_max_images or DEFAULT_IMAGE_LIMIT
+        return limit
+
+    def text_limit(self, role: str) -> dict:
+        limits = self.text_limits.get(role.lower())
+        if limits is None:
+            limits = self.text_limits.get("registeredfree")
+        if limits is None:
+            return dict(DEFAULT_TEXT_LIMITS)
+        return {"title": limits[0], "body": limits[1]}
+
+
+_limits_lock = threading.Lock()
+_limits_snapshot: Optional[LimitsSnapshot] = None
+_limits_checked_at = 0.0
+
+
+def _get_limits_generation() -> int:
+    try:
+        return cache.get(LIMITS_GENERATION_KEY, 0)
+    except Exception:
+        return 0
+
+
+def _load_limits_snapshot(generation: int) -> LimitsSnapshot:
+    image_limits = {
+        name.lower(): max_images
+        for name, max_images in RoleImageLimit.objects.values_list(
+            "role_name", "max_images"
+        )
+    }
+    text_limits = {
+        name.lower(): (title, body)
+        for name, title, body in RoleTextLimit.objects.values_list(
+            "role_name", "title_limit", "body_limit"
+        )
+    }
+    try:
+        site_max_images = (
+            SiteConfiguration.objects.values_list("max_images_per_ad", flat=True)
+            .order_by("pk")
+            .first()
+        )
+    except Exception:
+        site_max_images = None
+    return LimitsSnapshot(
+        generation=generation,
+        image_limits=MappingProxyType(image_limits),
+        text_limits=MappingProxyType(text_limits),
+        site_max_images=site_max_images,
+    )
+
+
+def get_limits_snapshot() -> LimitsSnapshot:
+    """Return the process-local limits snapshot, reloading it when stale.
+
+    The shared generation counter is consulted at most once every
+    ``CORE_LIMITS_CHECK_INTERVAL`` seconds; writes made in this process reset
+    the snapshot immediately.
+    """
+    global _limits_snapshot, _limits_checked_at
+
+    snapshot = _limits_snapshot
+    now = time.monotonic()
+    if snapshot is not None and now - _limits_checked_at < LIMITS_CHECK_INTERVAL:
+        return snapshot
+
+    generation = _get_limits_generation()
+    if snapshot is not None and snapshot.generation == generation:
+        _limits_checked_at = now
+        return snapshot
+
+    with _limits_lock:
+        snapshot = _limits_snapshot
+        if snapshot is None or snapshot.generation != generation:
+            snapshot = _load_limits_snapshot(generation)
+            _limits_snapshot = snapshot
+        _limits_checked_at = now
+    return snapshot
+
+
+def invalidate_limits_snapshot() -> None:
+    """Bump the shared limits generation and drop this process' snapshot."""
+    global _limits_snapshot
+    try:
+        cache.set(LIMITS_GENERATION_KEY, time.time_ns(), None)
+    except Exception:
+        # cache may not be configured; ignore failures
+        pass
+    with _limits_lock:
+        _limits_snapshot = None
+
+
+def get_user_text_limits(user) -> dict:
+    """Return a dict with 'title' and 'body' limits for the given user.
+
+    Limits come from the in-memory snapshot of RoleTextLimit. Falls back to the
+    RegisteredFree row, then to sensible defaults if DB rows are missing.
+    """
+    from .policy import role_policy
+
+    return role_policy.limits_for_user(user).text_limits
 
 
 def get_config() -> Optional[SiteConfiguration]:
     """
-    Returns the singleton SiteConfiguration instance, cached for 5 minutes.
+    Returns the singleton SiteConfiguration instance (see ``CachedSingletonModel``).
     """
-    config = cache.get("site_config_singleton")
-    if config is None:
-        try:
-            config = SiteConfiguration.objects.first()
-            cache.set("site_config_singleton", config, 300)  # 5 minutes
-        except Exception:
-            config = None
-    return config
+    return SiteConfiguration.get_solo()
+
+
+def invalidate_config() -> None:
+    """Drop cached SiteConfiguration copies in this process and the shared cache."""
+    SiteConfiguration.invalidate_solo()
 
 
 def get_user_image_limit(user) -> int:
     """
     Returns the max images per ad for the given user based on their role/subscription.
-    If user is anonymous or missing data, returns the 'free' limit.
+    Anonymous users get a fixed cap of 5 images (distinct from RegisteredFree);
+    unknown roles fall back to RegisteredFree, then the site-wide configuration.
+    """
+    from .policy import role_policy
+
+    return role_policy.limits_for_user(user).image_max
+
+
+BULK_LIMITS_BATCH_SIZE = 1000
+
+
+def get_bulk_user_limits(user_ids, batch_size: int = BULK_LIMITS_BATCH_SIZE) -> dict:
+    """Return ``{user_id: {"image_max": int, "text_limits": {...}}}`` for many users.
+
+    Users, profiles and groups are fetched with a constant number of queries per
+    batch of ``batch_size`` ids (one for users plus profiles, one for groups,
+    plus whatever the entitlement resolver needs for uncached users); limits
+    come from the in-memory snapshot. Unknown ids are omitted.
     """
-    # Anonymous users: allow creating ads but limit to 5 images (distinct from RegisteredFree)
-    if (
-        not user
-        or isinstance(user, AnonymousUser)
-        or getattr(user, "is_anonymous", False)
-    ):
-        return 5
-
-    # Determine effective role name using multiple signals (in order):
-    # 1) superuser -> Admin
-    # 2) staff -> Staff
-    # 3) profile.subscription_type (if present)
-    # 4) group names (SubscriberPaid, Moderator, Staff, Admin)
-    # 5) fallback -> RegisteredFree
-
-    # For registered users, default to RegisteredFree unless another role is detected
-    else:
-        if getattr(user, "is_superuser", False):
-            effective_role = "Admin"
-        elif getattr(user, "is_staff", False):
-            effective_role = "Staff"
-        else:
-            subscription_type = getattr(
-                getattr(user, "profile", None), "subscription_type", None
+    from .policy import role_policy
+
+    User = get_user_model()
+    ids = list(dict.fromkeys(user_ids))
+    profile_rel = get_profile_relation()
+
+    result = {}
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start : start + batch_size]
+        entitlements = {
+            user_id: role for user_id, (role, _) in get_entitlement_roles(batch).items()
+        }
+        qs = User.objects.filter(pk__in=batch)
+        if profile_rel is not None:
+            qs = qs.select_related(profile_rel.get_accessor_name())
+        for user in qs.prefetch_related("groups"):
+            role = role_policy.resolve(
+                user,
+                group_names=[group.name for group in user.groups.all()],
+                entitled_role=entitlements.get(user.pk),
             )
-            if subscription_type:
-                effective_role = subscription_type
-            else:
-                # Inspect groups for common role names
-                effective_role = None
-                try:
-                    group_names = list(user.groups.values_list("name", flat=True))
-                except Exception:
-                    group_names = []
-
-                for g in group_names:
-                    if not g:
-                        continue
-                    g_low = g.lower()
-                    if "subscriber" in g_low or "paid" in g_low:
-                        effective_role = "SubscriberPaid"
-                        break
-                    if "moderator" in g_low:
-                        effective_role = "Moderator"
-                        break
-                    if g_low == "staff":
-                        effective_role = "Staff"
-                        break
-                    if "admin" in g_low or "administrator" in g_low:
-                        effective_role = "Admin"
-                        break
-                    if "free" in g_low or "registered" in g_low:
-                        effective_role = "RegisteredFree"
-                        break
-
-                if not effective_role:
-                    effective_role = "RegisteredFree"
-
-    # Lookup role limit (case-insensitive). Fall back to RegisteredFree, then a hard default.
-    try:
-        limit_obj = RoleImageLimit.objects.get(role_name__iexact=effective_role)
-        return limit_obj.max_images
-    except RoleImageLimit.DoesNotExist:
-        try:
-            return RoleImageLimit.objects.get(
-                role_name__iexact="RegisteredFree"
-            ).max_images
-        except RoleImageLimit.DoesNotExist:
-            # As a last resort, try site-wide configuration then a hard-coded default
-            try:
-                cfg = SiteConfiguration.objects.first()
-                if cfg and getattr(cfg, "max_images_per_ad", None):
-                    return cfg.max_images_per_ad
-            except Exception:
-                pass
-            return 5
+            result[user.pk] = role_policy.limits_for(role).as_dict()
+    return result
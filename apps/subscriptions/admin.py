@@ -1,6 +1,13 @@
 from django.contrib import admin
 
-from .models import Discount, PaymentMethod, Plan, Subscription
+from .models import (
+    Discount,
+    PaymentMethod,
+    Plan,
+    ProcessedWebhookEvent,
+    Subscription,
+    WebhookEvent,
+)
 
 
 @admin.register(Plan)
@@ -49,3 +56,28 @@ class PaymentMethodAdmin(admin.ModelAdmin):
     list_display = ("name", "provider_id", "is_active")
     list_filter = ("is_active", "provider_id")
     search_fields = ("name",)
+
+
+@admin.register(ProcessedWebhookEvent)
+class ProcessedWebhookEventAdmin(admin.ModelAdmin):
+    list_display = ("event_id", "provider", "event_type", "processed_at")
+    list_filter = ("provider", "event_type")
+    search_fields = ("event_id",)
+    readonly_fields = ("provider", "event_id", "event_type", "processed_at")
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = (
+        "event_id",
+        "provider",
+        "event_type",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "received_at",
+        "processed_at",
+    )
+    list_filter = ("status", "provider", "event_type")
+    search_fields = ("event_id",)
+    readonly_fields = ("provider", "event_id", "event_type", "payload", "received_at")
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class SubscriptionsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.subscriptions"
+
+    def ready(self):
+        from .signals import connect_signals
+
+        connect_signals()
@@ -0,0 +1,205 @@
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+NOWPAYMENTS_SITE = "https://nowpayments.io"
+
+# Fields of a full-currencies item indexed as aliases of that currency.
+ALIAS_FIELDS = ("code", "ticker", "name", "cg_id")
+
+# A currency record: (name, network, logo_url). Only the fields the crypto
+# selection UI shows are kept.
+CurrencyRecord = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+# Everything that is not a letter or digit (``\w`` minus the underscore
+# matches exactly the characters for which ``str.isalnum()`` is true).
+_NON_ALNUM = re.compile(r"[\W_]+")
+
+# Keys of merchant/coins entries that may hold the currency code, by priority.
+MERCHANT_CODE_FIELDS = ("pay_currency", "code", "currency", "symbol", "name")
+
+
+def normalize_code(value: Any) -> str:
+    """Normalize a currency code or name: lowercase and alphanumeric only."""
+    return _NON_ALNUM.sub("", str(value).lower())
+
+
+def _absolute_logo_url(logo: Any) -> Optional[str]:
+    if logo and isinstance(logo, str) and logo.startswith("/"):
+        return f"{NOWPAYMENTS_SITE}{logo}"
+    return logo or None
+
+
+class CurrencyIndex:
+    """Compact lookup table built from the NowPayments full-currencies list.
+
+    Each currency is stored once as a ``CurrencyRecord`` tuple in ``records``;
+    ``aliases`` maps every normalized code, ticker, name and CoinGecko id to
+    the position of its record. This is what gets pickled into the shared
+    cache, so it is kept to plain tuples, strings and ints.
+    """
+
+    __slots__ = ("records", "aliases")
+
+    def __init__(
+        self,
+        records: Tuple[CurrencyRecord, ...] = (),
+        aliases: Optional[Dict[str, int]] = None,
+    ):
+        self.records = records
+        self.aliases = aliases or {}
+
+    def __getstate__(self):
+        return (self.records, self.aliases)
+
+    def __setstate__(self, state):
+        self.records, self.aliases = state
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @classmethod
+    def from_currencies(cls, items: Iterable[Any]) -> "CurrencyIndex":
+        """Build an index from full-currencies items, skipping malformed ones.
+
+        When two currencies share an alias the later one wins.
+        """
+        records = []
+        aliases: Dict[str, int] = {}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            keys = [normalize_code(item[f]) for f in ALIAS_FIELDS if item.get(f)]
+            if not keys:
+                continue
+            record_id = len(records)
+            records.append(
+                (
+                    item.get("name"),
+                    item.get("network"),
+                    _absolute_logo_url(item.get("logo_url")),
+                )
+            )
+            for key in keys:
+                if key:
+                    aliases[key] = record_id
+        return cls(tuple(records), aliases)
+
+    def get(self, code: Any) -> Optional[CurrencyRecord]:
+        """Return the record for a code, ticker, name or CoinGecko id, or None."""
+        record_id = self.aliases.get(normalize_code(code))
+        if record_id is None:
+            return None
+        return self.records[record_id]
+
+
+def merchant_codes(merchant_data: Any) -> List[str]:
+    """Return the unique currency codes of a merchant/coins response.
+
+    Accepts ``{"selectedCurrencies": [...]}`` or a plain list whose entries are
+    codes or dicts. Codes are deduplicated by their normalized form while the
+    original strings returned by the provider are kept.
+    """
+    if isinstance(merchant_data, dict) and "selectedCurrencies" in merchant_data:
+        available = merchant_data.get("selectedCurrencies") or []
+    elif isinstance(merchant_data, list):
+        available = merchant_data
+    else:
+        available = []
+
+    seen = set()
+    codes: List[str] = []
+    for entry in available:
+        if isinstance(entry, dict):
+            code = next((entry[f] for f in MERCHANT_CODE_FIELDS if entry.get(f)), None)
+        else:
+            code = entry
+        if not code:
+            continue
+        key = normalize_code(code)
+        if key not in seen:
+            seen.add(key)
+            codes.append(code)
+    return codes
+
+
+class CurrencyCatalog:
+    """The merchant's payable currencies, enriched and ready to resolve.
+
+    ``coins`` holds one dict per merchant code (``code``, ``name``, ``network``,
+    ``logo_url``) in provider order. ``aliases`` maps the normalized code and
+    name of every coin to its position, so resolving user input is a single
+    dict lookup. Like ``CurrencyIndex`` it is cached as a whole.
+    """
+
+    __slots__ = ("coins", "aliases")
+
+    def __init__(
+        self,
+        coins: Tuple[Dict[str, Any], ...] = (),
+        aliases: Optional[Dict[str, int]] = None,
+    ):
+        self.coins = coins
+        self.aliases = aliases or {}
+
+    def __getstate__(self):
+        return (self.coins, self.aliases)
+
+    def __setstate__(self, state):
+        self.coins, self.aliases = state
+
+    def __len__(self) -> int:
+        return len(self.coins)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.coins)
+
+    @classmethod
+    def build(
+        cls, codes: Iterable[str], index: Optional[CurrencyIndex] = None
+    ) -> "CurrencyCatalog":
+        """Enrich merchant ``codes`` from ``index`` and precompute the aliases.
+
+        When several coins share an alias the first one wins, matching the
+        order in which the provider lists them.
+        """
+        coins = []
+        aliases: Dict[str, int] = {}
+        for code in codes:
+            record = index.get(code) if index is not None else None
+            name, network, logo_url = record or (None, None, None)
+            name = name or code
+            position = len(coins)
+            coins.append(
+                {"code": code, "name": name, "network": network, "logo_url": logo_url}
+            )
+            aliases.setdefault(normalize_code(code), position)
+            aliases.setdefault(normalize_code(name), position)
+        aliases.pop("", None)
+        return cls(tuple(coins), aliases)
+
+    @property
+    def default(self) -> Optional[str]:
+        """The code preselected when the user did not choose one."""
+        return self.coins[0]["code"] if self.coins else None
+
+    @property
+    def codes(self) -> List[str]:
+        return [coin["code"] for coin in self.coins]
+
+    def resolve(self, value: Any) -> Optional[str]:
+        """Return the merchant code matching a user-supplied code or name."""
+        position = self.aliases.get(normalize_code(value))
+        if position is None:
+            return None
+        return self.coins[position]["code"]
+
+    def choose(self, requested: Optional[str] = None) -> Optional[str]:
+        """Return the code to charge in for a user's (optional) selection.
+
+        Resolves ``requested`` by code or name, falls back to ``default`` when
+        nothing was requested and returns None for an unknown currency.
+        """
+        if requested:
+            return self.resolve(requested)
+        return self.default
@@ -0,0 +1,102 @@
+"""Cached per-user subscription entitlements.
+
+A user is entitled while they have an active subscription (see
+``SubscriptionQuerySet.active``). The end of each user's entitlement is
+cached as a timestamp (0 when not entitled), so an expiring subscription
+stops entitling without any invalidation; writes to subscriptions drop the
+affected users' entries. ``apps.core`` role resolution consults
+``entitlement_roles`` through the ``CORE_ENTITLEMENT_RESOLVER`` setting and
+caches the role it grants only until the entitlement ends.
+"""
+
+import time
+from typing import Dict, Iterable, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+
+from apps.core.utils import invalidate_user_role
+
+from .models import Subscription
+
+# Role granted by an active subscription (see apps.core.policy).
+ENTITLED_ROLE = "SubscriberPaid"
+
+ENTITLEMENT_CACHE_TTL = getattr(settings, "SUBSCRIPTIONS_ENTITLEMENT_CACHE_TTL", 300)
+
+
+def _entitlement_key(user_id) -> str:
+    return f"subscriptions:entitlement:{user_id}"
+
+
+def get_entitlements(user_ids: Iterable[int]) -> Dict[int, float]:
+    """Return ``{user_id: end timestamp}`` for the entitled users among ``user_ids``.
+
+    Cached users cost one ``get_many``; the others are loaded with a single
+    query on the (user, status, end_date) index.
+    """
+    keys = {_entitlement_key(user_id): user_id for user_id in user_ids}
+    if not keys:
+        return {}
+    ends = {keys[key]: end for key, end in cache.get_many(keys).items()}
+
+    missing = [user_id for user_id in keys.values() if user_id not in ends]
+    if missing:
+        loaded = dict(
+            Subscription.objects.active()
+            .filter(user_id__in=missing)
+            .order_by()
+            .values("user_id")
+            .annotate(end=Max("end_date"))
+            .values_list("user_id", "end")
+        )
+        fresh = {
+            user_id: loaded[user_id].timestamp() if user_id in loaded else 0
+            for user_id in missing
+        }
+        cache.set_many(
+            {_entitlement_key(user_id): end for user_id, end in fresh.items()},
+            ENTITLEMENT_CACHE_TTL,
+        )
+        ends.update(fresh)
+
+    now = time.time()
+    return {user_id: end for user_id, end in ends.items() if end > now}
+
+
+def has_active_subscription(user) -> bool:
+    """Return whether ``user`` (a user or user id) has an active subscription."""
+    user_id = getattr(user, "pk", user)
+    if user_id is None:
+        return False
+    return user_id in get_entitlements([user_id])
+
+
+def entitlement_roles(user_ids: Iterable[int]) -> Dict[int, Tuple[str, float]]:
+    """Return ``{user_id: (role, end timestamp)}`` for the entitled users.
+
+    This is the ``CORE_ENTITLEMENT_RESOLVER`` hook; role caches in
+    ``apps.core.utils`` keep the role no longer than the end timestamp.
+    """
+    return {
+        user_id: (ENTITLED_ROLE, end)
+        for user_id, end in get_entitlements(user_ids).items()
+    }
+
+
+def invalidate_entitlements(user_ids: Iterable[int]) -> None:
+    """Drop the cached entitlements, and the cached roles, of ``user_ids``.
+
+    Inside a transaction this happens on commit; dropped earlier, a concurrent
+    reader could cache the still-committed entitlement again for the full TTL.
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+
+    def invalidate():
+        cache.delete_many([_entitlement_key(user_id) for user_id in user_ids])
+        for user_id in user_ids:
+            invalidate_user_role(user_id)
+
+    transaction.on_commit(invalidate)
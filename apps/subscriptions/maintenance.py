@@ -0,0 +1,60 @@
+"""Data maintenance helpers shared by migrations and management commands."""
+
+import logging
+
+from django.db import transaction
+from django.db.models import Count
+
+logger = logging.getLogger(__name__)
+
+
+def dedupe_subscriptions(Subscription, batch_size: int = 500, dry_run: bool = False):
+    """Remove duplicate subscriptions per (payment_method, external_id).
+
+    Takes the model class, so data migrations can pass their historical
+    model. Empty external ids are first turned into NULL (both mean "no
+    provider id"). Rows without a payment method are left alone, as the
+    unique constraint treats NULLs as distinct. Of each group of duplicates
+    the most recently updated row
+    is kept. Groups are handled ``batch_size`` at a time, each batch in its
+    own transaction, so large tables are never locked as a whole. Returns the
+    number of rows deleted (or that would be, with ``dry_run``).
+    """
+    blanks = Subscription.objects.filter(external_id="")
+    if not dry_run:
+        blanks.update(external_id=None)
+
+    groups = (
+        Subscription.objects.filter(
+            payment_method__isnull=False, external_id__isnull=False
+        )
+        .exclude(external_id="")
+        .values("payment_method_id", "external_id")
+        .annotate(rows=Count("id"))
+        .filter(rows__gt=1)
+        .order_by("payment_method_id", "external_id")
+    )
+    deleted = 0
+    start = 0
+    while True:
+        batch = list(groups[start : start + batch_size])
+        if not batch:
+            break
+        # Deleting shifts the remaining groups forward; a dry run does not.
+        if dry_run:
+            start += batch_size
+        with transaction.atomic():
+            for group in batch:
+                ids = list(
+                    Subscription.objects.filter(
+                        payment_method_id=group["payment_method_id"],
+                        external_id=group["external_id"],
+                    )
+                    .order_by("-updated_at", "-id")
+                    .values_list("id", flat=True)
+                )
+                deleted += len(ids) - 1
+                if not dry_run:
+                    Subscription.objects.filter(id__in=ids[1:]).delete()
+        logger.info("Deduplicated %d subscription groups", len(batch))
+    return deleted
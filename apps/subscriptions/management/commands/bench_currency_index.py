@@ -0,0 +1,123 @@
+import json
+import pickle
+import random
+import string
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from apps.subscriptions.currencies import ALIAS_FIELDS, CurrencyIndex, normalize_code
+
+
+def legacy_mapping(items):
+    """The previous cache format: every normalized alias -> the full raw item."""
+    mapping = {}
+    for item in items:
+        for field in ALIAS_FIELDS:
+            if item.get(field):
+                mapping[normalize_code(item[field])] = item
+    return mapping
+
+
+def synthetic_currencies(count):
+    """Return ``count`` items shaped like NowPayments full-currencies entries."""
+    rng = random.Random(42)
+    items = []
+    for i in range(count):
+        ticker = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 5)))
+        network = rng.choice(["btc", "eth", "trx", "bsc", "matic", "sol"])
+        items.append(
+            {
+                "id": i,
+                "code": f"{ticker}{network}{i}",
+                "name": f"{ticker.title()} Coin {i}",
+                "enable": True,
+                "wallet_regex": "^(0x)[0-9A-Fa-f]{40}$",
+                "priority": i,
+                "extra_id_exists": False,
+                "extra_id_regex": None,
+                "logo_url": f"/images/coins/{ticker}.svg",
+                "track": True,
+                "cg_id": f"{ticker}-coin-{i}",
+                "is_maxlimit": False,
+                "network": network,
+                "smart_contract": "0x" + "".join(rng.choices("0123456789abcdef", k=40)),
+                "network_precision": "18",
+                "ticker": ticker,
+            }
+        )
+    return items
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the pickled size, unpickle time and lookup time of the compact "
+        "CurrencyIndex against the previous alias -> raw item mapping"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file",
+            help="JSON dump of a full-currencies response (default: synthetic data)",
+        )
+        parser.add_argument(
+            "--currencies",
+            type=int,
+            default=400,
+            help="Number of synthetic currencies (default: 400)",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=1000,
+            help="Number of unpickles/lookups per measurement (default: 1000)",
+        )
+
+    def _measure(self, label, func, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"{label:<32} {elapsed * 1e6 / iterations:>10.2f} us/op "
+            f"({iterations} ops, {elapsed:.3f}s)"
+        )
+
+    def handle(self, *args, **options):
+        if options["file"]:
+            with open(options["file"]) as fh:
+                data = json.load(fh)
+            items = data.get("currencies", []) if isinstance(data, dict) else data
+        else:
+            items = synthetic_currencies(options["currencies"])
+        iterations = options["iterations"]
+
+        legacy = legacy_mapping(items)
+        index = CurrencyIndex.from_currencies(items)
+        formats = [
+            (
+                "legacy mapping",
+                legacy,
+                lambda value, code: value.get(normalize_code(code)),
+            ),
+            ("CurrencyIndex", index, lambda value, code: value.get(code)),
+        ]
+        codes = [item["code"] for item in items if item.get("code")][:50]
+
+        self.stdout.write(f"{len(items)} currencies")
+        for label, value, lookup in formats:
+            blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            self.stdout.write(f"{label:<32} {len(blob):>10} bytes pickled")
+            tracemalloc.start()
+            loaded = pickle.loads(blob)
+            allocated = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del loaded
+            self.stdout.write(f"{label:<32} {allocated:>10} bytes unpickled")
+            self._measure(f"{label} unpickle", lambda: pickle.loads(blob), iterations)
+            self._measure(
+                f"{label} lookup x{len(codes)}",
+                lambda: [lookup(value, code) for code in codes],
+                iterations,
+            )
@@ -0,0 +1,117 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from apps.subscriptions.models import PaymentMethod, Plan, WebhookEvent
+from apps.subscriptions.services import drain_webhook_inbox
+from apps.subscriptions.stubs import stripe_event
+
+
+class Rollback(Exception):
+    pass
+
+
+def synthetic_events(count, user_ids, plan_id):
+    """Return ``count`` inbox rows: checkouts, a fifth of them later canceled."""
+    rows = []
+    for i in range(count):
+        if i % 5 == 4:
+            event = stripe_event(
+                "customer.subscription.deleted", {"id": f"sub_bench_{i - 4}"}
+            )
+        else:
+            event = stripe_event(
+                "checkout.session.completed",
+                {
+                    "id": f"cs_bench_{i}",
+                    "subscription": f"sub_bench_{i}",
+                    "customer": f"cus_bench_{i}",
+                    "metadata": {
+                        "user_id": user_ids[i % len(user_ids)],
+                        "plan_id": plan_id,
+                    },
+                },
+            )
+        rows.append(
+            WebhookEvent(
+                provider=PaymentMethod.PROVIDER_STRIPE,
+                event_id=event["id"],
+                event_type=event["type"],
+                payload=event,
+            )
+        )
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure how many webhook inbox events per second drain_webhook_inbox "
+        "applies, event by event and in bulk, on the configured database. "
+        "All data is created in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--events",
+            type=int,
+            default=10000,
+            help="Number of synthetic events (default: 10000)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Events per drained batch (default: 500)",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=200,
+            help="Number of synthetic users the events refer to (default: 200)",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{options['events']} events on {connection.vendor}, "
+            f"batches of {options['batch_size']}"
+        )
+        for label, bulk in (("one by one", False), ("bulk", True)):
+            try:
+                with transaction.atomic():
+                    self._run(label, bulk, options)
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def _run(self, label, bulk, options):
+        User = get_user_model()
+        User.objects.bulk_create(
+            User(username=f"bench_webhook_{i}") for i in range(options["users"])
+        )
+        user_ids = list(
+            User.objects.filter(username__startswith="bench_webhook_").values_list(
+                "pk", flat=True
+            )
+        )
+        plan = Plan.objects.create(
+            name="Bench", slug="bench-webhook-inbox", price=10, duration_months=1
+        )
+        WebhookEvent.objects.bulk_create(
+            synthetic_events(options["events"], user_ids, plan.pk),
+            batch_size=1000,
+        )
+
+        processed = 0
+        start = time.perf_counter()
+        while True:
+            counts = drain_webhook_inbox(batch_size=options["batch_size"], bulk=bulk)
+            processed += counts["processed"]
+            if not any(counts.values()):
+                break
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"{label:<12} {processed:>7} events in {elapsed:>7.2f}s "
+            f"{processed / elapsed:>10.0f} events/s"
+        )
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from apps.subscriptions.maintenance import dedupe_subscriptions
+from apps.subscriptions.models import Subscription
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete duplicate subscriptions per (payment method, external id), "
+        "keeping the most recently updated one. Migration 0005 runs this "
+        "before adding the unique constraint; run it beforehand on large "
+        "tables to keep the migration short."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Duplicate groups handled per transaction (default: 500)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many rows would be deleted",
+        )
+
+    def handle(self, *args, **options):
+        deleted = dedupe_subscriptions(
+            Subscription,
+            batch_size=options["batch_size"],
+            dry_run=options["dry_run"],
+        )
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(f"{verb} {deleted} duplicate subscriptions")
@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.subscriptions.services import drain_webhook_inbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply pending provider webhook events from the WebhookEvent inbox in "
+        "batches; several workers can run in parallel"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Events claimed per batch (default: 100)",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=5,
+            help="Attempts before an event is marked failed (default: 5)",
+        )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help=(
+                "Apply each batch with bulk queries per provider instead of "
+                "event by event (faster when replaying a backlog)"
+            ),
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help=(
+                "Keep running and poll the inbox every INTERVAL seconds once it "
+                "is empty (default: 0, drain it once and exit)"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+        while True:
+            counts = drain_webhook_inbox(
+                batch_size=options["batch_size"],
+                max_attempts=options["max_attempts"],
+                bulk=options["bulk"],
+            )
+            claimed = sum(counts.values())
+            if claimed:
+                self.stdout.write(
+                    "Processed {processed}, retrying {retried}, failed {failed}".format(
+                        **counts
+                    )
+                )
+            if claimed < options["batch_size"]:
+                if interval <= 0:
+                    break
+                time.sleep(interval)
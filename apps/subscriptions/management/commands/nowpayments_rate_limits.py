@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from apps.subscriptions.transport import RATE_LIMITS, rate_limiter
+
+
+class Command(BaseCommand):
+    help = (
+        "Show how many NowPayments calls were delayed or rejected by the rate "
+        "limiter, per endpoint class (counters are shared by all workers with "
+        "the cache backend, per process with the local one)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Reset the counters and buckets after printing them",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'class':<12} {'rate/s':>8} {'burst':>6} {'delayed':>9} {'rejected':>9}"
+        )
+        for name, counters in rate_limiter.stats().items():
+            rate, burst = RATE_LIMITS[name]
+            self.stdout.write(
+                f"{name:<12} {rate:>8} {burst:>6} "
+                f"{counters['delayed']:>9} {counters['rejected']:>9}"
+            )
+        if options["reset"]:
+            rate_limiter.reset()
+            self.stdout.write("Counters reset")
@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.subscriptions.stubs import PaymentStubServer, StubConfig
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for the NowPayments and Stripe APIs, with "
+        "configurable latency and error injection, for offline load tests of "
+        "the checkout flows"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)"
+        )
+        parser.add_argument(
+            "--port", type=int, default=8765, help="Port (default: 8765)"
+        )
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.0,
+            help="Seconds every request sleeps before answering (default: 0)",
+        )
+        parser.add_argument(
+            "--jitter",
+            type=float,
+            default=0.0,
+            help="Extra random delay, up to JITTER seconds (default: 0)",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0.0,
+            help="Fraction of requests answered with an error (default: 0)",
+        )
+        parser.add_argument(
+            "--error-status",
+            type=int,
+            default=503,
+            help="HTTP status of injected errors (default: 503)",
+        )
+        parser.add_argument(
+            "--stripe-webhook-url",
+            help=(
+                "Deliver a signed checkout.session.completed event to this URL "
+                "for every checkout session created"
+            ),
+        )
+        parser.add_argument(
+            "--callback-delay",
+            type=float,
+            default=0.5,
+            help="Seconds before webhooks/IPNs are delivered (default: 0.5)",
+        )
+        parser.add_argument(
+            "--seed", type=int, help="Seed of the latency and error randomness"
+        )
+
+    def handle(self, *args, **options):
+        config = StubConfig(
+            latency=options["latency"],
+            jitter=options["jitter"],
+            error_rate=options["error_rate"],
+            error_status=options["error_status"],
+            stripe_webhook_url=options["stripe_webhook_url"],
+            stripe_webhook_secret=settings.STRIPE_WEBHOOK_SECRET,
+            ipn_secret=getattr(settings, "NOWPAYMENTS_IPN_SECRET", ""),
+            callback_delay=options["callback_delay"],
+            seed=options["seed"],
+        )
+        server = PaymentStubServer((options["host"], options["port"]), config)
+        base_url = server.base_url
+        self.stdout.write(f"Payment stubs listening on {base_url}")
+        self.stdout.write(f"  NOWPAYMENTS_API_BASE={base_url}/v1/")
+        self.stdout.write(f"  STRIPE_API_BASE={base_url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.cache import cached_ttl
+from apps.subscriptions.services import (
+    FULL_CURRENCIES_CACHE_KEY,
+    MERCHANT_COINS_CACHE_KEY,
+    NowPaymentsProvider,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the cached NowPayments merchant coins and full-currencies data "
+        "ahead of expiry, so the crypto payment views never fetch it inline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help=(
+                "Keep running and check the caches every INTERVAL seconds "
+                "(default: 0, refresh once and exit, e.g. from cron)"
+            ),
+        )
+        parser.add_argument(
+            "--ahead",
+            type=float,
+            default=30,
+            help=(
+                "Refresh an entry when it expires in fewer than AHEAD seconds "
+                "(default: 30)"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        provider = NowPaymentsProvider()
+        if not provider.api_key:
+            raise CommandError("NOWPAYMENTS_API_KEY is not configured")
+        api = provider.get_api()
+        interval = options["interval"]
+
+        while True:
+            self._warm(api, options["ahead"])
+            if interval <= 0:
+                break
+            time.sleep(interval)
+
+    def _warm(self, api, ahead):
+        def due(key):
+            remaining = cached_ttl(key)
+            return remaining is None or remaining < ahead
+
+        refresh_full = due(FULL_CURRENCIES_CACHE_KEY)
+        if not refresh_full and not due(MERCHANT_COINS_CACHE_KEY):
+            return
+
+        start = time.perf_counter()
+        try:
+            catalog = api.refresh_currency_catalog(refresh_full=refresh_full)
+        except Exception as e:
+            self.stderr.write(f"Failed to refresh NowPayments currencies: {e}")
+            return
+        elapsed = time.perf_counter() - start
+        refreshed = "merchant coins"
+        if refresh_full:
+            refreshed += " and full-currencies"
+        self.stdout.write(
+            f"Refreshed {refreshed}: {len(catalog)} coins in {elapsed:.2f}s"
+        )
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0002_paymentmethod_subscription_external_id_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessedWebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(choices=[('stripe', 'Stripe'), ('nowpayments', 'Crypto (NowPayments)')], max_length=50, verbose_name='Provider')),
+                ('event_id', models.CharField(max_length=255, verbose_name='Event ID')),
+                ('event_type', models.CharField(blank=True, max_length=100, verbose_name='Event Type')),
+                ('processed_at', models.DateTimeField(auto_now_add=True, verbose_name='Processed At')),
+            ],
+            options={
+                'verbose_name': 'Processed Webhook Event',
+                'verbose_name_plural': 'Processed Webhook Events',
+                'constraints': [models.UniqueConstraint(fields=('provider', 'event_id'), name='unique_webhook_event')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0003_processedwebhookevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(choices=[('stripe', 'Stripe'), ('nowpayments', 'Crypto (NowPayments)')], max_length=50, verbose_name='Provider')),
+                ('event_id', models.CharField(max_length=255, verbose_name='Event ID')),
+                ('event_type', models.CharField(blank=True, max_length=100, verbose_name='Event Type')),
+                ('payload', models.JSONField(verbose_name='Payload')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processed', 'Processed'), ('failed', 'Failed')], default='pending', max_length=20, verbose_name='Status')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Attempts')),
+                ('last_error', models.TextField(blank=True, verbose_name='Last Error')),
+                ('received_at', models.DateTimeField(auto_now_add=True, verbose_name='Received At')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Processed At')),
+            ],
+            options={
+                'verbose_name': 'Webhook Event',
+                'verbose_name_plural': 'Webhook Events',
+                'indexes': [models.Index(fields=['status', 'received_at'], name='webhook_inbox_idx')],
+                'constraints': [models.UniqueConstraint(fields=('provider', 'event_id'), name='unique_inbox_event')],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations, models, transaction
+from django.db.models import Count
+
+
+def dedupe(apps, schema_editor):
+    # Frozen copy of apps.subscriptions.maintenance.dedupe_subscriptions as of
+    # this migration; keep the live helper free to change.
+    Subscription = apps.get_model("subscriptions", "Subscription")
+    Subscription.objects.filter(external_id="").update(external_id=None)
+    groups = (
+        Subscription.objects.filter(
+            payment_method__isnull=False, external_id__isnull=False
+        )
+        .values("payment_method_id", "external_id")
+        .annotate(rows=Count("id"))
+        .filter(rows__gt=1)
+        .order_by("payment_method_id", "external_id")
+    )
+    while True:
+        batch = list(groups[:500])
+        if not batch:
+            break
+        with transaction.atomic():
+            for group in batch:
+                ids = list(
+                    Subscription.objects.filter(
+                        payment_method_id=group["payment_method_id"],
+                        external_id=group["external_id"],
+                    )
+                    .order_by("-updated_at", "-id")
+                    .values_list("id", flat=True)
+                )
+                Subscription.objects.filter(id__in=ids[1:]).delete()
+
+
+class Migration(migrations.Migration):
+    # Each dedupe batch commits on its own
+    atomic = False
+
+    dependencies = [
+        ('subscriptions', '0004_webhookevent'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='subscription',
+            constraint=models.UniqueConstraint(fields=('payment_method', 'external_id'), name='unique_subscription_external_id'),
+        ),
+    ]
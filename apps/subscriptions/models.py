@@ -105,6 +105,30 @@ class Discount(models.Model):
         return f"{self.name} - {self.percentage_off}% off for {self.duration_months}+ months"
 
 
+class SubscriptionQuerySet(models.QuerySet):
+    def for_provider(self, payment_method_id):
+        """Subscriptions billed through one payment method."""
+        return self.filter(payment_method_id=payment_method_id)
+
+    def by_external_id(self, payment_method_id, external_id):
+        """The subscription with a provider's id, via the unique index."""
+        return self.filter(payment_method_id=payment_method_id, external_id=external_id)
+
+    def active(self, now=None):
+        """Subscriptions that are ``is_active``, as a query.
+
+        Filters on (status, end_date), so per-user lookups are served by the
+        (user, status, end_date) index.
+        """
+        return self.filter(
+            status=Subscription.STATUS_ACTIVE, end_date__gt=now or timezone.now()
+        )
+
+    def current_for(self, user):
+        """Return the user's active subscription that runs longest, or None."""
+        return self.active().filter(user=user).order_by("-end_date").first()
+
+
 class Subscription(models.Model):
     """
     Tracks a user's subscription status.
@@ -161,10 +185,25 @@ class Subscription(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = SubscriptionQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("Subscription")
         verbose_name_plural = _("Subscriptions")
         ordering = ["-start_date"]
+        constraints = [
+            # Also the index behind provider-scoped lookups by external_id
+            models.UniqueConstraint(
+                fields=["payment_method", "external_id"],
+                name="unique_subscription_external_id",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "status", "end_date"],
+                name="subscription_entitlement_idx",
+            )
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.plan} ({self.status})"
@@ -176,3 +215,84 @@ class Subscription(models.Model):
             and self.end_date
             and self.end_date > timezone.now()
         )
+
+
+class ProcessedWebhookEvent(models.Model):
+    """
+    Ledger of provider webhook events that have been applied.
+
+    Providers retry deliveries, so an event whose id is already recorded here
+    is acknowledged without being processed again.
+    """
+
+    provider = models.CharField(
+        _("Provider"), max_length=50, choices=PaymentMethod.PROVIDER_CHOICES
+    )
+    event_id = models.CharField(_("Event ID"), max_length=255)
+    event_type = models.CharField(_("Event Type"), max_length=100, blank=True)
+    processed_at = models.DateTimeField(_("Processed At"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Processed Webhook Event")
+        verbose_name_plural = _("Processed Webhook Events")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["provider", "event_id"], name="unique_webhook_event"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.provider} {self.event_type} ({self.event_id})"
+
+
+class WebhookEvent(models.Model):
+    """
+    Inbox of verified provider webhook events waiting to be applied.
+
+    Webhook views store the raw event here and acknowledge it immediately;
+    the ``drain_webhook_inbox`` command applies pending events in batches.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_PROCESSED = "processed"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, _("Pending")),
+        (STATUS_PROCESSED, _("Processed")),
+        (STATUS_FAILED, _("Failed")),
+    ]
+
+    provider = models.CharField(
+        _("Provider"), max_length=50, choices=PaymentMethod.PROVIDER_CHOICES
+    )
+    event_id = models.CharField(_("Event ID"), max_length=255)
+    event_type = models.CharField(_("Event Type"), max_length=100, blank=True)
+    payload = models.JSONField(_("Payload"))
+    status = models.CharField(
+        _("Status"), max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING
+    )
+    attempts = models.PositiveIntegerField(_("Attempts"), default=0)
+    last_error = models.TextField(_("Last Error"), blank=True)
+    next_attempt_at = models.DateTimeField(
+        _("Next Attempt At"),
+        null=True,
+        blank=True,
+        help_text=_("A failed event is not retried before this time"),
+    )
+    received_at = models.DateTimeField(_("Received At"), auto_now_add=True)
+    processed_at = models.DateTimeField(_("Processed At"), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("Webhook Event")
+        verbose_name_plural = _("Webhook Events")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["provider", "event_id"], name="unique_inbox_event"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["status", "received_at"], name="webhook_inbox_idx")
+        ]
+
+    def __str__(self):
+        return f"{self.provider} {self.event_type} ({self.event_id}, {self.status})"
@@ -1,24 +1,89 @@
+import asyncio
 import json
 import logging
+import time
+import weakref
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
 from typing import Any, Dict, List, Optional
 
 import requests
 import stripe
+from asgiref.sync import async_to_sync, sync_to_async
 from django.conf import settings
 from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
 from django.urls import reverse
+from django.utils import timezone
 from django_settings_env import Env
 
-from .models import PaymentMethod, Subscription
+from apps.core.cache import LocalTTLCache, cached_lookup, store_cached
+
+from . import transport
+from .currencies import CurrencyCatalog, CurrencyIndex, merchant_codes
+from .entitlements import invalidate_entitlements
+from .models import PaymentMethod, ProcessedWebhookEvent, Subscription, WebhookEvent
 
 logger = logging.getLogger(__name__)
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
+if getattr(settings, "STRIPE_API_BASE", None):
+    stripe.api_base = settings.STRIPE_API_BASE
 
 env = Env()
 
 
+# PaymentMethod ids by provider, read on every webhook delivery.
+PAYMENT_METHOD_ID_TTL = 60 * 60
+
+
+def _payment_method_cache_key(provider_id: str) -> str:
+    return f"subscriptions:payment_method_id:{provider_id}"
+
+
+def get_payment_method_id(provider_id: str) -> Optional[int]:
+    """Return the id of the ``PaymentMethod`` of a provider, or None (cached)."""
+    return cached_lookup(
+        _payment_method_cache_key(provider_id),
+        lambda: (
+            PaymentMethod.objects.filter(provider_id=provider_id)
+            .values_list("id", flat=True)
+            .first()
+        ),
+        PAYMENT_METHOD_ID_TTL,
+        negative_ttl=60,
+        is_negative=lambda value: value is None,
+    )
+
+
+def invalidate_payment_method_ids() -> None:
+    """Drop the cached ``PaymentMethod`` ids of every provider."""
+    cache.delete_many(
+        [
+            _payment_method_cache_key(provider)
+            for provider, _ in PaymentMethod.PROVIDER_CHOICES
+        ]
+    )
+
+
+def record_webhook_event(provider: str, event_id: str, event_type: str = "") -> bool:
+    """Add a webhook event to the ledger.
+
+    Returns False, without touching the ledger, when the event was already
+    recorded (a retried delivery).
+    """
+    try:
+        with transaction.atomic():
+            ProcessedWebhookEvent.objects.create(
+                provider=provider, event_id=event_id, event_type=event_type
+            )
+    except IntegrityError:
+        return False
+    return True
+
+
 class PaymentProvider(ABC):
     """
     Abstract base class for payment providers.
@@ -66,82 +131,283 @@ class StripeProvider(PaymentProvider):
         )
         return checkout_session.url
 
-    def handle_webhook(self, request):
+    def verify_webhook(self, request):
+        """Return the Stripe event of a webhook request, or None if it is invalid."""
         payload = request.body
         sig_header = request.META.get("HTTP_STRIPE_SIGNATURE")
-        event = None
 
         try:
-            event = stripe.Webhook.construct_event(
+            return stripe.Webhook.construct_event(
                 payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
             )
         except ValueError:
-            return False
+            return None
         except stripe.error.SignatureVerificationError:
+            return None
+
+    def handle_webhook(self, request):
+        event = self.verify_webhook(request)
+        if event is None:
+            return False
+
+        try:
+            self.apply_event(event)
+        except Exception as e:
+            logger.error(
+                f"Error handling Stripe event {event['id']}: {e}", exc_info=True
+            )
             return False
 
-        if event["type"] == "checkout.session.completed":
-            session = event["data"]["object"]
-            self._handle_checkout_session(session)
-        elif event["type"] == "customer.subscription.deleted":
-            subscription = event["data"]["object"]
-            self._handle_subscription_deleted(subscription)
+        return True
+
+    def enqueue_webhook(self, request):
+        """Verify a webhook request and store its event in the inbox.
+
+        The event is applied later by the ``drain_webhook_inbox`` command;
+        redeliveries of an event already in the inbox are dropped.
+        """
+        event = self.verify_webhook(request)
+        if event is None:
+            return False
 
+        WebhookEvent.objects.bulk_create(
+            [
+                WebhookEvent(
+                    provider=PaymentMethod.PROVIDER_STRIPE,
+                    event_id=event["id"],
+                    event_type=event["type"],
+                    payload=json.loads(request.body),
+                )
+            ],
+            ignore_conflicts=True,
+        )
         return True
 
+    def apply_event(self, event):
+        """Apply a Stripe event once; raises if it could not be applied.
+
+        The ledger entry and the changes it records commit together: a failed
+        event is rolled back and applied again when it is redelivered.
+        """
+        with transaction.atomic():
+            if not record_webhook_event(
+                PaymentMethod.PROVIDER_STRIPE, event["id"], event["type"]
+            ):
+                return
+            if event["type"] == "checkout.session.completed":
+                session = event["data"]["object"]
+                self._handle_checkout_session(session)
+            elif event["type"] == "customer.subscription.deleted":
+                subscription = event["data"]["object"]
+                self._handle_subscription_deleted(subscription)
+
     def _handle_checkout_session(self, session):
-        user_id = session["metadata"].get("user_id")
-        plan_id = session["metadata"].get("plan_id")
+        from django.contrib.auth import get_user_model
+
+        from .models import Plan
+
+        metadata = session["metadata"]
         stripe_subscription_id = session["subscription"]
-        stripe_customer_id = session["customer"]
 
+        # Foreign keys are only checked at commit; look the ids up first so
+        # an event with unknown ids fails on its own instead of its batch.
+        if not (
+            get_user_model().objects.filter(pk=metadata["user_id"]).exists()
+            and Plan.objects.filter(pk=metadata["plan_id"]).exists()
+        ):
+            raise ValueError("Unknown user or plan in session metadata")
+
+        Subscription.objects.update_or_create(
+            payment_method_id=get_payment_method_id(PaymentMethod.PROVIDER_STRIPE),
+            external_id=stripe_subscription_id,
+            defaults={
+                "user_id": metadata["user_id"],
+                "plan_id": metadata["plan_id"],
+                "stripe_subscription_id": stripe_subscription_id,
+                "stripe_customer_id": session["customer"],
+                "status": Subscription.STATUS_ACTIVE,
+            },
+        )
+
+    def _handle_subscription_deleted(self, stripe_subscription):
+        subscriptions = Subscription.objects.by_external_id(
+            get_payment_method_id(PaymentMethod.PROVIDER_STRIPE),
+            stripe_subscription["id"],
+        )
+        user_ids = list(subscriptions.values_list("user_id", flat=True))
+        subscriptions.update(
+            status=Subscription.STATUS_CANCELED, updated_at=timezone.now()
+        )
+        invalidate_entitlements(user_ids)
+
+    def apply_events(self, events: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Apply a page of Stripe events with a constant number of queries.
+
+        Events already in the ledger are skipped; the users, plans and
+        subscriptions the others reference are loaded up front and the
+        changes are written with ``bulk_create``/``bulk_update``, in event
+        order. Returns the error of every event that could not be applied,
+        by event id; all other events are recorded in the ledger.
+        """
         from django.contrib.auth import get_user_model
 
         from .models import Plan
 
         User = get_user_model()
 
-        try:
-            user = User.objects.get(id=user_id)
-            plan = Plan.objects.get(id=plan_id)
-            payment_method = PaymentMethod.objects.filter(
-                provider_id=PaymentMethod.PROVIDER_STRIPE
-            ).first()
-
-            Subscription.objects.create(
-                user=user,
-                plan=plan,
-                payment_method=payment_method,
-                external_id=stripe_subscription_id,
-                stripe_subscription_id=stripe_subscription_id,
-                stripe_customer_id=stripe_customer_id,
-                status=Subscription.STATUS_ACTIVE,
+        done = set(
+            ProcessedWebhookEvent.objects.filter(
+                provider=PaymentMethod.PROVIDER_STRIPE,
+                event_id__in=[event["id"] for event in events],
+            ).values_list("event_id", flat=True)
+        )
+        pending = []
+        for event in events:
+            if event["id"] not in done:
+                done.add(event["id"])
+                pending.append(event)
+
+        objects = [event["data"]["object"] for event in pending]
+        sessions = [
+            obj
+            for event, obj in zip(pending, objects)
+            if event["type"] == "checkout.session.completed"
+        ]
+        metadata = [session.get("metadata") or {} for session in sessions]
+        users = User.objects.in_bulk(
+            {m["user_id"] for m in metadata if m.get("user_id")}
+        )
+        plans = Plan.objects.in_bulk(
+            {m["plan_id"] for m in metadata if m.get("plan_id")}
+        )
+        external_ids = {obj.get("subscription") or obj.get("id") for obj in objects} - {
+            None
+        }
+        payment_method_id = get_payment_method_id(PaymentMethod.PROVIDER_STRIPE)
+        subscriptions = {
+            sub.external_id: sub
+            for sub in Subscription.objects.for_provider(payment_method_id).filter(
+                external_id__in=external_ids
             )
-        except Exception as e:
-            print(f"Error handling Stripe checkout: {e}")
+        }
+
+        now = timezone.now()
+        to_create: Dict[str, Subscription] = {}
+        to_update: Dict[str, Subscription] = {}
+        applied: List[Dict[str, Any]] = []
+        errors: Dict[str, str] = {}
+        for event, obj in zip(pending, objects):
+            if event["type"] == "checkout.session.completed":
+                meta = obj.get("metadata") or {}
+                user = users.get(int(meta.get("user_id") or 0))
+                plan = plans.get(int(meta.get("plan_id") or 0))
+                if user is None or plan is None:
+                    errors[event["id"]] = "Unknown user or plan in session metadata"
+                    continue
+                external_id = obj["subscription"]
+                sub = subscriptions.get(external_id)
+                if sub is None:
+                    sub = Subscription(external_id=external_id)
+                    subscriptions[external_id] = to_create[external_id] = sub
+                elif external_id not in to_create:
+                    to_update[external_id] = sub
+                sub.user = user
+                sub.plan = plan
+                sub.payment_method_id = payment_method_id
+                sub.stripe_subscription_id = external_id
+                sub.stripe_customer_id = obj.get("customer")
+                sub.status = Subscription.STATUS_ACTIVE
+            elif event["type"] == "customer.subscription.deleted":
+                sub = subscriptions.get(obj["id"])
+                if sub is not None:
+                    sub.status = Subscription.STATUS_CANCELED
+                    if obj["id"] not in to_create:
+                        to_update[obj["id"]] = sub
+            applied.append(event)
+
+        with transaction.atomic():
+            Subscription.objects.bulk_create(to_create.values())
+            for sub in to_update.values():
+                sub.updated_at = now
+            Subscription.objects.bulk_update(
+                to_update.values(),
+                [
+                    "user",
+                    "plan",
+                    "payment_method",
+                    "stripe_subscription_id",
+                    "stripe_customer_id",
+                    "status",
+                    "updated_at",
+                ],
+            )
+            ProcessedWebhookEvent.objects.bulk_create(
+                [
+                    ProcessedWebhookEvent(
+                        provider=PaymentMethod.PROVIDER_STRIPE,
+                        event_id=event["id"],
+                        event_type=event["type"],
+                    )
+                    for event in applied
+                ],
+                ignore_conflicts=True,
+            )
+        # bulk writes send no signals
+        invalidate_entitlements(
+            sub.user_id for sub in [*to_create.values(), *to_update.values()]
+        )
+        return errors
 
-    def _handle_subscription_deleted(self, stripe_subscription):
-        stripe_subscription_id = stripe_subscription["id"]
-        try:
-            sub = Subscription.objects.get(external_id=stripe_subscription_id)
-            sub.status = Subscription.STATUS_CANCELED
-            sub.save()
-        except Subscription.DoesNotExist:
-            pass
+
+# Cache keys and lifetimes (seconds) of the merchant coin data used by the
+# crypto payment views. The ``warm_nowpayments_cache`` command refreshes both
+# entries ahead of expiry so the request path only ever sees cache hits.
+MERCHANT_COINS_CACHE_KEY = "nowpayments:currency_catalog"
+MERCHANT_COINS_TTL = 60
+FULL_CURRENCIES_CACHE_KEY = "nowpayments:currency_index"
+FULL_CURRENCIES_TTL = 60 * 60 * 24
+
+# Process-local copies of the currency catalog by cache key. Kept short so a
+# refreshed catalog reaches every worker quickly.
+CATALOG_LOCAL_TTL = getattr(settings, "NOWPAYMENTS_CATALOG_LOCAL_TTL", 5)
+_local_catalogs = LocalTTLCache(maxsize=8, ttl=CATALOG_LOCAL_TTL)
+
+
+def invalidate_currency_catalog(cache_key: str = MERCHANT_COINS_CACHE_KEY) -> None:
+    """Drop the cached currency catalog in this process and the shared cache."""
+    _local_catalogs.delete(cache_key)
+    cache.delete(cache_key)
 
 
 class NowPaymentsAPI:
-    API_BASE = "https://api.nowpayments.io/v1/"
+    """NowPayments REST client.
+
+    All instances share the process-wide pooled session from
+    ``apps.subscriptions.transport``, so connections are reused across
+    requests. Calls use per-endpoint timeouts, idempotent GETs are retried
+    with jittered backoff, and a circuit breaker makes calls fail fast with
+    ``transport.CircuitOpenError`` while the provider is degraded. Every call
+    also takes a slot from the rate limiter of its endpoint class (see
+    ``transport.rate_limiter``), waiting briefly when the budget is exhausted.
+    """
+
+    API_BASE = getattr(
+        settings, "NOWPAYMENTS_API_BASE", "https://api.nowpayments.io/v1/"
+    )
 
     def __init__(self, token):
         if not token:
             raise ValueError("API key is not specified")
         self.token = token
-        self.session = requests.Session()
-        self.session.headers.update({"x-api-key": self.token})
+        self.session = transport.get_session()
+        self.headers = {"x-api-key": self.token}
 
     def _call(
-        self, method: str, endpoint: str, data: Optional[Dict[str, Any]] = None
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict[str, Any]] = None,
+        deadline_at: Optional[float] = None,
     ) -> Dict[str, Any]:
         """Make an API call to NowPayments.
 
@@ -149,27 +415,55 @@ class NowPaymentsAPI:
             method: HTTP method (GET or POST)
             endpoint: API endpoint path
             data: Request data (params for GET, body for POST)
+            deadline_at: ``time.monotonic()`` by which the call must be over;
+                the timeouts are cut to it and the call is not retried
 
         Returns:
             JSON response as dictionary
 
         Raises:
             ValueError: If method is not GET or POST
+            transport.CircuitOpenError: If the circuit breaker is open
+            transport.RateLimitedError: If the endpoint's rate budget is exhausted
+            requests.exceptions.Timeout: If ``deadline_at`` passes first
             requests.exceptions.RequestException: If API call fails
         """
+        if method not in ("GET", "POST"):
+            raise ValueError(f"Unsupported method: {method}")
+
         url = f"{self.API_BASE}{endpoint}"
+        timeout = transport.get_timeout(endpoint)
+        session = self.session
+        wait = transport.rate_limiter.reserve(endpoint)
+        if deadline_at is not None:
+            remaining = deadline_at - time.monotonic() - wait
+            if remaining <= 0:
+                raise requests.exceptions.Timeout(
+                    f"NowPayments {endpoint} call would miss its deadline"
+                )
+            timeout = tuple(min(part, remaining) for part in timeout)
+            session = transport.get_session(max_retries=0)
+        if wait:
+            time.sleep(wait)
+        transport.breaker.before_call()
 
         try:
             if method == "GET":
-                response = self.session.get(url, params=data)
-            elif method == "POST":
-                response = self.session.post(url, json=data)
+                response = session.get(
+                    url, params=data, headers=self.headers, timeout=timeout
+                )
             else:
-                raise ValueError(f"Unsupported method: {method}")
+                response = session.post(
+                    url, json=data, headers=self.headers, timeout=timeout
+                )
 
             response.raise_for_status()
-            return response.json()
+            result = response.json()
         except requests.exceptions.RequestException as e:
+            if transport.is_provider_failure(e):
+                transport.breaker.record_failure()
+            else:
+                transport.breaker.record_success()
             logger.error(
                 f"NowPayments API Error ({method} {endpoint}): {e}",
                 exc_info=True,
@@ -177,6 +471,11 @@ class NowPaymentsAPI:
             if hasattr(e, "response") and e.response is not None:
                 logger.error(f"Response: {e.response.text}")
             raise
+        except BaseException:
+            transport.breaker.release_trial()
+            raise
+        transport.breaker.record_success()
+        return result
 
     def status(self) -> Dict[str, Any]:
         """Get API status."""
@@ -196,16 +495,19 @@ class NowPaymentsAPI:
         """
         return self._call("GET", "merchant/coins")
 
-    def get_estimate_price(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    def get_estimate_price(
+        self, params: Dict[str, Any], deadline_at: Optional[float] = None
+    ) -> Dict[str, Any]:
         """Get estimated price for conversion.
 
         Args:
             params: Dictionary with 'amount', 'currency_from', 'currency_to'
+            deadline_at: Optional ``time.monotonic()`` deadline (see ``_call``)
 
         Returns:
             Dictionary with estimated conversion amount
         """
-        return self._call("GET", "estimate", params)
+        return self._call("GET", "estimate", params, deadline_at)
 
     def create_payment(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Create a payment."""
@@ -215,16 +517,19 @@ class NowPaymentsAPI:
         """Get payment status."""
         return self._call("GET", f"payment/{payment_id}")
 
-    def get_minimum_payment_amount(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    def get_minimum_payment_amount(
+        self, params: Dict[str, Any], deadline_at: Optional[float] = None
+    ) -> Dict[str, Any]:
         """Get minimum payment amount.
 
         Args:
             params: Dictionary with 'currency_from', 'currency_to'
+            deadline_at: Optional ``time.monotonic()`` deadline (see ``_call``)
 
         Returns:
             Dictionary with 'min_amount' key
         """
-        return self._call("GET", "min-amount", params)
+        return self._call("GET", "min-amount", params, deadline_at)
 
     def get_list_payments(
         self, params: Optional[Dict[str, Any]] = None
@@ -243,144 +548,474 @@ class NowPaymentsAPI:
         """
         return self._call("POST", "invoice", params)
 
-    def get_merchant_coins_enriched(
+    def get_currency_catalog(
         self,
-        merchant_ttl: int = 60,
-        full_ttl: int = 60 * 60 * 24,
-        cache_key_merchant: str = "nowpayments:merchant_currencies_enriched",
-        cache_key_full: str = "nowpayments:full_currencies",
-    ) -> List[Dict[str, Any]]:
-        """Return merchant-configured coins enriched with data from full-currencies.
+        merchant_ttl: int = MERCHANT_COINS_TTL,
+        full_ttl: int = FULL_CURRENCIES_TTL,
+        cache_key_merchant: str = MERCHANT_COINS_CACHE_KEY,
+        cache_key_full: str = FULL_CURRENCIES_CACHE_KEY,
+    ) -> CurrencyCatalog:
+        """Return the merchant's coins as a ``CurrencyCatalog``.
 
         Strategy:
         - Fetch merchant/coins (cheap) to get the list of enabled codes.
-        - Try to get enriched data from cache; if not present, call full-currencies once
-          and cache it for a long TTL.
-        - Merge merchant list with full-currencies by matching code/ticker/name.
-        - Cache the enriched merchant list for a short TTL (merchant_ttl).
+        - Try to get the currency index from cache; if not present, call
+          full-currencies once and cache a compact ``CurrencyIndex`` of it for a
+          long TTL.
+        - Merge merchant list with the index by matching code/ticker/name/cg_id.
+        - Cache the catalog, with its precomputed aliases, for a short TTL
+          (merchant_ttl).
+
+        Both caches go through ``apps.core.cache.cached_lookup`` so that expiry
+        does not make every worker refetch from the provider at once, and are
+        kept fresh ahead of expiry by ``refresh_currency_catalog`` (see the
+        ``warm_nowpayments_cache`` command). Each process also keeps the
+        catalog for ``NOWPAYMENTS_CATALOG_LOCAL_TTL`` seconds, so resolving a
+        currency on the request path usually costs a single dict lookup.
+        """
+        catalog = _local_catalogs.get(cache_key_merchant)
+        if catalog is None:
+            catalog = cached_lookup(
+                cache_key_merchant,
+                lambda: self._build_currency_catalog(
+                    merchant_ttl, full_ttl, cache_key_full
+                ),
+                merchant_ttl,
+            )
+            if catalog:
+                _local_catalogs.set(cache_key_merchant, catalog)
+        return catalog
+
+    def get_merchant_coins_enriched(self, **kwargs) -> List[Dict[str, Any]]:
+        """Return merchant-configured coins enriched with data from full-currencies.
+
+        Returns a list of dicts with keys: `code`, `name`, `network` and `logo_url`
+        (see ``get_currency_catalog``, which takes the same arguments).
+        """
+        return list(self.get_currency_catalog(**kwargs))
 
-        Returns a list of dicts with keys: `code`, `name`, `network`, `logo_url`, and
-        the original `raw` entry from full-currencies when available.
+    def refresh_currency_catalog(
+        self,
+        merchant_ttl: int = MERCHANT_COINS_TTL,
+        full_ttl: int = FULL_CURRENCIES_TTL,
+        cache_key_merchant: str = MERCHANT_COINS_CACHE_KEY,
+        cache_key_full: str = FULL_CURRENCIES_CACHE_KEY,
+        refresh_full: bool = True,
+    ) -> CurrencyCatalog:
+        """Refetch the cached coin data now, off the request path.
+
+        The currency index is refreshed first (unless ``refresh_full`` is
+        False) so the catalog is built from it. Failed fetches never replace
+        previously cached data. Returns the new catalog.
         """
-        cached = cache.get(cache_key_merchant)
-        if cached is not None:
-            return cached
+        if refresh_full:
+            start = time.monotonic()
+            index = self._load_currency_index()
+            if index:
+                store_cached(
+                    cache_key_full, index, full_ttl, delta=time.monotonic() - start
+                )
 
+        start = time.monotonic()
+        catalog = self._build_currency_catalog(merchant_ttl, full_ttl, cache_key_full)
+        if catalog:
+            store_cached(
+                cache_key_merchant,
+                catalog,
+                merchant_ttl,
+                delta=time.monotonic() - start,
+            )
+            _local_catalogs.set(cache_key_merchant, catalog)
+        return catalog
+
+    def _build_currency_catalog(
+        self, merchant_ttl: int, full_ttl: int, cache_key_full: str
+    ) -> CurrencyCatalog:
         try:
-            merchant_data = self.get_merchant_coins()
+            codes = merchant_codes(self.get_merchant_coins())
         except Exception:
-            cache.set(cache_key_merchant, [], merchant_ttl)
-            return []
-
-        # Normalize merchant list similar to views._get_merchant_currencies
-        if isinstance(merchant_data, dict) and "selectedCurrencies" in merchant_data:
-            available = merchant_data.get("selectedCurrencies", [])
-        elif isinstance(merchant_data, list):
-            available = merchant_data
-        else:
-            available = []
-
-        def norm(s: str) -> str:
-            return "".join(c for c in str(s).lower() if c.isalnum())
-
-        # Build unique merchant codes preserving original strings
-        seen = set()
-        merchant_codes: List[str] = []
-        for entry in available:
-            code = None
-            if isinstance(entry, dict):
-                code = (
-                    entry.get("pay_currency")
-                    or entry.get("code")
-                    or entry.get("currency")
-                    or entry.get("symbol")
-                    or entry.get("name")
-                )
-            else:
-                code = entry
-            if not code:
-                continue
-            n = norm(code)
-            if n not in seen:
-                seen.add(n)
-                merchant_codes.append(code)
-
-        if not merchant_codes:
-            cache.set(cache_key_merchant, [], merchant_ttl)
-            return []
-
-        # Load (or fetch) full currencies mapping once
-        full = cache.get(cache_key_full)
-        if full is None:
-            try:
-                full_resp = self._call("GET", "full-currencies")
-                # API returns {"currencies": [...]} per example
-                full_list = (
-                    full_resp.get("currencies") if isinstance(full_resp, dict) else None
-                )
-                if not isinstance(full_list, list):
-                    full_list = []
-            except Exception:
+            return CurrencyCatalog()
+
+        if not codes:
+            return CurrencyCatalog()
+
+        # Load (or fetch) the currency index once. An empty index (failed
+        # fetch) is only cached for merchant_ttl so it is retried soon.
+        index = cached_lookup(
+            cache_key_full,
+            self._load_currency_index,
+            full_ttl,
+            negative_ttl=merchant_ttl,
+        )
+        return CurrencyCatalog.build(codes, index)
+
+    def _load_currency_index(self) -> CurrencyIndex:
+        try:
+            full_resp = self._call("GET", "full-currencies")
+            # API returns {"currencies": [...]} per example
+            full_list = (
+                full_resp.get("currencies") if isinstance(full_resp, dict) else None
+            )
+            if not isinstance(full_list, list):
                 full_list = []
-            # Build index by several keys for lenient matching
-            mapping: Dict[str, Dict[str, Any]] = {}
-            for item in full_list:
+        except Exception:
+            full_list = []
+        return CurrencyIndex.from_currencies(full_list)
+
+
+class AsyncNowPaymentsAPI:
+    """Async counterpart of ``NowPaymentsAPI`` for ASGI deployments.
+
+    Uses the pooled ``httpx.AsyncClient`` of the running event loop (httpx is
+    an optional dependency, imported on first use) with the same timeouts,
+    GET retry policy, circuit breaker and rate limiter as the sync client.
+    """
+
+    API_BASE = NowPaymentsAPI.API_BASE
+
+    def __init__(self, token, client=None):
+        if not token:
+            raise ValueError("API key is not specified")
+        self.token = token
+        self._client = client
+        self.headers = {"x-api-key": self.token}
+
+    @property
+    def client(self):
+        if self._client is None:
+            return transport.get_async_client()
+        return self._client
+
+    async def _call(
+        self, method: str, endpoint: str, data: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Make an API call to NowPayments (see ``NowPaymentsAPI._call``)."""
+        if method not in ("GET", "POST"):
+            raise ValueError(f"Unsupported method: {method}")
+
+        httpx = transport.import_httpx()
+        url = f"{self.API_BASE}{endpoint}"
+        connect, read = transport.get_timeout(endpoint)
+        timeout = httpx.Timeout(read, connect=connect)
+        retries = transport.MAX_RETRIES if method == "GET" else 0
+        wait = await transport.rate_limiter.areserve(endpoint)
+        if wait:
+            await asyncio.sleep(wait)
+        transport.breaker.before_call()
+
+        try:
+            for attempt in range(retries + 1):
                 try:
-                    code = item.get("code")
-                    ticker = item.get("ticker")
-                    name = item.get("name")
-                    cg_id = item.get("cg_id")
-                    for k in (code, ticker, name, cg_id):
-                        if k:
-                            mapping[
-                                "".join(c for c in str(k).lower() if c.isalnum())
-                            ] = item
-                except Exception:
+                    if method == "GET":
+                        response = await self.client.get(
+                            url, params=data, headers=self.headers, timeout=timeout
+                        )
+                    else:
+                        response = await self.client.post(
+                            url, json=data, headers=self.headers, timeout=timeout
+                        )
+                except httpx.TransportError:
+                    if attempt < retries:
+                        await asyncio.sleep(transport.backoff_delay(attempt))
+                        continue
+                    raise
+                if response.status_code in transport.RETRY_STATUSES and (
+                    attempt < retries
+                ):
+                    await asyncio.sleep(transport.backoff_delay(attempt))
                     continue
-            full = mapping
-            # Cache mapping for a long TTL since it's expensive
-            cache.set(cache_key_full, full, full_ttl)
-
-        enriched: List[Dict[str, Any]] = []
-        for code in merchant_codes:
-            key = norm(code)
-            matched = full.get(key)
-            if not matched:
-                # Try uppercase variants or ticker matching fallback
-                matched = None
-                # additional attempts: try exact uppercase code match
-                for k, v in full.items():
-                    if k == key:
-                        matched = v
-                        break
-            if matched:
-                logo = matched.get("logo_url")
-                if logo and isinstance(logo, str) and logo.startswith("/"):
-                    logo_url = f"https://nowpayments.io{logo}"
-                else:
-                    logo_url = logo
-                enriched.append(
-                    {
-                        "code": code,
-                        "name": matched.get("name") or code,
-                        "network": matched.get("network"),
-                        "logo_url": logo_url,
-                        "raw": matched,
-                    }
-                )
+                break
+
+            response.raise_for_status()
+            result = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            if transport.is_provider_failure(e):
+                transport.breaker.record_failure()
             else:
-                enriched.append(
-                    {
-                        "code": code,
-                        "name": code,
-                        "network": None,
-                        "logo_url": None,
-                        "raw": None,
-                    }
-                )
+                transport.breaker.record_success()
+            logger.error(
+                f"NowPayments API Error ({method} {endpoint}): {e}",
+                exc_info=True,
+            )
+            raise
+        except BaseException:
+            # Cancelled (e.g. a quote past its deadline) or an unexpected error
+            transport.breaker.release_trial()
+            raise
+        transport.breaker.record_success()
+        return result
+
+    async def status(self) -> Dict[str, Any]:
+        """Get API status."""
+        return await self._call("GET", "status")
+
+    async def get_currencies(self) -> Dict[str, Any]:
+        """Get list of all available currencies."""
+        return await self._call("GET", "currencies")
+
+    async def get_merchant_coins(self) -> Dict[str, Any]:
+        """Return the merchant-configured coins available for this account."""
+        return await self._call("GET", "merchant/coins")
+
+    async def get_estimate_price(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Get estimated price for conversion."""
+        return await self._call("GET", "estimate", params)
+
+    async def create_payment(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a payment."""
+        return await self._call("POST", "payment", params)
+
+    async def get_payment_status(self, payment_id: str) -> Dict[str, Any]:
+        """Get payment status."""
+        return await self._call("GET", f"payment/{payment_id}")
+
+    async def get_minimum_payment_amount(
+        self, params: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Get minimum payment amount."""
+        return await self._call("GET", "min-amount", params)
+
+    async def get_list_payments(
+        self, params: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Get list of payments."""
+        return await self._call("GET", "payment", params)
+
+    async def create_invoice(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Create an invoice."""
+        return await self._call("POST", "invoice", params)
+
+    async def get_currency_catalog(self, **kwargs) -> CurrencyCatalog:
+        """Return the merchant's ``CurrencyCatalog`` (see ``NowPaymentsAPI``).
+
+        Served from the process-local copy when there is one. Otherwise the
+        catalog comes from the shared Django cache, whose API is synchronous,
+        so the lookup (and, on a miss, the refill) runs in a worker thread.
+        """
+        catalog = _local_catalogs.get(
+            kwargs.get("cache_key_merchant", MERCHANT_COINS_CACHE_KEY)
+        )
+        if catalog is not None:
+            return catalog
+        api = NowPaymentsAPI(self.token)
+        return await sync_to_async(api.get_currency_catalog, thread_sensitive=False)(
+            **kwargs
+        )
+
+    async def get_merchant_coins_enriched(self, **kwargs) -> List[Dict[str, Any]]:
+        """Return enriched merchant coins (see ``NowPaymentsAPI``)."""
+        return list(await self.get_currency_catalog(**kwargs))
+
+
+# Combined deadline (seconds) for the concurrent min-amount + estimate fetch
+# behind the crypto estimate endpoint. Parts that miss it are returned as None.
+QUOTE_DEADLINE = getattr(settings, "NOWPAYMENTS_QUOTE_DEADLINE", 6.0)
+QUOTE_WORKERS = getattr(settings, "NOWPAYMENTS_QUOTE_WORKERS", 16)
+
+_quote_executor = ThreadPoolExecutor(
+    max_workers=QUOTE_WORKERS, thread_name_prefix="nowpayments-quote"
+)
+
+
+def _quote_requests(
+    price_amount: float, price_currency: str, pay_currency: str
+) -> Dict[str, tuple]:
+    """Return ``{field: (api method name, params, response key)}`` for a quote."""
+    return {
+        "min_amount": (
+            "get_minimum_payment_amount",
+            {"currency_from": pay_currency, "currency_to": price_currency},
+            "min_amount",
+        ),
+        "estimated_amount": (
+            "get_estimate_price",
+            {
+                "amount": price_amount,
+                "currency_from": price_currency,
+                "currency_to": pay_currency,
+            },
+            "estimated_amount",
+        ),
+    }
+
 
-        cache.set(cache_key_merchant, enriched, merchant_ttl)
-        return enriched
+def _collect_quote(outcomes: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a quote from per-field results, exceptions or None (timed out).
+
+    Raises the first exception if no field could be fetched at all.
+    """
+    quote: Dict[str, Any] = {"partial": False}
+    errors = []
+    for field, outcome in outcomes.items():
+        if isinstance(outcome, BaseException):
+            logger.warning(f"NowPayments quote: {field} failed: {outcome}")
+            errors.append(outcome)
+            outcome = None
+        elif outcome is None:
+            logger.warning(f"NowPayments quote: {field} missed the deadline")
+        quote[field] = outcome
+        if outcome is None:
+            quote["partial"] = True
+    if all(quote[field] is None for field in outcomes):
+        if errors:
+            raise errors[0]
+        raise TimeoutError("NowPayments quote timed out")
+    return quote
+
+
+def get_crypto_quote(
+    api: NowPaymentsAPI,
+    price_amount: float,
+    price_currency: str,
+    pay_currency: str,
+    deadline: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Fetch the minimum amount and the estimate for a payment concurrently.
+
+    Both provider calls run on a shared thread pool and are bounded by one
+    combined ``deadline`` (``NOWPAYMENTS_QUOTE_DEADLINE`` by default), which
+    is also passed down as their timeout: a running call cannot be cancelled,
+    so it must not outlive the deadline. Returns
+    ``{"min_amount", "estimated_amount", "partial"}``; a part that failed or
+    missed the deadline is None and ``partial`` is set.
+    """
+    if deadline is None:
+        deadline = QUOTE_DEADLINE
+    deadline_at = time.monotonic() + deadline
+
+    def fetch(name, params, key):
+        return getattr(api, name)(params, deadline_at=deadline_at).get(key, 0)
+
+    futures = {
+        field: _quote_executor.submit(fetch, *request)
+        for field, request in _quote_requests(
+            price_amount, price_currency, pay_currency
+        ).items()
+    }
+    wait(futures.values(), timeout=deadline)
+
+    outcomes: Dict[str, Any] = {}
+    for field, future in futures.items():
+        if not future.done():
+            future.cancel()
+            outcomes[field] = None
+        elif future.exception() is not None:
+            outcomes[field] = future.exception()
+        else:
+            outcomes[field] = future.result()
+    return _collect_quote(outcomes)
+
+
+async def aget_crypto_quote(
+    api: AsyncNowPaymentsAPI,
+    price_amount: float,
+    price_currency: str,
+    pay_currency: str,
+    deadline: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Async counterpart of ``get_crypto_quote`` (``asyncio`` tasks instead of threads)."""
+
+    async def fetch(name, params, key):
+        return (await getattr(api, name)(params)).get(key, 0)
+
+    tasks = {
+        field: asyncio.ensure_future(fetch(*request))
+        for field, request in _quote_requests(
+            price_amount, price_currency, pay_currency
+        ).items()
+    }
+    await asyncio.wait(
+        tasks.values(), timeout=QUOTE_DEADLINE if deadline is None else deadline
+    )
+
+    outcomes: Dict[str, Any] = {}
+    late = [task for task in tasks.values() if not task.done()]
+    for task in late:
+        task.cancel()
+    # Let the cancelled calls unwind (and release what they hold, e.g. the
+    # breaker's half-open trial) before returning.
+    await asyncio.gather(*late, return_exceptions=True)
+    for field, task in tasks.items():
+        if task in late:
+            outcomes[field] = None
+        elif task.exception() is not None:
+            outcomes[field] = task.exception()
+        else:
+            outcomes[field] = task.result()
+    return _collect_quote(outcomes)
+
+
+# Quotes for the same (price, fiat, coin) repeat across users, so they are
+# cached briefly. Partial quotes (a part missed the deadline) are not cached.
+QUOTE_CACHE_TTL = getattr(settings, "NOWPAYMENTS_QUOTE_CACHE_TTL", 15)
+
+
+def _quote_cache_key(price_amount, price_currency: str, pay_currency: str) -> str:
+    return (
+        f"nowpayments:quote:{price_amount}:{price_currency.lower()}:"
+        f"{pay_currency.lower()}"
+    )
+
+
+def get_cached_crypto_quote(
+    api: NowPaymentsAPI, price_amount: float, price_currency: str, pay_currency: str
+) -> Dict[str, Any]:
+    """Return ``get_crypto_quote`` cached for ``NOWPAYMENTS_QUOTE_CACHE_TTL`` seconds.
+
+    Concurrent misses for the same quote are coalesced by ``cached_lookup``:
+    one caller fetches while the others wait for its result.
+    """
+    return cached_lookup(
+        _quote_cache_key(price_amount, price_currency, pay_currency),
+        lambda: get_crypto_quote(api, price_amount, price_currency, pay_currency),
+        QUOTE_CACHE_TTL,
+        lock_timeout=QUOTE_DEADLINE + 5,
+        wait=QUOTE_DEADLINE,
+        negative_ttl=0,
+        is_negative=lambda quote: quote["partial"],
+    )
+
+
+_inflight_quotes: "weakref.WeakKeyDictionary[Any, Dict[str, asyncio.Future]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def aget_cached_crypto_quote(
+    api: AsyncNowPaymentsAPI,
+    price_amount: float,
+    price_currency: str,
+    pay_currency: str,
+) -> Dict[str, Any]:
+    """Async counterpart of ``get_cached_crypto_quote``.
+
+    Identical quotes requested concurrently on the same event loop await one
+    shared task; that task goes through ``cached_lookup`` (coalescing across
+    workers) and fetches on the loop via ``aget_crypto_quote``.
+    """
+    key = _quote_cache_key(price_amount, price_currency, pay_currency)
+    inflight = _inflight_quotes.setdefault(asyncio.get_running_loop(), {})
+    future = inflight.get(key)
+    if future is None:
+        fetch = async_to_sync(aget_crypto_quote)
+        future = asyncio.ensure_future(
+            sync_to_async(cached_lookup, thread_sensitive=False)(
+                key,
+                lambda: fetch(api, price_amount, price_currency, pay_currency),
+                QUOTE_CACHE_TTL,
+                lock_timeout=QUOTE_DEADLINE + 5,
+                wait=QUOTE_DEADLINE,
+                negative_ttl=0,
+                is_negative=lambda quote: quote["partial"],
+            )
+        )
+        inflight[key] = future
+        future.add_done_callback(lambda _: inflight.pop(key, None))
+    return await asyncio.shield(future)
+
+
+# NowPaymentsAPI instances by API key, reused across requests.
+_api_clients: Dict[str, NowPaymentsAPI] = {}
 
 
 class NowPaymentsProvider(PaymentProvider):
@@ -399,8 +1034,15 @@ class NowPaymentsProvider(PaymentProvider):
             )
 
     def get_api(self) -> NowPaymentsAPI:
-        """Get or create NowPaymentsAPI instance."""
-        return NowPaymentsAPI(self.api_key)
+        """Get or create the NowPaymentsAPI instance for the configured key."""
+        api = _api_clients.get(self.api_key)
+        if api is None:
+            api = _api_clients.setdefault(self.api_key, NowPaymentsAPI(self.api_key))
+        return api
+
+    def get_async_api(self) -> AsyncNowPaymentsAPI:
+        """Return an AsyncNowPaymentsAPI instance for the configured key."""
+        return AsyncNowPaymentsAPI(self.api_key)
 
     def create_checkout_session(self, plan: Any, user: Any, request: Any) -> str:
         """Create a checkout session (redirects to crypto selection)."""
@@ -447,18 +1089,18 @@ class NowPaymentsProvider(PaymentProvider):
 
                     user = User.objects.get(id=user_id)
                     plan = Plan.objects.get(id=plan_id)
-                    payment_method = PaymentMethod.objects.filter(
-                        provider_id=PaymentMethod.PROVIDER_NOWPAYMENTS
-                    ).first()
+                    payment_method_id = get_payment_method_id(
+                        PaymentMethod.PROVIDER_NOWPAYMENTS
+                    )
 
                     # Check if subscription already exists for this payment
-                    if not Subscription.objects.filter(
-                        external_id=str(payment_id)
+                    if not Subscription.objects.by_external_id(
+                        payment_method_id, str(payment_id)
                     ).exists():
                         Subscription.objects.create(
                             user=user,
                             plan=plan,
-                            payment_method=payment_method,
+                            payment_method_id=payment_method_id,
                             external_id=str(payment_id),
                             status=Subscription.STATUS_ACTIVE,
                         )
@@ -494,3 +1136,110 @@ class PaymentFactory:
             return NowPaymentsProvider()
         else:
             raise ValueError(f"Unknown provider: {provider_id}")
+
+
+def _apply_one_by_one(events: List[WebhookEvent]) -> Dict[int, str]:
+    errors = {}
+    for event in events:
+        try:
+            PaymentFactory.get_provider(event.provider).apply_event(event.payload)
+        except Exception as e:
+            logger.error(
+                f"Error applying {event.provider} event {event.event_id}: {e}",
+                exc_info=True,
+            )
+            errors[event.pk] = str(e)
+    return errors
+
+
+def _apply_in_bulk(events: List[WebhookEvent]) -> Dict[int, str]:
+    """Apply ``events`` per provider with ``apply_events``.
+
+    A page whose bulk write fails is applied again one event at a time, so a
+    single bad event only fails itself.
+    """
+    errors = {}
+    by_provider: Dict[str, List[WebhookEvent]] = {}
+    for event in events:
+        by_provider.setdefault(event.provider, []).append(event)
+    for provider_id, page in by_provider.items():
+        provider = PaymentFactory.get_provider(provider_id)
+        if not hasattr(provider, "apply_events"):
+            errors.update(_apply_one_by_one(page))
+            continue
+        try:
+            with transaction.atomic():
+                failed = provider.apply_events([event.payload for event in page])
+        except Exception as e:
+            logger.warning(
+                f"Bulk apply of {len(page)} {provider_id} events failed ({e}); "
+                "applying them one by one"
+            )
+            errors.update(_apply_one_by_one(page))
+            continue
+        for event in page:
+            if event.event_id in failed:
+                errors[event.pk] = failed[event.event_id]
+    return errors
+
+
+WEBHOOK_RETRY_BACKOFF = getattr(settings, "WEBHOOK_RETRY_BACKOFF", 30)
+WEBHOOK_RETRY_BACKOFF_MAX = getattr(settings, "WEBHOOK_RETRY_BACKOFF_MAX", 3600)
+
+
+def webhook_retry_delay(attempts: int) -> timedelta:
+    """Return how long an event that failed ``attempts`` times waits to retry."""
+    seconds = WEBHOOK_RETRY_BACKOFF * 2 ** (attempts - 1)
+    return timedelta(seconds=min(seconds, WEBHOOK_RETRY_BACKOFF_MAX))
+
+
+def drain_webhook_inbox(
+    batch_size: int = 100, max_attempts: int = 5, bulk: bool = False
+) -> Dict[str, int]:
+    """Apply one batch of pending inbox events; return counts by outcome.
+
+    The batch is claimed with ``select_for_update(skip_locked=True)``, so
+    several workers can drain the inbox in parallel without picking the same
+    events. Events are applied one by one in their own savepoints, or with
+    ``bulk`` per provider page through ``apply_events``. A failing event is
+    retried by later batches, after an exponential backoff (see
+    ``webhook_retry_delay``), until it has failed ``max_attempts`` times.
+    """
+    counts = {"processed": 0, "retried": 0, "failed": 0}
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            WebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(status=WebhookEvent.STATUS_PENDING)
+            .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+            .order_by("received_at", "id")[:batch_size]
+        )
+        apply = _apply_in_bulk if bulk else _apply_one_by_one
+        errors = apply(events)
+        # Applied events are marked with one UPDATE; only failures, which are
+        # rare, are saved individually.
+        WebhookEvent.objects.filter(
+            pk__in=[event.pk for event in events if event.pk not in errors]
+        ).update(
+            status=WebhookEvent.STATUS_PROCESSED,
+            attempts=F("attempts") + 1,
+            last_error="",
+            next_attempt_at=None,
+            processed_at=now,
+        )
+        counts["processed"] = len(events) - len(errors)
+        for event in events:
+            if event.pk not in errors:
+                continue
+            event.attempts += 1
+            event.last_error = errors[event.pk]
+            if event.attempts >= max_attempts:
+                event.status = WebhookEvent.STATUS_FAILED
+                counts["failed"] += 1
+            else:
+                event.next_attempt_at = now + webhook_retry_delay(event.attempts)
+                counts["retried"] += 1
+            event.save(
+                update_fields=["status", "attempts", "last_error", "next_attempt_at"]
+            )
+    return counts
@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .entitlements import _entitlement_key, invalidate_entitlements
+from .models import PaymentMethod, Subscription
+from .services import invalidate_payment_method_ids
+
+User = get_user_model()
+
+
+def _on_payment_method_changed(sender, instance, **kwargs):
+    # provider_id may have changed, so drop the ids of every provider
+    invalidate_payment_method_ids()
+
+
+def _on_subscription_changed(sender, instance, **kwargs):
+    invalidate_entitlements([instance.user_id])
+
+
+def _on_user_saved(sender, instance, created, **kwargs):
+    # New users may reuse the pk of a deleted user; never serve its entitlement
+    if created:
+        key = _entitlement_key(instance.pk)
+        transaction.on_commit(lambda: cache.delete(key))
+
+
+def connect_signals():
+    post_save.connect(
+        _on_payment_method_changed,
+        sender=PaymentMethod,
+        dispatch_uid="subscriptions_payment_method_saved",
+    )
+    post_delete.connect(
+        _on_payment_method_changed,
+        sender=PaymentMethod,
+        dispatch_uid="subscriptions_payment_method_deleted",
+    )
+    post_save.connect(
+        _on_subscription_changed,
+        sender=Subscription,
+        dispatch_uid="subscriptions_subscription_saved",
+    )
+    post_delete.connect(
+        _on_subscription_changed,
+        sender=Subscription,
+        dispatch_uid="subscriptions_subscription_deleted",
+    )
+    post_save.connect(
+        _on_user_saved, sender=User, dispatch_uid="subscriptions_user_saved"
+    )
@@ -0,0 +1,388 @@
+"""Local stand-in for the NowPayments and Stripe HTTP APIs.
+
+Used by the ``run_payment_stubs`` command to load-test the checkout flows
+offline: point ``NOWPAYMENTS_API_BASE`` and ``STRIPE_API_BASE`` at the server
+and every provider call made by ``apps.subscriptions.services`` is answered
+locally, after a configurable latency and with optional injected errors.
+Responses only carry the fields this app reads.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Currencies returned by the stubbed merchant/coins endpoint, with the price
+# of one unit in USD used for estimates and minimum amounts.
+STUB_RATES = {
+    "btc": Decimal("60000"),
+    "eth": Decimal("3000"),
+    "ltc": Decimal("80"),
+    "trx": Decimal("0.12"),
+    "usdttrc20": Decimal("1"),
+    "usdterc20": Decimal("1"),
+}
+
+# Extra full-currencies entries, so the index built from the stub has a
+# realistic size.
+STUB_PADDING_CURRENCIES = 400
+
+NETWORKS = {"usdttrc20": "trx", "usdterc20": "eth"}
+
+
+@dataclass
+class StubConfig:
+    """Behaviour of the stub server.
+
+    Every request sleeps ``latency`` plus up to ``jitter`` seconds, then
+    fails with ``error_status`` with probability ``error_rate``.
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    stripe_webhook_url: Optional[str] = None
+    stripe_webhook_secret: str = ""
+    ipn_secret: str = ""
+    callback_delay: float = 0.5
+    seed: Optional[int] = None
+
+
+def sign_stripe_payload(
+    payload: str, secret: str, timestamp: Optional[int] = None
+) -> str:
+    """Return a ``Stripe-Signature`` header value for ``payload``."""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    signed = f"{timestamp}.{payload}".encode()
+    signature = hmac.new(secret.encode(), signed, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def sign_ipn_payload(data: Dict[str, Any], secret: str) -> str:
+    """Return an ``x-nowpayments-sig`` header value for an IPN body."""
+    body = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hmac.new(secret.encode(), body.encode(), hashlib.sha512).hexdigest()
+
+
+def stripe_event(event_type: str, obj: Dict[str, Any]) -> Dict[str, Any]:
+    """Wrap ``obj`` in a Stripe event envelope."""
+    return {
+        "id": f"evt_{uuid.uuid4().hex[:24]}",
+        "object": "event",
+        "api_version": "2020-08-27",
+        "created": int(time.time()),
+        "type": event_type,
+        "data": {"object": obj},
+    }
+
+
+def full_currencies(padding: int = STUB_PADDING_CURRENCIES) -> Dict[str, Any]:
+    """Return a full-currencies response for the stub merchant coins."""
+    items = []
+    for position, code in enumerate(STUB_RATES):
+        items.append(
+            {
+                "id": position,
+                "code": code.upper(),
+                "name": code.upper(),
+                "network": NETWORKS.get(code, code),
+                "logo_url": f"/images/coins/{code}.svg",
+                "cg_id": code,
+                "ticker": code,
+            }
+        )
+    for i in range(padding):
+        code = f"stub{i}"
+        items.append(
+            {
+                "id": len(STUB_RATES) + i,
+                "code": code.upper(),
+                "name": f"Stub Coin {i}",
+                "network": "eth",
+                "logo_url": f"/images/coins/{code}.svg",
+                "cg_id": f"stub-coin-{i}",
+                "ticker": code,
+            }
+        )
+    return {"currencies": items}
+
+
+def _usd_rate(code: Any) -> Optional[Decimal]:
+    code = str(code or "").lower()
+    if code == "usd":
+        return Decimal("1")
+    return STUB_RATES.get(code)
+
+
+class PaymentStubHandler(BaseHTTPRequestHandler):
+    """Serves the stubbed endpoints of ``server.config`` (a ``StubConfig``)."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug("stub %s - %s", self.address_string(), format % args)
+
+    # Dispatch
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str) -> None:
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/")
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        body = self._read_body()
+        config = self.server.config
+
+        delay = config.latency
+        if config.jitter:
+            delay += self.server.random.uniform(0, config.jitter)
+        if delay:
+            time.sleep(delay)
+
+        route = self._route(method, path)
+        if route is None:
+            self._send(404, {"message": f"Unknown endpoint {method} {url.path}"})
+            return
+        if config.error_rate and self.server.random.random() < config.error_rate:
+            self._send(config.error_status, {"message": "Injected stub error"})
+            return
+        status, payload = route(path, query, body)
+        self._send(status, payload)
+
+    def _route(self, method: str, path: str):
+        if path.startswith("/v1/checkout/sessions"):
+            return self.stripe_checkout_session if method == "POST" else None
+        if path == "/stripe/events" and method == "POST":
+            return self.stripe_signed_event
+        if not path.startswith("/v1/"):
+            return None
+        if self.headers.get("x-api-key") is None:
+            return self.unauthorized
+        endpoint = path[len("/v1/") :]
+        routes = {
+            ("GET", "status"): self.status,
+            ("GET", "merchant/coins"): self.merchant_coins,
+            ("GET", "full-currencies"): self.full_currencies,
+            ("GET", "estimate"): self.estimate,
+            ("GET", "min-amount"): self.min_amount,
+            ("GET", "payment"): self.list_payments,
+            ("POST", "payment"): self.create_payment,
+            ("POST", "invoice"): self.create_invoice,
+        }
+        route = routes.get((method, endpoint))
+        if route is None and method == "GET" and endpoint.startswith("payment/"):
+            route = self.payment_status
+        return route
+
+    def _read_body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        raw = self.rfile.read(length).decode()
+        if "json" in (self.headers.get("Content-Type") or ""):
+            try:
+                return json.loads(raw)
+            except ValueError:
+                return {}
+        return {key: values[-1] for key, values in parse_qs(raw).items()}
+
+    def _send(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # NowPayments
+
+    def unauthorized(self, path, query, body) -> Tuple[int, Dict[str, Any]]:
+        return 403, {"message": "Invalid api key"}
+
+    def status(self, path, query, body):
+        return 200, {"message": "OK"}
+
+    def merchant_coins(self, path, query, body):
+        return 200, {"selectedCurrencies": [code.upper() for code in STUB_RATES]}
+
+    def full_currencies(self, path, query, body):
+        return 200, self.server.full_currencies
+
+    def estimate(self, path, query, body):
+        rate_from = _usd_rate(query.get("currency_from"))
+        rate_to = _usd_rate(query.get("currency_to"))
+        if rate_from is None or rate_to is None:
+            return 400, {"message": "Currency not supported"}
+        amount = Decimal(query.get("amount") or 0)
+        return 200, {
+            "currency_from": query["currency_from"],
+            "amount_from": float(amount),
+            "currency_to": query["currency_to"],
+            "estimated_amount": float(round(amount * rate_from / rate_to, 8)),
+        }
+
+    def min_amount(self, path, query, body):
+        rate = _usd_rate(query.get("currency_from"))
+        if rate is None:
+            return 400, {"message": "Currency not supported"}
+        return 200, {
+            "currency_from": query["currency_from"],
+            "currency_to": query.get("currency_to"),
+            "min_amount": float(round(Decimal("2") / rate, 8)),
+        }
+
+    def create_payment(self, path, query, body):
+        payment = self.server.add_payment(body)
+        return 201, payment
+
+    def payment_status(self, path, query, body):
+        payment = self.server.payments.get(path.rsplit("/", 1)[-1])
+        if payment is None:
+            return 404, {"message": "Payment not found"}
+        return 200, payment
+
+    def list_payments(self, path, query, body):
+        payments = list(self.server.payments.values())
+        return 200, {"data": payments, "total": len(payments)}
+
+    def create_invoice(self, path, query, body):
+        invoice_id = str(self.server.next_id())
+        invoice = {
+            "id": invoice_id,
+            "order_id": body.get("order_id"),
+            "price_amount": body.get("price_amount"),
+            "price_currency": body.get("price_currency"),
+            "pay_currency": body.get("pay_currency"),
+            "invoice_url": f"{self.server.base_url}/invoice/{invoice_id}",
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime()),
+        }
+        if body.get("ipn_callback_url"):
+            payment = self.server.add_payment(body, status="finished")
+            self.server.deliver_ipn(body["ipn_callback_url"], payment)
+        return 200, invoice
+
+    # Stripe
+
+    def stripe_checkout_session(self, path, query, body):
+        session_id = f"cs_test_{uuid.uuid4().hex[:24]}"
+        metadata = {
+            key[len("metadata[") : -1]: value
+            for key, value in body.items()
+            if key.startswith("metadata[")
+        }
+        session = {
+            "id": session_id,
+            "object": "checkout.session",
+            "mode": body.get("mode", "subscription"),
+            "customer": f"cus_{uuid.uuid4().hex[:14]}",
+            "customer_email": body.get("customer_email"),
+            "subscription": f"sub_{uuid.uuid4().hex[:14]}",
+            "metadata": metadata,
+            "url": f"{self.server.base_url}/checkout/{session_id}",
+        }
+        if self.server.config.stripe_webhook_url:
+            self.server.deliver_stripe_event(
+                stripe_event("checkout.session.completed", session)
+            )
+        return 200, session
+
+    def stripe_signed_event(self, path, query, body):
+        """Return a signed event, for load generators posting to the webhook."""
+        event = stripe_event(
+            body.get("type", "checkout.session.completed"), body.get("object") or {}
+        )
+        payload = json.dumps(event)
+        signature = sign_stripe_payload(
+            payload, self.server.config.stripe_webhook_secret
+        )
+        return 200, {"payload": payload, "signature": signature}
+
+
+class PaymentStubServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the stub's state (payments, RNG)."""
+
+    daemon_threads = True
+
+    def __init__(self, address, config: StubConfig):
+        super().__init__(address, PaymentStubHandler)
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.payments: Dict[str, Dict[str, Any]] = {}
+        self.full_currencies = full_currencies()
+        self._lock = threading.Lock()
+        self._ids = 5000000000
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def next_id(self) -> int:
+        with self._lock:
+            self._ids += 1
+            return self._ids
+
+    def add_payment(
+        self, params: Dict[str, Any], status: str = "waiting"
+    ) -> Dict[str, Any]:
+        payment_id = str(self.next_id())
+        payment = {
+            "payment_id": payment_id,
+            "payment_status": status,
+            "pay_address": "T" + uuid.uuid4().hex[:33],
+            "price_amount": params.get("price_amount"),
+            "price_currency": params.get("price_currency"),
+            "pay_currency": params.get("pay_currency"),
+            "order_id": params.get("order_id"),
+        }
+        with self._lock:
+            self.payments[payment_id] = payment
+        return payment
+
+    def _deliver_later(self, url: str, body: str, headers: Dict[str, str]) -> None:
+        def deliver():
+            time.sleep(self.config.callback_delay)
+            try:
+                requests.post(url, data=body, headers=headers, timeout=10)
+            except requests.exceptions.RequestException as e:
+                logger.warning("Stub callback to %s failed: %s", url, e)
+
+        threading.Thread(target=deliver, daemon=True).start()
+
+    def deliver_ipn(self, url: str, payment: Dict[str, Any]) -> None:
+        """POST a signed NowPayments IPN for ``payment`` to ``url``."""
+        body = json.dumps(payment)
+        headers = {
+            "Content-Type": "application/json",
+            "x-nowpayments-sig": sign_ipn_payload(payment, self.config.ipn_secret),
+        }
+        self._deliver_later(url, body, headers)
+
+    def deliver_stripe_event(self, event: Dict[str, Any]) -> None:
+        """POST a signed Stripe ``event`` to the configured webhook URL."""
+        body = json.dumps(event)
+        headers = {
+            "Content-Type": "application/json",
+            "Stripe-Signature": sign_stripe_payload(
+                body, self.config.stripe_webhook_secret
+            ),
+        }
+        self._deliver_later(self.config.stripe_webhook_url, body, headers)
@@ -0,0 +1,142 @@
+import asyncio
+import importlib
+import importlib.util
+import json
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from apps.subscriptions import transport, urls, views
+from apps.subscriptions.currencies import CurrencyCatalog
+from apps.subscriptions.models import Plan
+from apps.subscriptions.services import AsyncNowPaymentsAPI
+
+User = get_user_model()
+
+CATALOG = CurrencyCatalog.build(["USDTTRC20"])
+
+
+@patch("apps.subscriptions.services.env", return_value="key")
+class AsyncCryptoEstimateViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="buyer", password="password")
+        self.plan = Plan.objects.create(
+            name="Monthly", slug="monthly", price=10, duration_months=1, currency="USD"
+        )
+        self.factory = RequestFactory()
+
+    def _request(self, **params):
+        request = self.factory.get(
+            "/subscriptions/crypto/estimate/", {"plan_id": self.plan.id, **params}
+        )
+        request.user = self.user
+        request.auser = AsyncMock(return_value=self.user)
+        return request
+
+    @patch.object(AsyncNowPaymentsAPI, "get_estimate_price", new_callable=AsyncMock)
+    @patch.object(
+        AsyncNowPaymentsAPI, "get_minimum_payment_amount", new_callable=AsyncMock
+    )
+    @patch.object(AsyncNowPaymentsAPI, "get_currency_catalog", new_callable=AsyncMock)
+    async def test_returns_estimate(self, mock_coins, mock_min, mock_estimate, _env):
+        mock_coins.return_value = CATALOG
+        mock_min.return_value = {"min_amount": 1.5}
+        mock_estimate.return_value = {"estimated_amount": 10.02}
+
+        response = await views.get_crypto_estimate_async(
+            self._request(currency="usdt-trc20")
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            json.loads(response.content),
+            {
+                "min_amount": 1.5,
+                "estimated_amount": 10.02,
+                "currency": "USDTTRC20",
+                "partial": False,
+            },
+        )
+        mock_estimate.assert_awaited_once_with(
+            {"amount": 10.0, "currency_from": "usd", "currency_to": "USDTTRC20"}
+        )
+
+    @patch.object(AsyncNowPaymentsAPI, "get_currency_catalog", new_callable=AsyncMock)
+    async def test_unknown_currency(self, mock_coins, _env):
+        mock_coins.return_value = CATALOG
+        response = await views.get_crypto_estimate_async(self._request(currency="xmr"))
+        self.assertEqual(response.status_code, 400)
+
+
+@unittest.skipUnless(importlib.util.find_spec("httpx"), "httpx is not installed")
+class AsyncNowPaymentsAPITests(SimpleTestCase):
+    def setUp(self):
+        transport.breaker.reset()
+        self.addCleanup(transport.breaker.reset)
+
+    def _response(self, status_code, payload=None):
+        import httpx
+
+        request = httpx.Request("GET", "https://api.nowpayments.io/v1/status")
+        return httpx.Response(status_code, json=payload or {}, request=request)
+
+    @patch("apps.subscriptions.services.asyncio.sleep", new_callable=AsyncMock)
+    async def test_get_is_retried_on_server_errors(self, _sleep):
+        client = MagicMock()
+        client.get = AsyncMock(
+            side_effect=[self._response(503), self._response(200, {"message": "OK"})]
+        )
+        api = AsyncNowPaymentsAPI("token", client=client)
+
+        self.assertEqual(await api.status(), {"message": "OK"})
+        self.assertEqual(client.get.await_count, 2)
+
+    async def test_cancelled_trial_releases_the_circuit(self):
+        breaker = transport.breaker
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        breaker._opened_at -= breaker.reset_timeout
+
+        async def slow_get(*args, **kwargs):
+            await asyncio.sleep(10)
+
+        client = MagicMock()
+        client.get = AsyncMock(side_effect=slow_get)
+        api = AsyncNowPaymentsAPI("token", client=client)
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(api.status(), timeout=0.05)
+
+        breaker.before_call()  # the next call becomes the trial
+
+    async def test_post_is_not_retried(self):
+        import httpx
+
+        client = MagicMock()
+        client.post = AsyncMock(return_value=self._response(503))
+        api = AsyncNowPaymentsAPI("token", client=client)
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            await api.create_invoice({"price_amount": 10})
+        self.assertEqual(client.post.await_count, 1)
+
+
+class AsyncViewsUrlConfTests(SimpleTestCase):
+    def setUp(self):
+        self.addCleanup(importlib.reload, urls)
+
+    @override_settings(NOWPAYMENTS_ASYNC_VIEWS=True)
+    def test_missing_httpx_fails_at_startup(self):
+        with patch.object(
+            transport, "import_httpx", side_effect=ImproperlyConfigured("httpx")
+        ):
+            with self.assertRaises(ImproperlyConfigured):
+                importlib.reload(urls)
+
+    @override_settings(NOWPAYMENTS_ASYNC_VIEWS=True)
+    @unittest.skipUnless(importlib.util.find_spec("httpx"), "httpx is not installed")
+    def test_async_views_are_routed(self):
+        importlib.reload(urls)
+        self.assertIs(urls.get_crypto_estimate, views.get_crypto_estimate_async)
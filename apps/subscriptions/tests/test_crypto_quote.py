@@ -0,0 +1,144 @@
+import asyncio
+import importlib.util
+import threading
+import time
+import unittest
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
+
+import requests
+from django.test import SimpleTestCase
+
+from apps.subscriptions import transport
+from apps.subscriptions.services import (
+    AsyncNowPaymentsAPI,
+    NowPaymentsAPI,
+    aget_crypto_quote,
+    get_crypto_quote,
+)
+
+
+class CryptoQuoteTests(SimpleTestCase):
+    def test_fetches_both_parts_concurrently(self):
+        barrier = threading.Barrier(2, timeout=2)
+
+        def min_amount(params, deadline_at):
+            barrier.wait()
+            return {"min_amount": 1.5}
+
+        def estimate(params, deadline_at):
+            barrier.wait()
+            return {"estimated_amount": 10.02}
+
+        api = MagicMock()
+        api.get_minimum_payment_amount.side_effect = min_amount
+        api.get_estimate_price.side_effect = estimate
+
+        quote = get_crypto_quote(api, 10.0, "usd", "btc", deadline=5)
+
+        self.assertEqual(
+            quote, {"min_amount": 1.5, "estimated_amount": 10.02, "partial": False}
+        )
+        api.get_minimum_payment_amount.assert_called_once_with(
+            {"currency_from": "btc", "currency_to": "usd"}, deadline_at=ANY
+        )
+        api.get_estimate_price.assert_called_once_with(
+            {"amount": 10.0, "currency_from": "usd", "currency_to": "btc"},
+            deadline_at=ANY,
+        )
+
+    @patch("requests.Session.get")
+    def test_calls_are_bounded_by_the_deadline(self, mock_get):
+        mock_get.return_value = MagicMock(status_code=200)
+        mock_get.return_value.json.return_value = {"min_amount": 1.5}
+        api = NowPaymentsAPI("test_token")
+
+        get_crypto_quote(api, 10.0, "usd", "btc", deadline=0.5)
+
+        self.assertEqual(mock_get.call_count, 2)
+        for call in mock_get.call_args_list:
+            self.assertLessEqual(max(call.kwargs["timeout"]), 0.5)
+        session = transport.get_session(max_retries=0)
+        self.assertIsNot(session, api.session)
+        adapter = session.get_adapter("https://api.nowpayments.io/v1/")
+        self.assertEqual(adapter.max_retries.total, 0)
+
+    def test_returns_partial_data_after_deadline(self):
+        api = MagicMock()
+        api.get_minimum_payment_amount.return_value = {"min_amount": 1.5}
+        api.get_estimate_price.side_effect = lambda params, deadline_at: (
+            time.sleep(0.5) or {}
+        )
+
+        quote = get_crypto_quote(api, 10.0, "usd", "btc", deadline=0.1)
+
+        self.assertEqual(
+            quote, {"min_amount": 1.5, "estimated_amount": None, "partial": True}
+        )
+
+    def test_failed_part_is_partial(self):
+        api = MagicMock()
+        api.get_minimum_payment_amount.side_effect = requests.exceptions.Timeout()
+        api.get_estimate_price.return_value = {"estimated_amount": 10.02}
+
+        quote = get_crypto_quote(api, 10.0, "usd", "btc", deadline=5)
+
+        self.assertEqual(
+            quote, {"min_amount": None, "estimated_amount": 10.02, "partial": True}
+        )
+
+    def test_raises_when_nothing_was_fetched(self):
+        api = MagicMock()
+        api.get_minimum_payment_amount.side_effect = requests.exceptions.HTTPError()
+        api.get_estimate_price.side_effect = requests.exceptions.HTTPError()
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            get_crypto_quote(api, 10.0, "usd", "btc", deadline=5)
+
+
+class AsyncCryptoQuoteTests(SimpleTestCase):
+    async def test_returns_partial_data_after_deadline(self):
+        async def slow_estimate(params):
+            await asyncio.sleep(1)
+            return {"estimated_amount": 10.02}
+
+        api = MagicMock()
+        api.get_minimum_payment_amount = AsyncMock(return_value={"min_amount": 1.5})
+        api.get_estimate_price = AsyncMock(side_effect=slow_estimate)
+
+        quote = await aget_crypto_quote(api, 10.0, "usd", "btc", deadline=0.1)
+
+        self.assertEqual(
+            quote, {"min_amount": 1.5, "estimated_amount": None, "partial": True}
+        )
+
+    async def test_raises_timeout_when_both_parts_miss_deadline(self):
+        async def slow(params):
+            await asyncio.sleep(1)
+            return {}
+
+        api = MagicMock()
+        api.get_minimum_payment_amount = AsyncMock(side_effect=slow)
+        api.get_estimate_price = AsyncMock(side_effect=slow)
+
+        with self.assertRaises(TimeoutError):
+            await aget_crypto_quote(api, 10.0, "usd", "btc", deadline=0.05)
+
+    @unittest.skipUnless(importlib.util.find_spec("httpx"), "httpx is not installed")
+    async def test_deadline_cancelled_trial_leaves_breaker_usable(self):
+        breaker = transport.breaker
+        breaker.reset()
+        self.addCleanup(breaker.reset)
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        breaker._opened_at -= breaker.reset_timeout
+
+        async def slow_get(*args, **kwargs):
+            await asyncio.sleep(10)
+
+        client = MagicMock()
+        client.get = AsyncMock(side_effect=slow_get)
+        api = AsyncNowPaymentsAPI("token", client=client)
+        with self.assertRaises((TimeoutError, transport.CircuitOpenError)):
+            await aget_crypto_quote(api, 10.0, "usd", "btc", deadline=0.2)
+
+        breaker.before_call()
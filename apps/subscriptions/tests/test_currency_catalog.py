@@ -0,0 +1,67 @@
+from django.test import SimpleTestCase
+
+from apps.subscriptions.currencies import (
+    CurrencyCatalog,
+    CurrencyIndex,
+    merchant_codes,
+    normalize_code,
+)
+
+INDEX = CurrencyIndex.from_currencies(
+    [
+        {"code": "usdttrc20", "name": "Tether USD (Tron)", "network": "trx"},
+        {"code": "btc", "name": "Bitcoin", "network": "btc"},
+    ]
+)
+
+
+class CurrencyCatalogTests(SimpleTestCase):
+    def test_merchant_codes_accepts_both_response_shapes(self):
+        self.assertEqual(
+            merchant_codes({"selectedCurrencies": ["btc", "BTC", "USDT-TRC20"]}),
+            ["btc", "USDT-TRC20"],
+        )
+        self.assertEqual(
+            merchant_codes([{"pay_currency": "eth", "code": "x"}, {"symbol": "ltc"}]),
+            ["eth", "ltc"],
+        )
+        self.assertEqual(merchant_codes(None), [])
+
+    def test_normalize_code(self):
+        self.assertEqual(normalize_code(" USDT_trc-20 "), "usdttrc20")
+        self.assertEqual(normalize_code("Éther"), "éther")
+
+    def test_build_enriches_from_index(self):
+        catalog = CurrencyCatalog.build(["USDTTRC20", "doge"], INDEX)
+
+        self.assertEqual(len(catalog), 2)
+        self.assertEqual(
+            list(catalog),
+            [
+                {
+                    "code": "USDTTRC20",
+                    "name": "Tether USD (Tron)",
+                    "network": "trx",
+                    "logo_url": None,
+                },
+                {"code": "doge", "name": "doge", "network": None, "logo_url": None},
+            ],
+        )
+
+    def test_resolve_by_code_or_name(self):
+        catalog = CurrencyCatalog.build(["USDTTRC20", "btc"], INDEX)
+
+        self.assertEqual(catalog.resolve("usdt-trc20"), "USDTTRC20")
+        self.assertEqual(catalog.resolve("tether usd (tron)"), "USDTTRC20")
+        self.assertEqual(catalog.resolve("BITCOIN"), "btc")
+        self.assertIsNone(catalog.resolve("xmr"))
+        self.assertIsNone(catalog.resolve(""))
+        self.assertEqual(catalog.default, "USDTTRC20")
+
+    def test_first_coin_wins_shared_alias(self):
+        index = CurrencyIndex.from_currencies([{"code": "ethbase", "name": "ETH"}])
+        catalog = CurrencyCatalog.build(["eth", "ethbase"], index)
+
+        self.assertEqual(catalog.resolve("ETH"), "eth")
+        self.assertEqual(catalog.resolve("eth-base"), "ethbase")
+        self.assertIsNone(CurrencyCatalog().default)
@@ -0,0 +1,50 @@
+import pickle
+
+from django.test import SimpleTestCase
+
+from apps.subscriptions.currencies import CurrencyIndex
+
+CURRENCIES = [
+    {
+        "code": "USDTTRC20",
+        "ticker": "usdt",
+        "name": "Tether USD (Tron)",
+        "cg_id": "tether",
+        "network": "trx",
+        "logo_url": "/images/coins/usdttrc20.svg",
+        "wallet_regex": "^T[1-9A-HJ-NP-Za-km-z]{33}$",
+    },
+    {"code": "btc", "name": "Bitcoin", "network": "btc", "logo_url": None},
+    "not-a-dict",
+    {"network": "eth"},
+]
+
+
+class CurrencyIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = CurrencyIndex.from_currencies(CURRENCIES)
+
+    def test_records_are_stored_once_with_ui_fields_only(self):
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(
+            self.index.records[0],
+            (
+                "Tether USD (Tron)",
+                "trx",
+                "https://nowpayments.io/images/coins/usdttrc20.svg",
+            ),
+        )
+        self.assertEqual(set(self.index.aliases.values()), {0, 1})
+
+    def test_lookup_by_any_alias(self):
+        record = self.index.records[0]
+        for alias in ("usdt-trc20", "USDT", "tether usd (tron)", "Tether"):
+            self.assertEqual(self.index.get(alias), record)
+        self.assertEqual(self.index.get("BTC"), ("Bitcoin", "btc", None))
+        self.assertIsNone(self.index.get("xmr"))
+
+    def test_pickle_round_trip(self):
+        restored = pickle.loads(pickle.dumps(self.index))
+        self.assertEqual(restored.records, self.index.records)
+        self.assertEqual(restored.aliases, self.index.aliases)
+        self.assertFalse(CurrencyIndex.from_currencies([]))
@@ -0,0 +1,102 @@
+import json
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase
+
+from apps.subscriptions import views
+from apps.subscriptions.currencies import CurrencyCatalog, CurrencyIndex
+from apps.subscriptions.models import Plan
+from apps.subscriptions.services import NowPaymentsAPI, invalidate_currency_catalog
+
+User = get_user_model()
+
+INDEX = CurrencyIndex.from_currencies(
+    [{"code": "usdttrc20", "name": "Tether USD (Tron)", "network": "trx"}]
+)
+
+
+def fake_call(method, endpoint, data=None):
+    if endpoint == "merchant/coins":
+        return {"selectedCurrencies": ["USDTTRC20", "BTC"]}
+    if endpoint == "full-currencies":
+        return {"currencies": [{"code": "btc", "name": "Bitcoin"}]}
+    return {}
+
+
+class CurrencyResolverTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_currency_catalog()
+        self.addCleanup(invalidate_currency_catalog)
+        self.addCleanup(cache.clear)
+
+    def test_choose(self):
+        catalog = CurrencyCatalog.build(["USDTTRC20", "BTC"], INDEX)
+        self.assertEqual(catalog.choose("Tether USD (Tron)"), "USDTTRC20")
+        self.assertEqual(catalog.choose(None), "USDTTRC20")
+        self.assertEqual(catalog.choose(""), "USDTTRC20")
+        self.assertIsNone(catalog.choose("xmr"))
+        self.assertEqual(catalog.codes, ["USDTTRC20", "BTC"])
+
+    @patch.object(NowPaymentsAPI, "_call", side_effect=fake_call)
+    def test_catalog_is_kept_in_process(self, mock_call):
+        api = NowPaymentsAPI("test_key")
+        catalog = api.get_currency_catalog()
+
+        with patch("apps.subscriptions.services.cached_lookup") as mock_lookup:
+            self.assertIs(api.get_currency_catalog(), catalog)
+        mock_lookup.assert_not_called()
+
+        invalidate_currency_catalog()
+        self.assertIsNot(api.get_currency_catalog(), catalog)
+
+    def test_merchant_currencies_come_from_a_catalog(self):
+        class FakeAPI:
+            def get_merchant_coins(self):
+                return ["usdt-trc20", "USDTTRC20", "btc"]
+
+        self.assertEqual(
+            views._get_merchant_currencies(FakeAPI()), ["usdt-trc20", "btc"]
+        )
+        self.assertEqual(
+            views._get_merchant_catalog(FakeAPI()).resolve("USDTTRC20"), "usdt-trc20"
+        )
+
+
+@patch("apps.subscriptions.services.env", return_value="key")
+class CryptoEstimateViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="buyer", password="password")
+        self.plan = Plan.objects.create(
+            name="Monthly", slug="monthly", price=10, duration_months=1, currency="USD"
+        )
+
+    def _get(self, **params):
+        request = RequestFactory().get(
+            "/subscriptions/crypto/estimate/", {"plan_id": self.plan.id, **params}
+        )
+        request.user = self.user
+        return views.get_crypto_estimate(request)
+
+    @patch("apps.subscriptions.views.get_cached_crypto_quote")
+    @patch.object(NowPaymentsAPI, "get_currency_catalog")
+    def test_resolves_currency_by_name(self, mock_catalog, mock_quote, _env):
+        mock_catalog.return_value = CurrencyCatalog.build(["USDTTRC20", "BTC"], INDEX)
+        mock_quote.return_value = {
+            "min_amount": 1.5,
+            "estimated_amount": 10.02,
+            "partial": False,
+        }
+
+        response = self._get(currency="tether usd (tron)")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["currency"], "USDTTRC20")
+        self.assertEqual(mock_quote.call_args.args[1:], (10.0, "usd", "USDTTRC20"))
+
+    @patch.object(NowPaymentsAPI, "get_currency_catalog")
+    def test_unknown_currency(self, mock_catalog, _env):
+        mock_catalog.return_value = CurrencyCatalog.build(["BTC"])
+        self.assertEqual(self._get(currency="xmr").status_code, 400)
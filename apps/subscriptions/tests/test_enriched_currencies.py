@@ -5,7 +5,7 @@ from unittest.mock import patch
 from django.core.cache import cache
 from django.test import TestCase
 
-from apps.subscriptions.services import NowPaymentsAPI
+from apps.subscriptions.services import NowPaymentsAPI, invalidate_currency_catalog
 
 
 class EnrichedCurrenciesTests(TestCase):
@@ -14,11 +14,13 @@ class EnrichedCurrenciesTests(TestCase):
     def setUp(self):
         """Clear cache before each test."""
         cache.clear()
+        invalidate_currency_catalog()
         self.api = NowPaymentsAPI("test_key")
 
     def tearDown(self):
         """Clear cache after each test."""
         cache.clear()
+        invalidate_currency_catalog()
 
     @patch.object(NowPaymentsAPI, "_call")
     def test_enriched_currencies_basic(self, mock_call):
@@ -0,0 +1,130 @@
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from apps.core.middleware import get_session_role
+from apps.core.policy import role_policy
+from apps.core.utils import (
+    _determine_effective_role,
+    _role_cache,
+    get_bulk_user_limits,
+)
+from apps.subscriptions.entitlements import get_entitlements, has_active_subscription
+from apps.subscriptions.models import PaymentMethod, Subscription
+from apps.subscriptions.services import StripeProvider
+
+User = get_user_model()
+
+
+class EntitlementTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        _role_cache.clear()
+        self.user = User.objects.create_user(username="buyer", password="password")
+        self.other = User.objects.create_user(username="other", password="password")
+
+    def _subscribe(self, user=None, days=30, **fields):
+        return Subscription.objects.create(
+            user=user or self.user,
+            end_date=timezone.now() + timedelta(days=days),
+            **fields,
+        )
+
+    def test_active_matches_is_active(self):
+        current = self._subscribe()
+        self._subscribe(days=-1)
+        self._subscribe(status=Subscription.STATUS_CANCELED)
+        Subscription.objects.create(user=self.user)
+
+        active = list(Subscription.objects.active())
+        self.assertEqual(active, [current])
+        self.assertEqual(
+            [sub for sub in Subscription.objects.all() if sub.is_active], active
+        )
+
+    def test_current_for_returns_the_longest_running(self):
+        self._subscribe(days=10)
+        longest = self._subscribe(days=40)
+        self.assertEqual(Subscription.objects.current_for(self.user), longest)
+        self.assertIsNone(Subscription.objects.current_for(self.other))
+
+    def test_entitlement_is_cached(self):
+        self._subscribe()
+        self.assertTrue(has_active_subscription(self.user))
+        self.assertFalse(has_active_subscription(self.other.pk))
+        with self.assertNumQueries(0):
+            self.assertTrue(has_active_subscription(self.user))
+            self.assertFalse(has_active_subscription(self.other))
+
+    def test_cached_entitlement_expires_with_the_subscription(self):
+        self._subscribe(days=1)
+        self.assertTrue(has_active_subscription(self.user))
+        later = (timezone.now() + timedelta(days=2)).timestamp()
+        # Only the entitlement check moves forward; the cache entry is still valid
+        with patch("apps.subscriptions.entitlements.time") as mock_time:
+            mock_time.time.return_value = later
+            with self.assertNumQueries(0):
+                self.assertFalse(has_active_subscription(self.user))
+
+    def test_bulk_lookup_uses_one_query(self):
+        self._subscribe()
+        with self.assertNumQueries(1):
+            entitlements = get_entitlements([self.user.pk, self.other.pk])
+        self.assertEqual(list(entitlements), [self.user.pk])
+
+    def test_role_follows_subscription_changes(self):
+        self.assertEqual(_determine_effective_role(self.user), "RegisteredFree")
+        with self.captureOnCommitCallbacks(execute=True):
+            subscription = self._subscribe()
+        self.assertEqual(_determine_effective_role(self.user), "SubscriberPaid")
+
+        subscription.status = Subscription.STATUS_CANCELED
+        with self.captureOnCommitCallbacks(execute=True):
+            subscription.save()
+        self.assertEqual(_determine_effective_role(self.user), "RegisteredFree")
+
+    def test_bulk_limits_consult_entitlements(self):
+        self._subscribe()
+        limits = get_bulk_user_limits([self.user.pk, self.other.pk])
+        self.assertEqual(
+            limits[self.user.pk], role_policy.limits_for("SubscriberPaid").as_dict()
+        )
+        self.assertEqual(
+            limits[self.other.pk], role_policy.limits_for("RegisteredFree").as_dict()
+        )
+
+    def test_stripe_cancellation_drops_entitlement(self):
+        method = PaymentMethod.objects.create(
+            name="Card", provider_id=PaymentMethod.PROVIDER_STRIPE
+        )
+        self._subscribe(payment_method=method, external_id="sub_1")
+        self.assertTrue(has_active_subscription(self.user))
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            StripeProvider()._handle_subscription_deleted({"id": "sub_1"})
+        # Dropped on commit, not while the cancellation is still uncommitted
+        self.assertTrue(has_active_subscription(self.user))
+        for callback in callbacks:
+            callback()
+        self.assertFalse(has_active_subscription(self.user))
+
+    def test_role_lapses_when_the_subscription_ends(self):
+        Subscription.objects.create(
+            user=self.user, end_date=timezone.now() + timedelta(seconds=0.5)
+        )
+        session = SessionStore()
+        request = RequestFactory().get("/")
+        request.session = session
+        self.assertEqual(_determine_effective_role(self.user), "SubscriberPaid")
+        self.assertEqual(get_session_role(request, self.user), "SubscriberPaid")
+
+        time.sleep(0.6)
+        # No invalidation: the cached role and the session copy expire on time
+        self.assertEqual(_determine_effective_role(self.user), "RegisteredFree")
+        self.assertEqual(get_session_role(request, self.user), "RegisteredFree")
@@ -0,0 +1,89 @@
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from apps.subscriptions import transport
+from apps.subscriptions.services import NowPaymentsAPI
+
+LIMITS = {"quote": (10, 2), "default": (1, 1)}
+
+
+@patch("apps.subscriptions.transport.time.time", return_value=1000.0)
+class LocalRateLimiterTests(SimpleTestCase):
+    limiter_class = transport.LocalRateLimiter
+
+    def setUp(self):
+        self.limiter = self.limiter_class(LIMITS, max_wait=0.25)
+        self.addCleanup(self.limiter.reset)
+
+    def test_burst_then_queue_then_reject(self, _time):
+        self.assertEqual(self.limiter.reserve("estimate"), 0)
+        self.assertEqual(self.limiter.reserve("min-amount"), 0)
+        self.assertAlmostEqual(self.limiter.reserve("estimate"), 0.1)
+        self.assertAlmostEqual(self.limiter.reserve("estimate"), 0.2)
+        with self.assertRaises(transport.RateLimitedError):
+            self.limiter.reserve("estimate")
+
+        self.assertEqual(self.limiter.stats()["quote"], {"delayed": 2, "rejected": 1})
+
+    def test_classes_have_separate_budgets(self, mock_time):
+        self.limiter.reserve("status")
+        self.assertEqual(self.limiter.reserve("estimate"), 0)
+        with self.assertRaises(transport.RateLimitedError):
+            self.limiter.reserve("payment/123")
+
+        mock_time.return_value = 1001.0
+        self.assertEqual(self.limiter.reserve("status"), 0)
+
+
+class CacheRateLimiterTests(LocalRateLimiterTests):
+    limiter_class = transport.CacheRateLimiter
+
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+
+    @patch("apps.subscriptions.transport.time.time", return_value=1000.0)
+    def test_a_taken_slot_delays_instead_of_letting_through(self, _time):
+        cache.add(self.limiter._key("quote", "slot:10000"), 1)
+        self.limiter.reserve("estimate")
+        self.assertAlmostEqual(self.limiter.reserve("estimate"), 0.1)
+
+    @patch("apps.subscriptions.transport.time.time", return_value=1000.0)
+    def test_workers_share_the_bucket(self, _time):
+        other_worker = transport.CacheRateLimiter(LIMITS, max_wait=0.25)
+        self.limiter.reserve("estimate")
+        self.limiter.reserve("estimate")
+        self.assertAlmostEqual(other_worker.reserve("estimate"), 0.1)
+        self.assertEqual(other_worker.stats()["quote"]["delayed"], 1)
+
+
+class RateLimitedCallTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        transport.breaker.reset()
+        self.addCleanup(transport.breaker.reset)
+        self.api = NowPaymentsAPI("test_token")
+
+    @patch("apps.subscriptions.services.time.sleep")
+    @patch("requests.Session.get")
+    def test_delayed_call_waits_for_its_slot(self, mock_get, mock_sleep):
+        mock_get.return_value = MagicMock(status_code=200)
+        mock_get.return_value.json.return_value = {"estimated_amount": 1}
+        with patch.object(transport.rate_limiter, "reserve", return_value=0.3):
+            self.api.get_estimate_price({"amount": 10})
+        mock_sleep.assert_called_once_with(0.3)
+        mock_get.assert_called_once()
+
+    @patch("requests.Session.get")
+    def test_rejected_call_never_reaches_provider(self, mock_get):
+        with patch.object(
+            transport.rate_limiter,
+            "reserve",
+            side_effect=transport.RateLimitedError("exhausted"),
+        ):
+            with self.assertRaises(transport.RateLimitedError):
+                self.api.status()
+        mock_get.assert_not_called()
+        self.assertFalse(transport.breaker.is_open)
@@ -0,0 +1,99 @@
+from unittest.mock import MagicMock, patch
+
+import requests
+from django.test import SimpleTestCase
+
+from apps.subscriptions import transport
+from apps.subscriptions.services import NowPaymentsAPI, NowPaymentsProvider
+
+
+def _response(status_code=200, payload=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = payload if payload is not None else {}
+    if status_code >= 400:
+        error = requests.exceptions.HTTPError(f"{status_code} Error")
+        error.response = response
+        response.raise_for_status.side_effect = error
+    return response
+
+
+class SharedSessionTests(SimpleTestCase):
+    def test_clients_share_one_pooled_session(self):
+        first = NowPaymentsAPI("token-a")
+        second = NowPaymentsAPI("token-b")
+        self.assertIs(first.session, second.session)
+
+        adapter = first.session.get_adapter("https://api.nowpayments.io/v1/")
+        self.assertEqual(adapter._pool_maxsize, transport.POOL_MAXSIZE)
+        self.assertEqual(adapter.max_retries.allowed_methods, frozenset({"GET"}))
+        self.assertGreater(adapter.max_retries.backoff_jitter, 0)
+
+    def test_retry_after_is_capped(self):
+        retry = transport.build_session().get_adapter("https://x/").max_retries
+        response = MagicMock(headers={"Retry-After": "3600"})
+        self.assertEqual(retry.get_retry_after(response), transport.RETRY_BACKOFF_MAX)
+        self.assertEqual(
+            retry.new(total=1).get_retry_after(response), transport.RETRY_BACKOFF_MAX
+        )
+
+    def test_provider_reuses_client(self):
+        with patch("apps.subscriptions.services.env", return_value="key"):
+            first = NowPaymentsProvider().get_api()
+            second = NowPaymentsProvider().get_api()
+        self.assertIs(first, second)
+
+    def test_per_endpoint_timeouts(self):
+        connect, read = transport.get_timeout("full-currencies")
+        self.assertEqual(connect, transport.CONNECT_TIMEOUT)
+        self.assertGreater(read, transport.READ_TIMEOUT)
+        self.assertEqual(
+            transport.get_timeout("payment/123"), transport.get_timeout("payment")
+        )
+        self.assertEqual(
+            transport.get_timeout("unknown"),
+            (transport.CONNECT_TIMEOUT, transport.READ_TIMEOUT),
+        )
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        transport.breaker.reset()
+        self.addCleanup(transport.breaker.reset)
+        self.api = NowPaymentsAPI("test_token")
+
+    @patch("requests.Session.get")
+    def test_opens_after_consecutive_failures(self, mock_get):
+        mock_get.side_effect = requests.exceptions.ConnectTimeout("timed out")
+        for _ in range(transport.breaker.failure_threshold):
+            with self.assertRaises(requests.exceptions.ConnectTimeout):
+                self.api.status()
+
+        with self.assertRaises(transport.CircuitOpenError):
+            self.api.status()
+        self.assertEqual(mock_get.call_count, transport.breaker.failure_threshold)
+
+    @patch("requests.Session.get")
+    def test_client_errors_do_not_open_circuit(self, mock_get):
+        mock_get.return_value = _response(400)
+        for _ in range(transport.breaker.failure_threshold + 1):
+            with self.assertRaises(requests.exceptions.HTTPError):
+                self.api.get_estimate_price({"amount": 1})
+        self.assertFalse(transport.breaker.is_open)
+
+    @patch("requests.Session.get")
+    def test_half_open_trial_closes_circuit(self, mock_get):
+        mock_get.return_value = _response(503)
+        for _ in range(transport.breaker.failure_threshold):
+            with self.assertRaises(requests.exceptions.HTTPError):
+                self.api.status()
+        self.assertTrue(transport.breaker.is_open)
+
+        mock_get.return_value = _response(200, {"message": "OK"})
+        opened_at = transport.breaker._opened_at
+        with patch(
+            "apps.subscriptions.transport.time.monotonic",
+            return_value=opened_at + transport.breaker.reset_timeout,
+        ):
+            self.assertEqual(self.api.status(), {"message": "OK"})
+        self.assertFalse(transport.breaker.is_open)
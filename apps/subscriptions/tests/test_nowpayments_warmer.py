@@ -0,0 +1,76 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from apps.core.cache import cached_ttl, store_cached
+from apps.subscriptions.currencies import CurrencyCatalog, CurrencyIndex
+from apps.subscriptions.services import (
+    FULL_CURRENCIES_CACHE_KEY,
+    MERCHANT_COINS_CACHE_KEY,
+    NowPaymentsAPI,
+    invalidate_currency_catalog,
+)
+
+FULL_CURRENCIES = {
+    "currencies": [
+        {"code": "btc", "name": "Bitcoin", "network": "btc", "logo_url": None},
+        {"code": "eth", "name": "Ethereum", "network": "eth", "logo_url": None},
+    ]
+}
+
+
+def fake_call(method, endpoint, data=None):
+    if endpoint == "merchant/coins":
+        return {"selectedCurrencies": ["btc", "eth"]}
+    if endpoint == "full-currencies":
+        return FULL_CURRENCIES
+    return {}
+
+
+@patch.object(NowPaymentsAPI, "_call", side_effect=fake_call)
+class NowPaymentsWarmerTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_currency_catalog()
+        self.addCleanup(invalidate_currency_catalog)
+        self.addCleanup(cache.clear)
+        self.api = NowPaymentsAPI("test_key")
+
+    def test_refresh_fills_both_caches(self, mock_call):
+        catalog = self.api.refresh_currency_catalog()
+
+        self.assertEqual([coin["name"] for coin in catalog], ["Bitcoin", "Ethereum"])
+        self.assertIsNotNone(cached_ttl(FULL_CURRENCIES_CACHE_KEY))
+        self.assertIsNotNone(cached_ttl(MERCHANT_COINS_CACHE_KEY))
+
+        mock_call.reset_mock()
+        self.assertEqual(self.api.get_merchant_coins_enriched(), list(catalog))
+        mock_call.assert_not_called()
+
+    def test_failed_fetch_keeps_cached_data(self, mock_call):
+        self.api.refresh_currency_catalog()
+        previous = self.api.get_merchant_coins_enriched()
+
+        mock_call.side_effect = ConnectionError("provider down")
+        self.assertFalse(self.api.refresh_currency_catalog())
+        self.assertEqual(self.api.get_merchant_coins_enriched(), previous)
+
+    @patch("apps.subscriptions.services.env", return_value="key")
+    def test_command_only_refreshes_entries_close_to_expiry(self, _env, mock_call):
+        index = CurrencyIndex.from_currencies(FULL_CURRENCIES["currencies"])
+        store_cached(FULL_CURRENCIES_CACHE_KEY, index, 3600)
+        store_cached(MERCHANT_COINS_CACHE_KEY, CurrencyCatalog.build(["btc"]), 10)
+
+        out = StringIO()
+        call_command("warm_nowpayments_cache", ahead=30, stdout=out)
+
+        self.assertIn("Refreshed merchant coins:", out.getvalue())
+        endpoints = [call.args[1] for call in mock_call.call_args_list]
+        self.assertEqual(endpoints, ["merchant/coins"])
+
+        mock_call.reset_mock()
+        call_command("warm_nowpayments_cache", ahead=30, stdout=StringIO())
+        mock_call.assert_not_called()
@@ -0,0 +1,75 @@
+import json
+import threading
+from unittest.mock import patch
+
+import requests
+import stripe
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from apps.subscriptions import transport
+from apps.subscriptions.services import NowPaymentsAPI
+from apps.subscriptions.stubs import PaymentStubServer, StubConfig, sign_stripe_payload
+
+
+class PaymentStubServerTests(SimpleTestCase):
+    def _start(self, **config):
+        server = PaymentStubServer(("127.0.0.1", 0), StubConfig(seed=1, **config))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def setUp(self):
+        cache.clear()
+        transport.breaker.reset()
+        self.addCleanup(transport.breaker.reset)
+
+    def test_crypto_checkout_flow(self):
+        server = self._start()
+        api = NowPaymentsAPI("stub")
+        with patch.object(NowPaymentsAPI, "API_BASE", f"{server.base_url}/v1/"):
+            self.assertEqual(api.status(), {"message": "OK"})
+            self.assertIn("USDTTRC20", api.get_currency_catalog().codes)
+            estimate = api.get_estimate_price(
+                {"amount": 10, "currency_from": "usd", "currency_to": "usdttrc20"}
+            )
+            minimum = api.get_minimum_payment_amount(
+                {"currency_from": "usdttrc20", "currency_to": "usd"}
+            )
+            invoice = api.create_invoice(
+                {"price_amount": 10, "price_currency": "usd", "order_id": "o1"}
+            )
+
+        self.assertEqual(estimate["estimated_amount"], 10.0)
+        self.assertEqual(minimum["min_amount"], 2.0)
+        self.assertTrue(invoice["invoice_url"].startswith(server.base_url))
+
+    def test_error_injection(self):
+        server = self._start(error_rate=1.0, error_status=429)
+        response = requests.get(
+            f"{server.base_url}/v1/status", headers={"x-api-key": "stub"}, timeout=5
+        )
+        self.assertEqual(response.status_code, 429)
+
+    def test_signed_stripe_events_verify(self):
+        server = self._start(stripe_webhook_secret="whsec_test")
+        response = requests.post(
+            f"{server.base_url}/stripe/events",
+            json={"type": "customer.subscription.deleted", "object": {"id": "sub_1"}},
+            timeout=5,
+        )
+        signed = response.json()
+
+        event = stripe.Webhook.construct_event(
+            signed["payload"], signed["signature"], "whsec_test"
+        )
+        self.assertEqual(event["data"]["object"]["id"], "sub_1")
+
+    def test_sign_stripe_payload_matches_stripe(self):
+        payload = json.dumps({"id": "evt_1", "object": "event"})
+        header = sign_stripe_payload(payload, "whsec_test")
+        with self.assertRaises(stripe.error.SignatureVerificationError):
+            stripe.Webhook.construct_event(payload, header, "whsec_other")
+        stripe.Webhook.construct_event(payload, header, "whsec_test")
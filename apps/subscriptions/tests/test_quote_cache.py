@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from apps.subscriptions.services import (
+    aget_cached_crypto_quote,
+    get_cached_crypto_quote,
+)
+
+
+def _api(delay=0.0):
+    api = MagicMock()
+    api.get_minimum_payment_amount.side_effect = lambda params, deadline_at: (
+        time.sleep(delay) or {"min_amount": 1.5}
+    )
+    api.get_estimate_price.return_value = {"estimated_amount": 10.02}
+    return api
+
+
+class QuoteCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_identical_quotes_are_served_from_cache(self):
+        api = _api()
+        first = get_cached_crypto_quote(api, 10.0, "usd", "BTC")
+        second = get_cached_crypto_quote(api, 10.0, "USD", "btc")
+
+        self.assertEqual(first, second)
+        self.assertEqual(api.get_minimum_payment_amount.call_count, 1)
+
+        get_cached_crypto_quote(api, 10.0, "usd", "eth")
+        self.assertEqual(api.get_minimum_payment_amount.call_count, 2)
+
+    def test_partial_quotes_are_not_cached(self):
+        api = _api()
+        api.get_estimate_price.side_effect = ConnectionError()
+
+        self.assertTrue(get_cached_crypto_quote(api, 10.0, "usd", "btc")["partial"])
+        get_cached_crypto_quote(api, 10.0, "usd", "btc")
+        self.assertEqual(api.get_estimate_price.call_count, 2)
+
+    def test_concurrent_misses_share_one_upstream_call(self):
+        api = _api(delay=0.3)
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    get_cached_crypto_quote(api, 10.0, "usd", "btc")
+                )
+            )
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual(api.get_minimum_payment_amount.call_count, 1)
+
+
+class AsyncQuoteCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    async def test_concurrent_quotes_share_one_task(self):
+        async def slow_min_amount(params):
+            await asyncio.sleep(0.1)
+            return {"min_amount": 1.5}
+
+        api = MagicMock()
+        api.get_minimum_payment_amount = AsyncMock(side_effect=slow_min_amount)
+        api.get_estimate_price = AsyncMock(return_value={"estimated_amount": 10.02})
+
+        quotes = await asyncio.gather(
+            *(aget_cached_crypto_quote(api, 10.0, "usd", "btc") for _ in range(5))
+        )
+
+        self.assertEqual(
+            quotes[0], {"min_amount": 1.5, "estimated_amount": 10.02, "partial": False}
+        )
+        self.assertTrue(all(quote == quotes[0] for quote in quotes))
+        self.assertEqual(api.get_minimum_payment_amount.await_count, 1)
+
+        await aget_cached_crypto_quote(api, 10.0, "usd", "btc")
+        self.assertEqual(api.get_minimum_payment_amount.await_count, 1)
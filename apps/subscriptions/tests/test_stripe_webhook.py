@@ -0,0 +1,105 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.subscriptions.models import (
+    PaymentMethod,
+    Plan,
+    ProcessedWebhookEvent,
+    Subscription,
+)
+from apps.subscriptions.services import StripeProvider, get_payment_method_id
+from apps.subscriptions.stubs import sign_stripe_payload, stripe_event
+
+User = get_user_model()
+
+SECRET = "whsec_test"
+
+
+@override_settings(STRIPE_WEBHOOK_SECRET=SECRET)
+class StripeWebhookTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="buyer", password="password")
+        self.plan = Plan.objects.create(
+            name="Monthly", slug="monthly", price=10, duration_months=1
+        )
+        self.method = PaymentMethod.objects.create(
+            name="Card", provider_id=PaymentMethod.PROVIDER_STRIPE
+        )
+        self.factory = RequestFactory()
+        self.provider = StripeProvider()
+
+    def _deliver(self, event):
+        payload = json.dumps(event)
+        request = self.factory.post(
+            "/subscriptions/webhook/stripe/",
+            payload,
+            content_type="application/json",
+            HTTP_STRIPE_SIGNATURE=sign_stripe_payload(payload, SECRET),
+        )
+        return self.provider.handle_webhook(request)
+
+    def _checkout_completed(self, subscription_id="sub_1"):
+        return stripe_event(
+            "checkout.session.completed",
+            {
+                "id": "cs_1",
+                "subscription": subscription_id,
+                "customer": "cus_1",
+                "metadata": {"user_id": self.user.id, "plan_id": self.plan.id},
+            },
+        )
+
+    def test_replayed_event_is_applied_once(self):
+        event = self._checkout_completed()
+        self.assertTrue(self._deliver(event))
+        self.assertTrue(self._deliver(event))
+
+        subscription = Subscription.objects.get()
+        self.assertEqual(subscription.user, self.user)
+        self.assertEqual(subscription.payment_method, self.method)
+        self.assertEqual(ProcessedWebhookEvent.objects.count(), 1)
+
+    def test_redelivered_checkout_updates_existing_subscription(self):
+        self._deliver(self._checkout_completed())
+        self._deliver(self._checkout_completed())
+        self.assertEqual(Subscription.objects.count(), 1)
+
+    def test_query_count_is_constant(self):
+        get_payment_method_id(PaymentMethod.PROVIDER_STRIPE)
+        counts = []
+        for subscription_id in ("sub_1", "sub_2"):
+            with CaptureQueriesContext(connection) as queries:
+                self._deliver(self._checkout_completed(subscription_id))
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        user_queries = [
+            q["sql"] for q in queries.captured_queries if "auth_user" in q["sql"]
+        ]
+        self.assertEqual(len(user_queries), 1)
+        self.assertIn("LIMIT 1", user_queries[0])
+
+    def test_failed_event_is_not_recorded(self):
+        event = self._checkout_completed()
+        event["data"]["object"]["metadata"] = {}
+        self.assertFalse(self._deliver(event))
+        self.assertFalse(ProcessedWebhookEvent.objects.exists())
+
+    def test_subscription_deleted(self):
+        self._deliver(self._checkout_completed())
+        self._deliver(stripe_event("customer.subscription.deleted", {"id": "sub_1"}))
+        self.assertEqual(
+            Subscription.objects.get().status, Subscription.STATUS_CANCELED
+        )
+
+    def test_payment_method_id_cache_follows_changes(self):
+        self.assertEqual(
+            get_payment_method_id(PaymentMethod.PROVIDER_STRIPE), self.method.id
+        )
+        self.method.delete()
+        self.assertIsNone(get_payment_method_id(PaymentMethod.PROVIDER_STRIPE))
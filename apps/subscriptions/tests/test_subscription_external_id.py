@@ -0,0 +1,114 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from apps.subscriptions.maintenance import dedupe_subscriptions
+from apps.subscriptions.models import PaymentMethod, Subscription
+
+User = get_user_model()
+
+
+class SubscriptionExternalIdTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="buyer", password="password")
+        self.stripe = PaymentMethod.objects.create(
+            name="Card", provider_id=PaymentMethod.PROVIDER_STRIPE
+        )
+        self.crypto = PaymentMethod.objects.create(
+            name="Crypto", provider_id=PaymentMethod.PROVIDER_NOWPAYMENTS
+        )
+
+    def _create(self, payment_method=None, external_id="sub_1", **fields):
+        return Subscription.objects.create(
+            user=self.user,
+            payment_method=payment_method,
+            external_id=external_id,
+            **fields,
+        )
+
+    def test_external_id_is_unique_per_provider(self):
+        self._create(self.stripe)
+        self._create(self.crypto)
+        with self.assertRaises(IntegrityError):
+            self._create(self.stripe)
+
+    def test_lookup_is_scoped_to_the_provider(self):
+        sub = self._create(self.stripe)
+        self._create(self.crypto)
+        self.assertEqual(
+            list(Subscription.objects.by_external_id(self.stripe.id, "sub_1")), [sub]
+        )
+        self.assertEqual(Subscription.objects.for_provider(self.crypto.id).count(), 1)
+
+
+class DedupeSubscriptionsTests(TransactionTestCase):
+    """Duplicates predate the constraint, so it is dropped for these tests."""
+
+    def setUp(self):
+        constraint = next(
+            c
+            for c in Subscription._meta.constraints
+            if c.name == "unique_subscription_external_id"
+        )
+        others = [c for c in Subscription._meta.constraints if c is not constraint]
+        # SQLite rebuilds the table from the model's current constraints
+        with patch.object(Subscription._meta, "constraints", others):
+            with connection.schema_editor() as editor:
+                editor.remove_constraint(Subscription, constraint)
+        self.addCleanup(self._restore_constraint, constraint)
+        self.user = User.objects.create_user(username="buyer", password="password")
+        self.stripe = PaymentMethod.objects.create(
+            name="Card", provider_id=PaymentMethod.PROVIDER_STRIPE
+        )
+
+    def _restore_constraint(self, constraint):
+        Subscription.objects.all().delete()
+        with connection.schema_editor() as editor:
+            editor.add_constraint(Subscription, constraint)
+
+    def _create(self, payment_method=None, external_id="sub_1", **fields):
+        return Subscription.objects.create(
+            user=self.user,
+            payment_method=payment_method,
+            external_id=external_id,
+            **fields,
+        )
+
+    def test_dedupe_keeps_the_latest_row(self):
+        old = self._create(self.stripe)
+        latest = self._create(self.stripe)
+        self._create(self.stripe)
+        Subscription.objects.filter(pk=latest.pk).update(
+            updated_at=timezone.now() + timedelta(days=1)
+        )
+        self._create(self.stripe, external_id="")
+        self._create(self.stripe, external_id="")
+
+        self.assertEqual(dedupe_subscriptions(Subscription, dry_run=True), 2)
+        self.assertEqual(Subscription.objects.count(), 5)
+
+        self.assertEqual(dedupe_subscriptions(Subscription, batch_size=1), 2)
+        remaining = Subscription.objects.filter(external_id="sub_1")
+        self.assertEqual(list(remaining), [latest])
+        self.assertFalse(Subscription.objects.filter(pk=old.pk).exists())
+        self.assertEqual(Subscription.objects.filter(external_id=None).count(), 2)
+
+    def test_rows_without_payment_method_are_kept(self):
+        # NULL payment methods are distinct under the constraint
+        self._create()
+        self._create()
+        self.assertEqual(dedupe_subscriptions(Subscription), 0)
+        self.assertEqual(Subscription.objects.count(), 2)
+
+    def test_command(self):
+        self._create(self.stripe)
+        self._create(self.stripe)
+        out = StringIO()
+        call_command("dedupe_subscriptions", stdout=out)
+        self.assertIn("Deleted 1 duplicate subscriptions", out.getvalue())
@@ -0,0 +1,168 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.subscriptions.models import (
+    PaymentMethod,
+    Plan,
+    ProcessedWebhookEvent,
+    Subscription,
+    WebhookEvent,
+)
+from apps.subscriptions.services import (
+    drain_webhook_inbox,
+    get_payment_method_id,
+    record_webhook_event,
+    webhook_retry_delay,
+)
+from apps.subscriptions.stubs import sign_stripe_payload, stripe_event
+
+User = get_user_model()
+
+SECRET = "whsec_test"
+
+
+@override_settings(STRIPE_WEBHOOK_SECRET=SECRET, STRIPE_WEBHOOK_INBOX=True)
+class WebhookInboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="buyer", password="password")
+        self.plan = Plan.objects.create(
+            name="Monthly", slug="monthly", price=10, duration_months=1
+        )
+        PaymentMethod.objects.create(
+            name="Card", provider_id=PaymentMethod.PROVIDER_STRIPE
+        )
+
+    def _post(self, event, secret=SECRET):
+        payload = json.dumps(event)
+        return self.client.post(
+            reverse("subscriptions:webhook"),
+            payload,
+            content_type="application/json",
+            HTTP_STRIPE_SIGNATURE=sign_stripe_payload(payload, secret),
+        )
+
+    def _checkout_completed(self, user_id=None):
+        return stripe_event(
+            "checkout.session.completed",
+            {
+                "id": "cs_1",
+                "subscription": "sub_1",
+                "customer": "cus_1",
+                "metadata": {
+                    "user_id": user_id or self.user.id,
+                    "plan_id": self.plan.id,
+                },
+            },
+        )
+
+    def test_view_only_stores_the_event(self):
+        event = self._checkout_completed()
+        self.assertEqual(self._post(event).status_code, 200)
+        self.assertEqual(self._post(event).status_code, 200)
+
+        inbox = WebhookEvent.objects.get()
+        self.assertEqual(inbox.event_id, event["id"])
+        self.assertEqual(inbox.status, WebhookEvent.STATUS_PENDING)
+        self.assertFalse(Subscription.objects.exists())
+
+    def test_invalid_signature_is_rejected(self):
+        response = self._post(self._checkout_completed(), secret="whsec_other")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_drain_applies_pending_events(self):
+        self._post(self._checkout_completed())
+        out = StringIO()
+        call_command("drain_webhook_inbox", stdout=out)
+
+        self.assertIn("Processed 1", out.getvalue())
+        self.assertEqual(Subscription.objects.get().user, self.user)
+        inbox = WebhookEvent.objects.get()
+        self.assertEqual(inbox.status, WebhookEvent.STATUS_PROCESSED)
+        self.assertIsNotNone(inbox.processed_at)
+        self.assertEqual(
+            drain_webhook_inbox(), {"processed": 0, "retried": 0, "failed": 0}
+        )
+
+    def test_failing_event_does_not_block_the_batch(self):
+        self._post(self._checkout_completed(user_id=999999))
+        self._post(stripe_event("customer.subscription.deleted", {"id": "sub_unknown"}))
+
+        self.assertEqual(
+            drain_webhook_inbox(max_attempts=2),
+            {"processed": 1, "retried": 1, "failed": 0},
+        )
+        retried = WebhookEvent.objects.get(status=WebhookEvent.STATUS_PENDING)
+        self.assertGreater(
+            retried.next_attempt_at, timezone.now() + webhook_retry_delay(1) * 0.9
+        )
+        # Backing off: the event is not claimed again right away
+        self.assertEqual(
+            drain_webhook_inbox(max_attempts=2),
+            {"processed": 0, "retried": 0, "failed": 0},
+        )
+
+        WebhookEvent.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(
+            drain_webhook_inbox(max_attempts=2),
+            {"processed": 0, "retried": 0, "failed": 1},
+        )
+        failed = WebhookEvent.objects.get(status=WebhookEvent.STATUS_FAILED)
+        self.assertEqual(failed.attempts, 2)
+        self.assertTrue(failed.last_error)
+        self.assertFalse(Subscription.objects.exists())
+
+    def _checkout(self, subscription_id, user_id=None):
+        event = self._checkout_completed(user_id)
+        event["data"]["object"]["subscription"] = subscription_id
+        return event
+
+    def test_bulk_drain_applies_events_in_order(self):
+        self._post(self._checkout("sub_1"))
+        self._post(self._checkout("sub_2"))
+        self._post(stripe_event("customer.subscription.deleted", {"id": "sub_1"}))
+        self._post(self._checkout("sub_3", user_id=999999))
+
+        self.assertEqual(
+            drain_webhook_inbox(bulk=True),
+            {"processed": 3, "retried": 1, "failed": 0},
+        )
+        statuses = dict(Subscription.objects.values_list("external_id", "status"))
+        self.assertEqual(
+            statuses,
+            {
+                "sub_1": Subscription.STATUS_CANCELED,
+                "sub_2": Subscription.STATUS_ACTIVE,
+            },
+        )
+        self.assertEqual(ProcessedWebhookEvent.objects.count(), 3)
+
+    def test_bulk_drain_skips_events_already_applied(self):
+        event = self._checkout("sub_1")
+        self._post(event)
+        record_webhook_event(PaymentMethod.PROVIDER_STRIPE, event["id"])
+
+        self.assertEqual(drain_webhook_inbox(bulk=True)["processed"], 1)
+        self.assertFalse(Subscription.objects.exists())
+
+    def test_bulk_drain_query_count_is_constant(self):
+        get_payment_method_id(PaymentMethod.PROVIDER_STRIPE)
+        counts = []
+        for size in (2, 6):
+            for i in range(size):
+                self._post(self._checkout(f"sub_{size}_{i}"))
+            with CaptureQueriesContext(connection) as queries:
+                drain_webhook_inbox(bulk=True)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(Subscription.objects.count(), 8)
@@ -7,6 +7,7 @@ from django.urls import reverse
 
 from .models import PaymentMethod, Plan, Subscription
 from .services import NowPaymentsAPI, NowPaymentsProvider
+from .transport import get_timeout
 
 User = get_user_model()
 
@@ -24,7 +25,12 @@ class NowPaymentsAPITests(TestCase):
 
         response = self.api.status()
         self.assertEqual(response, {"message": "OK"})
-        mock_get.assert_called_with("https://api.nowpayments.io/v1/status", params=None)
+        mock_get.assert_called_with(
+            "https://api.nowpayments.io/v1/status",
+            params=None,
+            headers={"x-api-key": "test_token"},
+            timeout=get_timeout("status"),
+        )
 
     @patch("requests.Session.post")
     def test_create_invoice(self, mock_post):
@@ -38,7 +44,12 @@ class NowPaymentsAPITests(TestCase):
         data = {"price_amount": 10, "price_currency": "usd", "pay_currency": "btc"}
         response = self.api.create_invoice(data)
         self.assertEqual(response["invoice_url"], "https://nowpayments.io/invoice/123")
-        mock_post.assert_called_with("https://api.nowpayments.io/v1/invoice", json=data)
+        mock_post.assert_called_with(
+            "https://api.nowpayments.io/v1/invoice",
+            json=data,
+            headers={"x-api-key": "test_token"},
+            timeout=get_timeout("invoice"),
+        )
 
 
 @override_settings(NOWPAYMENTS_API_KEY="dummy_key")
@@ -0,0 +1,430 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Shared HTTP transport for the NowPayments client. One ``requests.Session``
+# per process keeps TCP/TLS connections alive across requests; its pool is
+# sized for the number of worker threads that may call the provider at once.
+POOL_CONNECTIONS = getattr(settings, "NOWPAYMENTS_POOL_CONNECTIONS", 4)
+POOL_MAXSIZE = getattr(settings, "NOWPAYMENTS_POOL_MAXSIZE", 20)
+
+# Bounded retries with jittered exponential backoff. Only idempotent GETs are
+# retried; POSTs (payments, invoices) are never replayed.
+MAX_RETRIES = getattr(settings, "NOWPAYMENTS_MAX_RETRIES", 2)
+RETRY_BACKOFF = 0.25
+RETRY_BACKOFF_JITTER = 0.25
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Longest sleep between retries, including one asked for by a Retry-After
+# header, so a provider answering "retry in an hour" cannot pin a worker.
+RETRY_BACKOFF_MAX = RETRY_BACKOFF * 2**MAX_RETRIES
+
+# (connect, read) timeouts in seconds. ``ENDPOINT_READ_TIMEOUTS`` overrides
+# the default read timeout by the first path segment of the endpoint.
+CONNECT_TIMEOUT = getattr(settings, "NOWPAYMENTS_CONNECT_TIMEOUT", 3.05)
+READ_TIMEOUT = getattr(settings, "NOWPAYMENTS_READ_TIMEOUT", 10.0)
+ENDPOINT_READ_TIMEOUTS = {
+    "status": 3.0,
+    "estimate": 5.0,
+    "min-amount": 5.0,
+    "full-currencies": 30.0,
+    "payment": 20.0,
+    "invoice": 20.0,
+}
+
+# Upper bound on concurrent connections of the async client (one per event
+# loop); an ASGI worker can keep this many provider calls in flight.
+ASYNC_MAX_CONNECTIONS = getattr(settings, "NOWPAYMENTS_ASYNC_MAX_CONNECTIONS", 200)
+
+# Token buckets per endpoint class, shared by all workers through the Django
+# cache: {class: (requests per second, burst)}. Calls that would exceed the
+# budget wait for a slot up to ``RATE_LIMIT_MAX_WAIT`` seconds, beyond that
+# they are rejected with ``RateLimitedError``.
+RATE_LIMITS = getattr(
+    settings,
+    "NOWPAYMENTS_RATE_LIMITS",
+    {
+        "quote": (10, 20),
+        "catalog": (2, 5),
+        "payment": (5, 10),
+        "default": (5, 10),
+    },
+)
+ENDPOINT_CLASSES = {
+    "estimate": "quote",
+    "min-amount": "quote",
+    "merchant": "catalog",
+    "currencies": "catalog",
+    "full-currencies": "catalog",
+    "payment": "payment",
+    "invoice": "payment",
+}
+RATE_LIMIT_MAX_WAIT = getattr(settings, "NOWPAYMENTS_RATE_LIMIT_MAX_WAIT", 2.0)
+# "cache" (shared across workers) or "local" (per process, for development).
+# By default the local limiter is used when the cache is itself process-local.
+RATE_LIMIT_BACKEND = getattr(settings, "NOWPAYMENTS_RATE_LIMIT_BACKEND", None)
+
+BREAKER_FAILURE_THRESHOLD = getattr(settings, "NOWPAYMENTS_BREAKER_THRESHOLD", 5)
+BREAKER_RESET_TIMEOUT = getattr(settings, "NOWPAYMENTS_BREAKER_RESET_TIMEOUT", 30)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of calling the provider while the circuit is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail fast for ``reset_timeout`` seconds. Then a single trial call is
+    let through (half-open): success closes the circuit, failure reopens it.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None
+
+    def before_call(self) -> None:
+        """Raise ``CircuitOpenError`` unless a call may go through now."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if (
+                time.monotonic() - self._opened_at >= self.reset_timeout
+                and not self._trial_in_flight
+            ):
+                self._trial_in_flight = True
+                return
+        raise CircuitOpenError("NowPayments circuit is open")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning(
+                        "NowPayments circuit opened after %d failures", self._failures
+                    )
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Give up the half-open trial without a verdict (cancelled call, bug).
+
+        The next call after it becomes the trial instead of the circuit
+        staying open for good.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def reset(self) -> None:
+        self.record_success()
+
+
+breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT)
+
+
+class RateLimitedError(requests.exceptions.RequestException):
+    """Raised instead of calling the provider when the rate budget is exhausted."""
+
+
+def endpoint_class(endpoint: str) -> str:
+    """Return the rate-limit class of a NowPayments endpoint path."""
+    head = endpoint.strip("/").split("/", 1)[0]
+    return ENDPOINT_CLASSES.get(head, "default")
+
+
+class LocalRateLimiter:
+    """In-process token buckets (GCRA), one per endpoint class.
+
+    ``reserve`` books the next free slot of a bucket and returns how long the
+    caller has to wait for it; a slot further away than ``max_wait`` is not
+    booked and the call is rejected. Counters of delayed and rejected calls
+    are kept per class.
+    """
+
+    def __init__(self, limits: Dict[str, Tuple[float, int]], max_wait: float):
+        self.limits = limits
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._tats: Dict[str, float] = {}
+        self._stats: Dict[Tuple[str, str], int] = {}
+
+    def _bucket(self, endpoint: str) -> str:
+        """Return the bucket of ``endpoint``; classes without limits share "default"."""
+        name = endpoint_class(endpoint)
+        return name if name in self.limits else "default"
+
+    def _book(self, tat: Optional[float], now: float, name: str):
+        """Return ``(new_tat, wait)`` for one call, or None to reject it."""
+        rate, burst = self.limits[name]
+        interval = 1.0 / rate
+        new_tat = max(tat or now, now) + interval
+        # Rounded so float noise does not turn an immediate call into a delay.
+        wait = round(max(0.0, new_tat - now - burst * interval), 6)
+        if wait > self.max_wait:
+            return None
+        return new_tat, wait
+
+    def reserve(self, endpoint: str) -> float:
+        """Book a call to ``endpoint``; return seconds to wait before making it.
+
+        Raises ``RateLimitedError`` when the call would have to wait longer
+        than ``max_wait``.
+        """
+        name = self._bucket(endpoint)
+        with self._lock:
+            booking = self._book(self._tats.get(name), time.time(), name)
+            if booking is not None:
+                self._tats[name] = booking[0]
+        return self._settle(name, booking)
+
+    async def areserve(self, endpoint: str) -> float:
+        """Async ``reserve``; the in-process buckets never block the loop."""
+        return self.reserve(endpoint)
+
+    def _settle(self, name: str, booking) -> float:
+        if booking is None:
+            self._count(name, "rejected")
+            logger.warning("NowPayments %s rate limit exhausted, call rejected", name)
+            raise RateLimitedError(f"NowPayments {name} rate limit exhausted")
+        wait = booking[1]
+        if wait > 0:
+            self._count(name, "delayed")
+        return wait
+
+    def _count(self, name: str, counter: str) -> None:
+        with self._lock:
+            key = (name, counter)
+            self._stats[key] = self._stats.get(key, 0) + 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return ``{class: {"delayed": n, "rejected": n}}`` for every class."""
+        return {
+            name: {
+                counter: self._stats.get((name, counter), 0)
+                for counter in ("delayed", "rejected")
+            }
+            for name in sorted(self.limits)
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._tats.clear()
+            self._stats.clear()
+
+
+class CacheRateLimiter(LocalRateLimiter):
+    """Token buckets shared by all workers through the Django cache.
+
+    A bucket is a sequence of slots, one per ``1 / rate`` seconds; a call
+    books the first free slot with an atomic ``cache.add`` and may start
+    ``burst - 1`` slots ahead of it, which is the GCRA schedule of
+    ``LocalRateLimiter`` without a lock around the bucket. A ``next`` key
+    remembers the last booked slot so callers skip the slots already taken.
+    Counters are shared cache counters.
+    """
+
+    def _key(self, name: str, suffix: str) -> str:
+        return f"nowpayments:ratelimit:{name}:{suffix}"
+
+    def reserve(self, endpoint: str) -> float:
+        name = self._bucket(endpoint)
+        rate, burst = self.limits[name]
+        now = time.time()
+        ttl = int(self.max_wait + burst / rate) + 60
+        slot = max(int(now * rate), cache.get(self._key(name, "next"), 0))
+        while True:
+            wait = round(max(0.0, (slot - burst + 1) / rate - now), 6)
+            if wait > self.max_wait:
+                booking = None
+                break
+            if cache.add(self._key(name, f"slot:{slot}"), 1, ttl):
+                cache.set(self._key(name, "next"), slot + 1, ttl)
+                booking = (slot, wait)
+                break
+            slot += 1
+        return self._settle(name, booking)
+
+    async def areserve(self, endpoint: str) -> float:
+        return await sync_to_async(self.reserve, thread_sensitive=False)(endpoint)
+
+    def _count(self, name: str, counter: str) -> None:
+        key = self._key(name, counter)
+        if not cache.add(key, 1, None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, None)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {
+                counter: cache.get(self._key(name, counter), 0)
+                for counter in ("delayed", "rejected")
+            }
+            for name in sorted(self.limits)
+        }
+
+    def reset(self) -> None:
+        keys = []
+        for name, (rate, burst) in self.limits.items():
+            keys += [self._key(name, s) for s in ("next", "delayed", "rejected")]
+            # Booked slots lie at most one booking horizon behind ``next``.
+            last = cache.get(self._key(name, "next"), 0)
+            first = last - burst - int(self.max_wait * rate) - 2
+            keys += [self._key(name, f"slot:{slot}") for slot in range(first, last)]
+        cache.delete_many(keys)
+
+
+def _build_rate_limiter() -> LocalRateLimiter:
+    backend = RATE_LIMIT_BACKEND
+    if backend is None:
+        cache_backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+        backend = "local" if cache_backend.endswith("LocMemCache") else "cache"
+    limiter_class = LocalRateLimiter if backend == "local" else CacheRateLimiter
+    return limiter_class(RATE_LIMITS, RATE_LIMIT_MAX_WAIT)
+
+
+rate_limiter = _build_rate_limiter()
+
+# Process-wide sessions by retry budget (see ``get_session``).
+_sessions: Dict[int, requests.Session] = {}
+_session_lock = threading.Lock()
+
+
+class CappedRetry(Retry):
+    """``Retry`` that never sleeps longer than ``backoff_max``, Retry-After included."""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.backoff_max)
+
+
+def build_session(max_retries: int = MAX_RETRIES) -> requests.Session:
+    """Return a new session with a pooled, retrying adapter mounted for HTTP(S)."""
+    retry = CappedRetry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        allowed_methods=frozenset({"GET"}),
+        status_forcelist=RETRY_STATUSES,
+        backoff_factor=RETRY_BACKOFF,
+        backoff_jitter=RETRY_BACKOFF_JITTER,
+        backoff_max=RETRY_BACKOFF_MAX,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(max_retries: int = MAX_RETRIES) -> requests.Session:
+    """Return the process-wide session, creating it on first use.
+
+    Calls bounded by a deadline use ``max_retries=0``: adapter retries would
+    sleep and resend past it, where nothing can cancel them.
+    """
+    session = _sessions.get(max_retries)
+    if session is None:
+        with _session_lock:
+            session = _sessions.get(max_retries)
+            if session is None:
+                session = _sessions[max_retries] = build_session(max_retries)
+    return session
+
+
+def import_httpx():
+    """Import httpx, which the async client needs but is an optional dependency."""
+    try:
+        import httpx
+    except ImportError as exc:
+        raise ImproperlyConfigured(
+            "The async NowPayments client requires httpx (pip install httpx)."
+        ) from exc
+    return httpx
+
+
+_async_clients: "weakref.WeakKeyDictionary[Any, Any]" = weakref.WeakKeyDictionary()
+
+
+def get_async_client():
+    """Return the pooled ``httpx.AsyncClient`` of the running event loop.
+
+    httpx clients are bound to the loop they were first used on, so one client
+    is kept per loop (an ASGI worker runs a single loop for its lifetime).
+    """
+    httpx = import_httpx()
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=POOL_MAXSIZE,
+            ),
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def backoff_delay(attempt: int) -> float:
+    """Return the jittered delay before retry number ``attempt`` (0-based)."""
+    return RETRY_BACKOFF * (2**attempt) + random.uniform(0, RETRY_BACKOFF_JITTER)
+
+
+def get_timeout(endpoint: str) -> Tuple[float, float]:
+    """Return the ``(connect, read)`` timeout for a NowPayments endpoint path."""
+    head = endpoint.strip("/").split("/", 1)[0]
+    return (CONNECT_TIMEOUT, ENDPOINT_READ_TIMEOUTS.get(head, READ_TIMEOUT))
+
+
+def is_provider_failure(exc: Exception) -> bool:
+    """Return True if ``exc`` means the provider is unreachable or unhealthy.
+
+    Client errors (4xx other than 429) are the caller's fault and do not count
+    towards opening the circuit.
+    """
+    response = getattr(exc, "response", None)
+    if response is None:
+        return True
+    return response.status_code == 429 or response.status_code >= 500
@@ -1,9 +1,21 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import transport, views
 
 app_name = "subscriptions"
 
+# Under ASGI the crypto selection and estimate pages can use the async
+# NowPayments client (requires httpx) instead of blocking a worker thread.
+if getattr(settings, "NOWPAYMENTS_ASYNC_VIEWS", False):
+    # Fail at startup, not on the first request, when httpx is missing.
+    transport.import_httpx()
+    crypto_payment_selection = views.crypto_payment_selection_async
+    get_crypto_estimate = views.get_crypto_estimate_async
+else:
+    crypto_payment_selection = views.crypto_payment_selection
+    get_crypto_estimate = views.get_crypto_estimate
+
 urlpatterns = [
     path("pricing/", views.pricing_page, name="pricing"),
     path(
@@ -16,9 +28,9 @@ urlpatterns = [
     path("webhook/nowpayments/", views.nowpayments_webhook, name="webhook_nowpayments"),
     path(
         "crypto/select/<int:plan_id>/",
-        views.crypto_payment_selection,
+        crypto_payment_selection,
         name="crypto_selection",
     ),
-    path("crypto/estimate/", views.get_crypto_estimate, name="get_crypto_estimate"),
+    path("crypto/estimate/", get_crypto_estimate, name="get_crypto_estimate"),
     path("crypto/invoice/", views.create_crypto_invoice, name="create_crypto_invoice"),
 ]
@@ -1,25 +1,30 @@
 import json
 import logging
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional
 
 import stripe
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core.cache import cache
 from django.http import HttpResponse
-from django.shortcuts import get_object_or_404, redirect, render
+from django.shortcuts import aget_object_or_404, get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.translation import gettext as _
 from django.views.decorators.csrf import csrf_exempt
 
+from apps.core.cache import cached_lookup
+
+from .currencies import CurrencyCatalog, merchant_codes
 from .models import PaymentMethod, Plan
 from .services import (
     NowPaymentsAPI,
     NowPaymentsProvider,
     PaymentFactory,
     StripeProvider,
+    aget_cached_crypto_quote,
+    get_cached_crypto_quote,
 )
 
 logger = logging.getLogger(__name__)
@@ -30,8 +35,8 @@ stripe.api_key = settings.STRIPE_SECRET_KEY
 def _get_merchant_currencies(api: NowPaymentsAPI) -> List[str]:
     """Return a list of merchant-configured currency codes.
 
-    Returns the currencies configured in the merchant dashboard for this account.
-    Results are cached briefly to avoid API spamming.
+    Returns the currencies configured in the merchant dashboard for this account
+    (see ``_get_merchant_catalog``).
 
     Args:
         api: NowPaymentsAPI instance
@@ -39,58 +44,32 @@ def _get_merchant_currencies(api: NowPaymentsAPI) -> List[str]:
     Returns:
         List of available currency codes
     """
-    cache_key = "nowpayments:merchant_currencies"
-    cached = cache.get(cache_key)
-    if cached is not None:
-        return cached
+    return _get_merchant_catalog(api).codes
+
+
+def _get_merchant_catalog(api: NowPaymentsAPI) -> CurrencyCatalog:
+    """Return the merchant-configured currencies as a ``CurrencyCatalog``.
 
+    Unlike ``NowPaymentsAPI.get_currency_catalog`` this only calls merchant/coins
+    (no enrichment). Results are cached briefly (with stampede protection) to
+    avoid API spamming; failures are cached as an empty catalog for a shorter
+    time.
+    """
+    return cached_lookup(
+        "nowpayments:merchant_currencies",
+        lambda: _load_merchant_currencies(api),
+        60,
+        negative_ttl=30,
+    )
+
+
+def _load_merchant_currencies(api: NowPaymentsAPI) -> CurrencyCatalog:
     try:
-        currencies_data = api.get_merchant_coins()
         # merchant/coins returns selectedCurrencies (list) or a list directly
-        if (
-            isinstance(currencies_data, dict)
-            and "selectedCurrencies" in currencies_data
-        ):
-            available: List[Union[str, Dict[str, Any]]] = currencies_data.get(
-                "selectedCurrencies", []
-            )
-        elif isinstance(currencies_data, list):
-            available = currencies_data
-        else:
-            available = []
+        return CurrencyCatalog.build(merchant_codes(api.get_merchant_coins()))
     except Exception as e:
         logger.warning(f"Failed to fetch merchant currencies: {e}")
-        cache.set(cache_key, [], 30)
-        return []
-
-    def norm(s: str) -> str:
-        """Normalize currency code: lowercase and alphanumeric only."""
-        return "".join(c for c in str(s).lower() if c.isalnum())
-
-    matched: List[str] = []
-    seen: set[str] = set()
-    for entry in available:
-        code: Optional[str] = None
-        if isinstance(entry, dict):
-            code = (
-                entry.get("pay_currency")
-                or entry.get("code")
-                or entry.get("currency")
-                or entry.get("symbol")
-                or entry.get("name")
-            )
-        else:
-            code = entry
-        if not code:
-            continue
-        normalized = norm(code)
-        if normalized not in seen:
-            seen.add(normalized)
-            # Keep original code string returned by provider where possible
-            matched.append(code)
-
-    cache.set(cache_key, matched, 60)
-    return matched
+        return CurrencyCatalog()
 
 
 @login_required
@@ -144,9 +123,14 @@ def success_view(request):
 
 @csrf_exempt
 def stripe_webhook(request):
-    # Use the StripeProvider to handle the webhook
+    # Use the StripeProvider to handle the webhook; with the inbox enabled the
+    # event is only stored here and applied by drain_webhook_inbox
     provider = StripeProvider()
-    if provider.handle_webhook(request):
+    if getattr(settings, "STRIPE_WEBHOOK_INBOX", False):
+        handled = provider.enqueue_webhook(request)
+    else:
+        handled = provider.handle_webhook(request)
+    if handled:
         return HttpResponse(status=200)
     else:
         return HttpResponse(status=400)
@@ -203,6 +187,43 @@ def crypto_payment_selection(request, plan_id):
     )
 
 
+@login_required
+async def crypto_payment_selection_async(request, plan_id):
+    """Async variant of ``crypto_payment_selection`` for ASGI deployments."""
+    plan = await aget_object_or_404(Plan, id=plan_id)
+    provider = NowPaymentsProvider()
+    currencies = []
+    error = None
+    if not getattr(provider, "api_key", None):
+        error = _(
+            "Payment provider is not configured. Please contact the site administrator."
+        )
+    else:
+        try:
+            currencies = await provider.get_async_api().get_merchant_coins_enriched()
+        except Exception as e:
+            logger.warning(f"Failed to fetch enriched merchant currencies: {e}")
+        if not currencies:
+            error = _(
+                "No payment currencies are currently available from the payment provider."
+            )
+            currencies = []
+
+    # Messages and the template context (site_config, user) touch the session
+    # and the database, which are sync-only.
+    @sync_to_async
+    def respond():
+        if error:
+            messages.error(request, error)
+        return render(
+            request,
+            "subscriptions/crypto_selection.html",
+            {"plan": plan, "currencies": currencies},
+        )
+
+    return await respond()
+
+
 @login_required
 def get_crypto_estimate(request):
     plan_id = request.GET.get("plan_id")
@@ -211,95 +232,99 @@ def get_crypto_estimate(request):
 
     provider = NowPaymentsProvider()
     if not getattr(provider, "api_key", None):
-        return HttpResponse(
-            json.dumps({"error": str(_("Payment provider not configured"))}),
-            status=400,
-            content_type="application/json",
-        )
+        return _json_error(_("Payment provider not configured"))
 
     api = provider.get_api()
 
-    # Use enriched merchant coins to validate and resolve codes
+    # Use the merchant currency catalog to validate and resolve codes
     try:
-        currencies_enriched = api.get_merchant_coins_enriched()
+        catalog = api.get_currency_catalog()
     except Exception as e:
         logger.warning(f"Failed to fetch enriched merchant currencies: {e}")
-        currencies_enriched = []
+        catalog = CurrencyCatalog()
 
-    if not currencies_enriched:
-        return HttpResponse(
-            json.dumps({"error": str(_("No currencies supported by provider"))}),
-            status=400,
-            content_type="application/json",
-        )
+    if not catalog:
+        return _json_error(_("No currencies supported by provider"))
 
     # Allow client to request a specific currency; default to the first available
-    requested = request.GET.get("currency")
-
-    def norm(s: str) -> str:
-        return "".join(c for c in str(s).lower() if c.isalnum())
-
-    if requested:
-        req_norm = norm(requested)
-        chosen = None
-        for item in currencies_enriched:
-            code = item["code"] if isinstance(item, dict) else item
-            if norm(code) == req_norm:
-                chosen = code
-                break
-            # also allow matching by name
-            name = item.get("name") if isinstance(item, dict) else None
-            if name and norm(name) == req_norm:
-                chosen = code
-                break
-        if not chosen:
-            return HttpResponse(
-                json.dumps({"error": str(_("Requested currency is not available"))}),
-                status=400,
-                content_type="application/json",
-            )
-        currency = chosen
-    else:
-        # default: first merchant code
-        first_item = currencies_enriched[0]
-        currency = first_item["code"] if isinstance(first_item, dict) else first_item
+    currency = catalog.choose(request.GET.get("currency"))
+    if not currency:
+        return _json_error(_("Requested currency is not available"))
 
     plan = get_object_or_404(Plan, id=plan_id)
 
     try:
-        # Get minimum amount
-        min_amount_data = api.get_minimum_payment_amount(
-            {
-                "currency_from": currency,
-                "currency_to": plan.currency.lower(),  # Assuming plan currency is fiat like 'usd'
-            }
+        # Minimum amount and estimate are fetched concurrently and cached briefly
+        quote = get_cached_crypto_quote(
+            api, float(plan.price), plan.currency.lower(), currency
         )
-        min_amount = min_amount_data.get("min_amount", 0)
+    except TimeoutError:
+        return _json_error(_("Payment provider timed out"), status=504)
+    except Exception as e:
+        return _json_error(str(e), status=500)
+    return _estimate_response(quote, currency)
 
-        # Get estimate
-        estimate_data = api.get_estimate_price(
-            {
-                "amount": float(plan.price),
-                "currency_from": plan.currency.lower(),
-                "currency_to": currency,
-            }
-        )
-        estimated_amount = estimate_data.get("estimated_amount", 0)
-
-        return HttpResponse(
-            json.dumps(
-                {
-                    "min_amount": min_amount,
-                    "estimated_amount": estimated_amount,
-                    "currency": currency,
-                }
-            ),
-            content_type="application/json",
-        )
+
+@login_required
+async def get_crypto_estimate_async(request):
+    """Async variant of ``get_crypto_estimate`` for ASGI deployments."""
+    plan_id = request.GET.get("plan_id")
+    if not plan_id:
+        return HttpResponse(status=400)
+
+    provider = NowPaymentsProvider()
+    if not getattr(provider, "api_key", None):
+        return _json_error(_("Payment provider not configured"))
+
+    api = provider.get_async_api()
+
+    try:
+        catalog = await api.get_currency_catalog()
     except Exception as e:
-        return HttpResponse(
-            json.dumps({"error": str(e)}), status=500, content_type="application/json"
+        logger.warning(f"Failed to fetch enriched merchant currencies: {e}")
+        catalog = CurrencyCatalog()
+
+    if not catalog:
+        return _json_error(_("No currencies supported by provider"))
+
+    currency = catalog.choose(request.GET.get("currency"))
+    if not currency:
+        return _json_error(_("Requested currency is not available"))
+
+    plan = await aget_object_or_404(Plan, id=plan_id)
+
+    try:
+        quote = await aget_cached_crypto_quote(
+            api, float(plan.price), plan.currency.lower(), currency
         )
+    except TimeoutError:
+        return _json_error(_("Payment provider timed out"), status=504)
+    except Exception as e:
+        return _json_error(str(e), status=500)
+    return _estimate_response(quote, currency)
+
+
+def _estimate_response(quote: Dict[str, Any], currency: str) -> HttpResponse:
+    """Serialize a quote; missing parts (``quote["partial"]``) are null."""
+    return HttpResponse(
+        json.dumps(
+            {
+                "min_amount": quote["min_amount"],
+                "estimated_amount": quote["estimated_amount"],
+                "currency": currency,
+                "partial": quote["partial"],
+            }
+        ),
+        content_type="application/json",
+    )
+
+
+def _json_error(message, status: int = 400) -> HttpResponse:
+    return HttpResponse(
+        json.dumps({"error": str(message)}),
+        status=status,
+        content_type="application/json",
+    )
 
 
 @login_required
@@ -323,41 +348,21 @@ def create_crypto_invoice(request):
 
     api: NowPaymentsAPI = provider.get_api()
 
-    # Use enriched merchant coins to validate and resolve codes
+    # Use the merchant currency catalog to validate and resolve codes
     try:
-        currencies_enriched = api.get_merchant_coins_enriched()
+        catalog = api.get_currency_catalog()
     except Exception as e:
         logger.warning(f"Failed to fetch enriched merchant currencies: {e}")
-        currencies_enriched = []
+        catalog = CurrencyCatalog()
 
-    if not currencies_enriched:
+    if not catalog:
         messages.error(request, _("No payment currencies are available right now."))
         return redirect("subscriptions:crypto_selection", plan_id=plan_id)
 
-    requested = request.POST.get("currency")
-
-    def norm(s: str) -> str:
-        return "".join(c for c in str(s).lower() if c.isalnum())
-
-    if requested:
-        req_norm = norm(requested)
-        chosen = None
-        for item in currencies_enriched:
-            code = item["code"] if isinstance(item, dict) else item
-            if norm(code) == req_norm:
-                chosen = code
-                break
-            name = item.get("name") if isinstance(item, dict) else None
-            if name and norm(name) == req_norm:
-                chosen = code
-                break
-        if not chosen:
-            messages.error(request, _("Selected currency is not supported."))
-            return redirect("subscriptions:crypto_selection", plan_id=plan_id)
-        currency = chosen
-    else:
-        first_item = currencies_enriched[0]
-        currency = first_item["code"] if isinstance(first_item, dict) else first_item
+    currency = catalog.choose(request.POST.get("currency"))
+    if not currency:
+        messages.error(request, _("Selected currency is not supported."))
+        return redirect("subscriptions:crypto_selection", plan_id=plan_id)
 
     try:
         # Create invoice
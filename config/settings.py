@@ -103,6 +103,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",
+    "apps.core.middleware.EffectiveRoleMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -118,6 +119,7 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
                 "django.template.context_processors.i18n",
+                "apps.core.context_processors.site_config",
             ],
         },
     },
@@ -292,3 +294,84 @@ REST_FRAMEWORK = {
     # Anon: 60 requests per minute, Authenticated users: 600 requests per minute
     "DEFAULT_THROTTLE_RATES": {"anon": "60/min", "user": "600/min"},
 }
+
+# Effective role cache used by apps.core.utils (seconds). The local tier is a
+# per-process LRU in front of the shared Django cache; keep it short so that
+# other workers observe role changes quickly.
+CORE_ROLE_CACHE_TTL = env.int("CORE_ROLE_CACHE_TTL", default=300)
+CORE_ROLE_CACHE_LOCAL_TTL = env.int("CORE_ROLE_CACHE_LOCAL_TTL", default=30)
+CORE_ROLE_CACHE_MAXSIZE = env.int("CORE_ROLE_CACHE_MAXSIZE", default=4096)
+# How often (seconds) each process checks the shared generation counter of the
+# in-memory role limits snapshot (RoleImageLimit/RoleTextLimit/SiteConfiguration).
+CORE_LIMITS_CHECK_INTERVAL = env.int("CORE_LIMITS_CHECK_INTERVAL", default=5)
+# Cache-Control max-age (seconds) for the polled /api/core/ config and limits
+# endpoints. Responses also carry strong ETags for conditional requests.
+CORE_API_CACHE_MAX_AGE = env.int("CORE_API_CACHE_MAX_AGE", default=60)
+# Max age (seconds) of the effective role stored in the session by
+# apps.core.middleware.EffectiveRoleMiddleware before it is recomputed.
+CORE_SESSION_ROLE_TTL = env.int("CORE_SESSION_ROLE_TTL", default=300)
+# How often (seconds) each process checks the shared version stamp of cached
+# singletons (e.g. SiteConfiguration) before reusing its local copy
+# (see apps.core.models.CachedSingletonModel).
+CORE_SINGLETON_CHECK_INTERVAL = env.int("CORE_SINGLETON_CHECK_INTERVAL", default=5)
+# NowPayments HTTP transport (apps.subscriptions.transport): pool size of the
+# shared session, default (connect, read) timeouts in seconds, retries for
+# idempotent GETs and the circuit breaker that fails fast while the provider
+# is degraded (consecutive failures before opening, seconds before a retry).
+NOWPAYMENTS_POOL_MAXSIZE = env.int("NOWPAYMENTS_POOL_MAXSIZE", default=20)
+NOWPAYMENTS_CONNECT_TIMEOUT = env.float("NOWPAYMENTS_CONNECT_TIMEOUT", default=3.05)
+NOWPAYMENTS_READ_TIMEOUT = env.float("NOWPAYMENTS_READ_TIMEOUT", default=10.0)
+NOWPAYMENTS_MAX_RETRIES = env.int("NOWPAYMENTS_MAX_RETRIES", default=2)
+NOWPAYMENTS_BREAKER_THRESHOLD = env.int("NOWPAYMENTS_BREAKER_THRESHOLD", default=5)
+NOWPAYMENTS_BREAKER_RESET_TIMEOUT = env.int(
+    "NOWPAYMENTS_BREAKER_RESET_TIMEOUT", default=30
+)
+# Serve the crypto selection and estimate pages with async views backed by the
+# async NowPayments client (ASGI deployments; requires the "async" extra,
+# i.e. httpx). Max concurrent provider connections per event loop.
+NOWPAYMENTS_ASYNC_VIEWS = env.bool("NOWPAYMENTS_ASYNC_VIEWS", default=False)
+NOWPAYMENTS_ASYNC_MAX_CONNECTIONS = env.int(
+    "NOWPAYMENTS_ASYNC_MAX_CONNECTIONS", default=200
+)
+# Combined deadline (seconds) for fetching the NowPayments minimum amount and
+# estimate concurrently, and the size of the thread pool used under WSGI.
+NOWPAYMENTS_QUOTE_DEADLINE = env.float("NOWPAYMENTS_QUOTE_DEADLINE", default=6.0)
+NOWPAYMENTS_QUOTE_WORKERS = env.int("NOWPAYMENTS_QUOTE_WORKERS", default=16)
+# How long (seconds) a NowPayments quote (minimum amount + estimate) for a
+# given plan price, plan currency and pay currency is reused across users.
+NOWPAYMENTS_QUOTE_CACHE_TTL = env.int("NOWPAYMENTS_QUOTE_CACHE_TTL", default=15)
+# How long (seconds) each process reuses its copy of the NowPayments currency
+# catalog before reading it from the shared cache again.
+NOWPAYMENTS_CATALOG_LOCAL_TTL = env.int("NOWPAYMENTS_CATALOG_LOCAL_TTL", default=5)
+# Rate limiting of NowPayments calls per endpoint class (see RATE_LIMITS in
+# apps.subscriptions.transport, overridable with NOWPAYMENTS_RATE_LIMITS):
+# longest time (seconds) a call may queue for a slot before it is rejected,
+# and the limiter backend ("cache" shared by workers, "local" per process;
+# unset picks "local" when the default cache is LocMemCache).
+NOWPAYMENTS_RATE_LIMIT_MAX_WAIT = env.float(
+    "NOWPAYMENTS_RATE_LIMIT_MAX_WAIT", default=2.0
+)
+NOWPAYMENTS_RATE_LIMIT_BACKEND = env("NOWPAYMENTS_RATE_LIMIT_BACKEND", default=None)
+# Base URLs of the provider APIs. Point both at a local stub server
+# (``manage.py run_payment_stubs``) to load-test the checkout flows offline;
+# STRIPE_API_BASE unset keeps the Stripe library default.
+NOWPAYMENTS_API_BASE = env(
+    "NOWPAYMENTS_API_BASE", default="https://api.nowpayments.io/v1/"
+)
+STRIPE_API_BASE = env("STRIPE_API_BASE", default=None)
+# Acknowledge Stripe webhooks as soon as the verified event is stored in the
+# WebhookEvent inbox, and apply it in the background with
+# ``manage.py drain_webhook_inbox`` (which must then be running).
+STRIPE_WEBHOOK_INBOX = env.bool("STRIPE_WEBHOOK_INBOX", default=False)
+# A failed inbox event is retried after WEBHOOK_RETRY_BACKOFF seconds, doubled
+# on every further failure up to WEBHOOK_RETRY_BACKOFF_MAX, so transient
+# errors (lock timeouts, rows not committed yet) do not use up its attempts.
+WEBHOOK_RETRY_BACKOFF = env.int("WEBHOOK_RETRY_BACKOFF", default=30)
+WEBHOOK_RETRY_BACKOFF_MAX = env.int("WEBHOOK_RETRY_BACKOFF_MAX", default=3600)
+# Roles granted by other apps, consulted by apps.core role resolution before
+# group names: an active subscription grants SubscriberPaid. Entitlements are
+# cached per user for SUBSCRIPTIONS_ENTITLEMENT_CACHE_TTL seconds.
+CORE_ENTITLEMENT_RESOLVER = "apps.subscriptions.entitlements.entitlement_roles"
+SUBSCRIPTIONS_ENTITLEMENT_CACHE_TTL = env.int(
+    "SUBSCRIPTIONS_ENTITLEMENT_CACHE_TTL", default=300
+)